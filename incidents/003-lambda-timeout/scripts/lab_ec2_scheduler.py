@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+Batched EC2 stop/start scheduler, the permanent fix for incident 003.
+
+The original Lambda called stop_instances and the instance_stopped waiter
+once per instance, about 5 s each, and hit its 30 s timeout at 15 instances.
+This version resolves the instances from a tag selector with one paginated
+describe_instances, stops or starts them in multi-ID calls of BATCH_SIZE
+issued concurrently, and then (optionally) polls their state with batched
+describe_instance_status rounds of up to 100 IDs instead of one waiter per
+instance. Each round costs a handful of API calls however many instances
+there are, so 1,000+ instances fit in a Lambda invocation.
+
+Everything runs against a time budget: the Lambda's remaining time (minus a
+safety margin) or --budget-s. When it runs out no new batches are issued and
+the instances not yet handled or not yet in the target state are reported,
+so the next scheduled run can pick them up. A batch rejected because of one
+of its instances is split in halves and retried, so one stopped-already or
+spot instance does not hold up the other 99. The report lists the latency
+of every batch.
+
+The EC2 client is passed in (default: boto3.client("ec2")), so the engine can
+be exercised against moto's mock_aws.
+
+Usage:
+    python lab_ec2_scheduler.py stop --tag Schedule=office-hours [--tag Env=dev] [--wait]
+    python lab_ec2_scheduler.py start --tag Schedule=office-hours --dry-run --json
+    (as a Lambda: handler lab_ec2_scheduler.lambda_handler,
+     event {"action": "stop", "tags": {"Schedule": "office-hours"}, "wait": false})
+"""
+
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# --------------- CONFIGURATION ---------------
+
+BATCH_SIZE = 100         # instance IDs per stop_instances / start_instances call
+STATUS_BATCH_SIZE = 100  # describe_instance_status accepts at most 100 IDs
+DESCRIBE_PAGE_SIZE = 1000  # instances per describe_instances page (the API maximum)
+MAX_WORKERS = 8          # concurrent API calls; boto3 clients are thread-safe
+POLL_INTERVAL_S = 5.0
+SAFETY_MARGIN_S = 3.0    # left for building and returning the report
+
+# Errors that are not about any one instance; splitting the batch would not help
+CALL_ERRORS = {"UnauthorizedOperation", "AuthFailure", "RequestLimitExceeded", "Throttling"}
+
+# action -> (states the instances must be in to be acted on, state to wait for)
+ACTIONS = {
+    "stop": (("pending", "running"), "stopped"),
+    "start": (("stopped",), "running"),
+}
+
+# --------------- HELPERS ---------------
+
+
+def parse_tag_selector(selectors):
+    """{"Key": ["Value", ...]} from "Key=Value" strings; repeated keys match any of their values."""
+    tags = {}
+    for selector in selectors:
+        key, sep, value = selector.partition("=")
+        if not sep or not key:
+            raise ValueError(f"tag selector must look like Key=Value: {selector!r}")
+        tags.setdefault(key, []).append(value)
+    return tags
+
+
+def chunked(items, size):
+    items = list(items)
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+class TimeBudget:
+    """Wall-clock budget, from a Lambda context or a number of seconds."""
+
+    def __init__(self, seconds, margin=SAFETY_MARGIN_S):
+        self.deadline = time.monotonic() + max(seconds - margin, 0)
+
+    @classmethod
+    def from_context(cls, context, margin=SAFETY_MARGIN_S):
+        return cls(context.get_remaining_time_in_millis() / 1000, margin)
+
+    def remaining(self):
+        return max(self.deadline - time.monotonic(), 0)
+
+    def expired(self):
+        return self.remaining() <= 0
+
+
+def _error_code(e):
+    return getattr(e, "response", {}).get("Error", {}).get("Code", type(e).__name__)
+
+
+# --------------- ENGINE ---------------
+
+
+def find_instances(client, tags, states, page_size=DESCRIBE_PAGE_SIZE):
+    """IDs of the instances that carry every tag in tags and are in one of states."""
+    filters = [{"Name": f"tag:{key}", "Values": values} for key, values in sorted(tags.items())]
+    filters.append({"Name": "instance-state-name", "Values": list(states)})
+    ids = []
+    pages = client.get_paginator("describe_instances").paginate(Filters=filters,
+                                                                 PaginationConfig={"PageSize": page_size})
+    for page in pages:
+        for reservation in page["Reservations"]:
+            ids.extend(instance["InstanceId"] for instance in reservation["Instances"])
+    return sorted(ids)
+
+
+def _change_state(client, action, ids, budget, dry_run):
+    """
+    One multi-ID stop/start call. A batch rejected because of some of its
+    instances (IncorrectInstanceState, UnsupportedOperation on a spot
+    instance, ...) is split in halves and retried, so a bad instance only
+    fails itself. Returns (batch records, ids not sent because the budget ran out).
+    """
+    if budget.expired():
+        return [], list(ids)
+    call = client.stop_instances if action == "stop" else client.start_instances
+    start = time.perf_counter()
+    error = None
+    try:
+        call(InstanceIds=ids, DryRun=dry_run)
+    except client.exceptions.ClientError as e:
+        # With DryRun=True, success is reported as a DryRunOperation error
+        if not (dry_run and _error_code(e) == "DryRunOperation"):
+            error = _error_code(e)
+    split = error is not None and len(ids) > 1 and error not in CALL_ERRORS
+    records = [{"ids": ids, "latency_ms": round((time.perf_counter() - start) * 1000, 1), "error": error,
+                "split": split}]
+    not_sent = []
+    if split:
+        half = len(ids) // 2
+        for part in (ids[:half], ids[half:]):
+            part_records, part_not_sent = _change_state(client, action, part, budget, dry_run)
+            records += part_records
+            not_sent += part_not_sent
+    return records, not_sent
+
+
+def change_state(client, action, ids, budget, dry_run=False, batch_size=BATCH_SIZE, workers=MAX_WORKERS):
+    """
+    Stop or start ids in concurrent multi-ID batches; every call checks the
+    budget first. Returns (batch records, ids never sent because the budget
+    ran out). Records of split batches have "split" set; their instances are
+    accounted for by the records of the halves.
+    """
+    records, not_sent = [], []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_change_state, client, action, batch, budget, dry_run)
+                   for batch in chunked(ids, batch_size)]
+        for future in futures:
+            batch_records, batch_not_sent = future.result()
+            records += batch_records
+            not_sent += batch_not_sent
+    return records, sorted(not_sent)
+
+
+def _states(client, ids):
+    """{instance id: state name} for up to STATUS_BATCH_SIZE ids, one describe_instance_status call."""
+    states = {}
+    kwargs = {"InstanceIds": ids, "IncludeAllInstances": True}
+    while True:
+        page = client.describe_instance_status(**kwargs)
+        for status in page["InstanceStatuses"]:
+            states[status["InstanceId"]] = status["InstanceState"]["Name"]
+        if not page.get("NextToken"):
+            return states
+        kwargs["NextToken"] = page["NextToken"]
+
+
+def wait_for_state(client, ids, target, budget, interval=POLL_INTERVAL_S, workers=MAX_WORKERS):
+    """
+    Poll ids in batched describe_instance_status rounds until all are in
+    target or the budget runs out. Returns (rounds, ids still pending), each
+    round being {"checked", "reached", "latency_ms"}.
+    """
+    pending = set(ids)
+    rounds = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while pending and not budget.expired():
+            start = time.perf_counter()
+            checked = len(pending)
+            for states in pool.map(lambda batch: _states(client, batch), chunked(sorted(pending), STATUS_BATCH_SIZE)):
+                pending -= {iid for iid, state in states.items() if state == target}
+            rounds.append({"checked": checked, "reached": checked - len(pending),
+                           "latency_ms": round((time.perf_counter() - start) * 1000, 1)})
+            if pending:
+                time.sleep(min(interval, budget.remaining()))
+    return rounds, sorted(pending)
+
+
+def run(client, action, tags, budget, wait=False, dry_run=False, batch_size=BATCH_SIZE):
+    """Resolve, stop/start and optionally wait; returns the JSON-serialisable report."""
+    if action not in ACTIONS:
+        raise ValueError(f"action must be one of {', '.join(ACTIONS)}: {action!r}")
+    eligible, target = ACTIONS[action]
+    start = time.perf_counter()
+
+    t = time.perf_counter()
+    ids = find_instances(client, tags, eligible)
+    describe_ms = round((time.perf_counter() - t) * 1000, 1)
+
+    records, not_sent = change_state(client, action, ids, budget, dry_run, batch_size)
+    failed = sorted(iid for r in records if r["error"] and not r["split"] for iid in r["ids"])
+    sent = sorted(iid for r in records if not r["error"] for iid in r["ids"])
+
+    rounds, pending = [], []
+    if wait and not dry_run:
+        rounds, pending = wait_for_state(client, sent, target, budget)
+
+    return {
+        "action": action,
+        "tags": tags,
+        "dry_run": dry_run,
+        "matched": len(ids),
+        "describe_ms": describe_ms,
+        "batches": [{"size": len(r["ids"]), "latency_ms": r["latency_ms"], "error": r["error"], "split": r["split"]}
+                    for r in records],
+        "sent": len(sent),
+        "failed": failed,
+        "not_sent": not_sent,
+        "poll_rounds": rounds,
+        "pending": pending,
+        "budget_exhausted": budget.expired(),
+        "elapsed_ms": round((time.perf_counter() - start) * 1000, 1),
+    }
+
+
+# --------------- LAMBDA ---------------
+
+
+def lambda_handler(event, context):
+    tags = {k: v if isinstance(v, list) else [v] for k, v in (event.get("tags") or {}).items()}
+    if not tags:
+        # Never act on every instance in the account because of an empty event
+        return {"statusCode": 400, "body": json.dumps({"error": "event needs a non-empty 'tags' selector"})}
+    action = event.get("action", "stop")
+    if action not in ACTIONS:
+        return {"statusCode": 400,
+                "body": json.dumps({"error": f"'action' must be one of {', '.join(ACTIONS)}, not {action!r}"})}
+
+    import boto3
+
+    report = run(boto3.client("ec2"), action, tags, TimeBudget.from_context(context),
+                 wait=bool(event.get("wait", False)), dry_run=bool(event.get("dry_run", False)))
+    status = 200 if not (report["failed"] or report["not_sent"] or report["pending"]) else 207
+    return {"statusCode": status, "body": json.dumps(report)}
+
+
+# --------------- MAIN ---------------
+
+
+def print_report(report):
+    print(f"[INFO] {report['action']}: {report['matched']} instance(s) matched "
+          f"(describe {report['describe_ms']} ms)" + (" [dry run]" if report["dry_run"] else ""))
+    for i, batch in enumerate(report["batches"], 1):
+        status = "ok"
+        if batch["error"]:
+            status = f"{'split and retried' if batch['split'] else 'FAILED'} ({batch['error']})"
+        print(f"  batch {i}: {batch['size']} instance(s) in {batch['latency_ms']} ms - {status}")
+    for i, rnd in enumerate(report["poll_rounds"], 1):
+        print(f"  poll {i}: {rnd['reached']}/{rnd['checked']} reached target in {rnd['latency_ms']} ms")
+    if report["failed"]:
+        print(f"[WARN] {len(report['failed'])} instance(s) in failed batches: {', '.join(report['failed'])}")
+    if report["not_sent"]:
+        print(f"[WARN] Time budget ran out; {len(report['not_sent'])} instance(s) not sent")
+    if report["pending"]:
+        print(f"[WARN] {len(report['pending'])} instance(s) not yet in the target state: "
+              f"{', '.join(report['pending'])}")
+    print(f"[INFO] Done in {report['elapsed_ms']} ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stop or start tagged EC2 instances in batches.")
+    parser.add_argument("action", choices=sorted(ACTIONS))
+    parser.add_argument("--tag", action="append", required=True, metavar="KEY=VALUE",
+                        help="Only instances with this tag (repeatable; all keys must match).")
+    parser.add_argument("--wait", action="store_true",
+                        help="Poll until every instance reached the target state (or the budget ran out).")
+    parser.add_argument("--dry-run", action="store_true", help="Check permissions without changing anything.")
+    parser.add_argument("--budget-s", type=float, default=900.0,
+                        help="Time budget in seconds (default: 900, the Lambda maximum).")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE,
+                        help=f"Instance IDs per stop/start call (default: {BATCH_SIZE}).")
+    parser.add_argument("--region", help="AWS region (default: from the environment).")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON.")
+    args = parser.parse_args(argv)
+
+    try:
+        tags = parse_tag_selector(args.tag)
+    except ValueError as e:
+        parser.error(str(e))
+
+    import boto3
+
+    client = boto3.client("ec2", region_name=args.region)
+    report = run(client, args.action, tags, TimeBudget(args.budget_s), wait=args.wait,
+                 dry_run=args.dry_run, batch_size=args.batch_size)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+    return 1 if report["failed"] or report["not_sent"] or report["pending"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
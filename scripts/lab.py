@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Single entry point for the lab scripts.
+
+Usage:
+    python lab.py scan [--jobs N] [--ndjson PATH] ...     portfolio scanner
+    python lab.py validate [--dry-run] ...                 portfolio validator
+    python lab.py audit [--dry-run] ...                    repo auditor
+    python lab.py entrycheck [--skip-links] ...            profile/portfolio entry check
+    python lab.py check-links URL [URL ...]                external link checker
+    python lab.py check-local-links [REPO ...]            relative link/image/anchor checker
+    python lab.py assets {inventory,optimize} [REPO ...]  image inventory and lossless recompression
+    python lab.py history {trend,regressions,fleet,...}   scan history queries
+    python lab.py references who-links-to X [X ...]       project/URL references across markdown
+    python lab.py incident ID PHASE [ARGS ...]             run incidents/ID-*/scripts/lab_PHASE.py
+    python lab.py incident [ID]                            list incidents and their phases
+
+Nothing but the chosen subcommand's module is imported, and each module keeps
+its heavy dependencies (aiohttp, prettytable, process pools) inside the code
+paths that use them, so `--help` and fast paths start quickly. Everything after
+the subcommand is passed through to that script's own argument parser.
+lab_import_budget.py keeps startup within budget.
+"""
+
+import os
+import sys
+
+# subcommand -> (module, one-line description)
+COMMANDS = {
+    "scan": ("lab_cloud_portfolio_scanner_v3", "Score repos for cloud content and documentation quality."),
+    "validate": ("lab_cloud_portfolio_validator", "Rate portfolio repos and auto-fix README gaps."),
+    "audit": ("lab_entryCloudRepoAuditor", "Audit portfolio repos and auto-fix README gaps."),
+    "entrycheck": ("lab_cloudentrycheck", "Check the profile and portfolio repos for TODOs, stale dates and links."),
+    "check-links": ("lab_link_checker", "Check external URLs concurrently."),
+    "references": ("lab_reference_index", "Find which markdown files mention a project or link to a URL."),
+    "check-local-links": ("lab_local_links", "Check relative links, images and #anchors in markdown, offline."),
+    "assets": ("lab_assets", "Inventory images against the size budget and recompress them losslessly."),
+    "history": ("lab_history", "Query score trends, regressions and fleet averages from the scan history."),
+}
+
+INCIDENTS_ROOT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "incidents")
+
+
+def usage():
+    lines = ["usage: lab <command> [args ...]", "", "commands:"]
+    for name, (_, description) in COMMANDS.items():
+        lines.append(f"  {name:<17} {description}")
+    lines.append(f"  {'incident':<17} Run a phase script of an incident lab: incident ID PHASE [ARGS ...].")
+    lines += ["", "Run `lab <command> --help` for the options of a command."]
+    return "\n".join(lines)
+
+
+# ---------------- INCIDENTS ----------------
+
+
+def incident_dirs():
+    """{incident dir name: phase names} for every incident with phase scripts."""
+    found = {}
+    try:
+        names = sorted(os.listdir(INCIDENTS_ROOT))
+    except OSError:
+        return found
+    for name in names:
+        scripts = os.path.join(INCIDENTS_ROOT, name, "scripts")
+        if not os.path.isdir(scripts):
+            continue
+        found[name] = sorted(f[len("lab_"):-len(".py")].replace("_", "-") for f in os.listdir(scripts)
+                             if f.startswith("lab_") and f.endswith(".py"))
+    return found
+
+
+def find_incident(incident_id):
+    """Incident directory name for an id ("003" or "003-lambda-timeout"), or None."""
+    for name in incident_dirs():
+        if name == incident_id or name.startswith(incident_id + "-"):
+            return name
+    return None
+
+
+def run_incident(argv):
+    incidents = incident_dirs()
+    if len(argv) < 2 or argv[0] in ("-h", "--help"):
+        wanted = find_incident(argv[0]) if argv and argv[0] not in ("-h", "--help") else None
+        print("usage: lab incident ID PHASE [ARGS ...]\n\nincidents:")
+        for name, phases in incidents.items():
+            if wanted is None or name == wanted:
+                print(f"  {name}: {', '.join(phases)}")
+        return 0 if not argv or argv[0] in ("-h", "--help") or wanted else 2
+
+    name = find_incident(argv[0])
+    if name is None:
+        print(f"lab incident: unknown incident {argv[0]!r}", file=sys.stderr)
+        return 2
+    phase = argv[1].replace("-", "_")
+    script = os.path.join(INCIDENTS_ROOT, name, "scripts", f"lab_{phase}.py")
+    if not os.path.isfile(script):
+        print(f"lab incident: {name} has no phase {argv[1]!r} (phases: {', '.join(incidents[name])})",
+              file=sys.stderr)
+        return 2
+
+    import runpy
+
+    # Run the script as if it had been started directly: its own argv and import path
+    sys.argv = [script] + argv[2:]
+    sys.path.insert(0, os.path.dirname(script))
+    try:
+        runpy.run_path(script, run_name="__main__")
+    except SyntaxError as e:
+        print(f"lab incident: {script} does not compile: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+# ---------------- MAIN ----------------
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] in ("-h", "--help"):
+        print(usage())
+        return 0 if argv else 2
+    command, rest = argv[0], argv[1:]
+    if command == "incident":
+        return run_incident(rest)
+    if command not in COMMANDS:
+        print(f"lab: unknown command {command!r}\n\n{usage()}", file=sys.stderr)
+        return 2
+
+    import importlib
+
+    module = importlib.import_module(COMMANDS[command][0])
+    # argparse in the subcommand names itself after argv[0]
+    sys.argv = [f"lab {command}"] + rest
+    return module.main(rest)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+"""
+Image asset inventory, size budget and lossless recompression.
+
+inventory lists every image of a repo with its format, dimensions (read
+from the file header, without decoding pixels) and size, and compares the
+total with the per-repo asset budget. The validator and auditor apply the
+same budget to their score (see AssetRule in lab_rule_engine).
+
+optimize shrinks PNG and JPEG files without changing a pixel:
+- PNG: the scanline data is re-deflated at level 9 with every zlib
+  strategy, and the smallest stream is kept. The tIME chunk is dropped;
+  colour chunks (gAMA, cHRM, sRGB, iCCP) and pHYs are kept.
+- JPEG: comment and IPTC segments are dropped. The entropy-coded data is
+  copied as is.
+Authorship and licence metadata (PNG text and EXIF chunks, JPEG XMP and
+EXIF) is kept unless --strip-metadata is given; even then, a JPEG EXIF
+segment that rotates the image is kept.
+
+A file is only rewritten (atomically) when the result is smaller. Files run
+in parallel with --jobs. The SHA-256 of every image that is already optimal,
+including everything optimize wrote, is stored in .scan_cache, so unchanged
+images are skipped without being decoded again.
+
+Usage:
+    python lab_assets.py inventory [REPO ...] [--budget-mb N] [--json]
+    python lab_assets.py optimize [REPO ...] [--jobs N] [--dry-run] [--strip-metadata]
+"""
+
+import argparse
+import functools
+import hashlib
+import json
+import os
+import struct
+import sys
+import zlib
+from collections import namedtuple
+from pathlib import Path
+
+from lab_autofix import atomic_write_bytes
+from lab_manifest import BACKENDS, build_manifest
+from lab_scan_cache import ScanCache, config_fingerprint
+
+# --------------- CONFIGURATION ---------------
+
+IMAGE_SUFFIXES = (".png", ".jpg", ".jpeg", ".gif", ".webp", ".svg")
+DEFAULT_BUDGET_MB = 10     # image bytes per repo before the score is docked
+DEFAULT_STATE_DIR = ".scan_cache"
+HEAD_BYTES = 64 * 1024     # enough for the dimensions of all but JPEGs with huge metadata
+SNIFF_BYTES = 1024         # enough for image_dimensions() to name the format
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+PNG_DROP_CHUNKS = {b"tIME"}
+PNG_METADATA_CHUNKS = {b"tEXt", b"zTXt", b"iTXt", b"eXIf"}   # dropped with --strip-metadata
+ZLIB_STRATEGIES = [zlib.Z_DEFAULT_STRATEGY, zlib.Z_FILTERED] + [
+    getattr(zlib, name) for name in ("Z_RLE",) if hasattr(zlib, name)]
+JPEG_DROP_SEGMENTS = {0xFE, 0xED}   # COM, APP13 (IPTC)
+
+
+def pipeline_key(strip_metadata):
+    """Stored "already optimal" hashes are only valid for the same pipeline."""
+    chunks = PNG_DROP_CHUNKS | (PNG_METADATA_CHUNKS if strip_metadata else set())
+    return config_fingerprint(sorted(c.decode() for c in chunks), ZLIB_STRATEGIES, sorted(JPEG_DROP_SEGMENTS),
+                              ["jpeg-strip-app1-keep-orientation" if strip_metadata else "jpeg-keep-app1"])
+
+
+ImageInfo = namedtuple("ImageInfo", ["file", "format", "width", "height", "size"])
+
+# --------------- INVENTORY ---------------
+
+
+def _jpeg_dimensions(data):
+    i = 2
+    while i + 9 < len(data):
+        if data[i] != 0xFF:
+            return None
+        marker = data[i + 1]
+        if marker == 0xFF:
+            i += 1
+            continue
+        length = struct.unpack(">H", data[i + 2:i + 4])[0]
+        # SOF0..SOF15, except DHT (C4), JPG (C8) and DAC (CC)
+        if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            height, width = struct.unpack(">HH", data[i + 5:i + 9])
+            return width, height
+        i += 2 + length
+    return None
+
+
+def image_dimensions(data):
+    """(format, width, height) from the start of an image file; width/height are None if unknown."""
+    if data.startswith(PNG_SIGNATURE) and len(data) >= 24:
+        return ("png",) + struct.unpack(">II", data[16:24])
+    if data[:6] in (b"GIF87a", b"GIF89a") and len(data) >= 10:
+        return ("gif",) + struct.unpack("<HH", data[6:10])
+    if data.startswith(b"\xff\xd8"):
+        return ("jpeg",) + (_jpeg_dimensions(data) or (None, None))
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP" and len(data) >= 30:
+        kind = data[12:16]
+        if kind == b"VP8 ":
+            width, height = struct.unpack("<HH", data[26:30])
+            return "webp", width & 0x3FFF, height & 0x3FFF
+        if kind == b"VP8L":
+            bits = int.from_bytes(data[21:25], "little")
+            return "webp", (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+        if kind == b"VP8X":
+            return "webp", int.from_bytes(data[24:27], "little") + 1, int.from_bytes(data[27:30], "little") + 1
+        return "webp", None, None
+    if b"<svg" in data[:1024]:
+        return "svg", None, None
+    return "unknown", None, None
+
+
+def image_info(path, rel_path, size):
+    try:
+        with open(path, "rb") as f:
+            head = f.read(HEAD_BYTES)
+            fmt, width, height = image_dimensions(head)
+            if fmt == "jpeg" and width is None and size > HEAD_BYTES:
+                fmt, width, height = image_dimensions(head + f.read())
+    except OSError:
+        fmt, width, height = "unreadable", None, None
+    return ImageInfo(rel_path, fmt, width, height, size)
+
+
+def is_image(name):
+    return name.lower().endswith(IMAGE_SUFFIXES)
+
+
+def inventory(repo_path, manifest=None, backend="auto"):
+    """ImageInfo for every image in a repo, largest first."""
+    if manifest is None:
+        manifest = build_manifest(repo_path, backend=backend)
+    images = [image_info(e.path, e.rel_path, e.size) for e in manifest if is_image(e.name)]
+    return sorted(images, key=lambda i: (-i.size, i.file))
+
+
+# --------------- RECOMPRESSION ---------------
+
+
+def _png_chunks(data):
+    """[(type, body)] of a PNG, or None if it is truncated or a CRC does not match."""
+    chunks, i = [], len(PNG_SIGNATURE)
+    while i + 12 <= len(data):
+        length, ctype = struct.unpack(">I4s", data[i:i + 8])
+        body = data[i + 8:i + 8 + length]
+        if len(body) != length or struct.unpack(">I", data[i + 8 + length:i + 12 + length])[0] != \
+                zlib.crc32(ctype + body) & 0xFFFFFFFF:
+            return None
+        chunks.append((ctype, body))
+        i += 12 + length
+        if ctype == b"IEND":
+            return chunks
+    return None
+
+
+def _png_chunk(ctype, body):
+    return struct.pack(">I", len(body)) + ctype + body + struct.pack(">I", zlib.crc32(ctype + body) & 0xFFFFFFFF)
+
+
+def optimize_png(data, strip_metadata=False):
+    """Smaller lossless PNG, or None if it cannot be improved (or is not a valid PNG)."""
+    chunks = _png_chunks(data) if data.startswith(PNG_SIGNATURE) else None
+    if not chunks:
+        return None
+    idat = b"".join(body for ctype, body in chunks if ctype == b"IDAT")
+    try:
+        raw = zlib.decompress(idat)
+    except zlib.error:
+        return None
+    best = idat
+    for strategy in ZLIB_STRATEGIES:
+        compressor = zlib.compressobj(9, zlib.DEFLATED, 15, 9, strategy)
+        stream = compressor.compress(raw) + compressor.flush()
+        if len(stream) < len(best):
+            best = stream
+
+    drop_chunks = PNG_DROP_CHUNKS | (PNG_METADATA_CHUNKS if strip_metadata else set())
+    out, wrote_idat = [PNG_SIGNATURE], False
+    for ctype, body in chunks:
+        if ctype in drop_chunks:
+            continue
+        if ctype == b"IDAT":
+            if not wrote_idat:
+                out.append(_png_chunk(b"IDAT", best))
+                wrote_idat = True
+            continue
+        out.append(_png_chunk(ctype, body))
+    result = b"".join(out)
+    return result if len(result) < len(data) else None
+
+
+def _exif_rotates(body):
+    """Whether an APP1 EXIF segment sets an Orientation other than 1 (so dropping it would turn the image)."""
+    tiff = body[6:]
+    if len(tiff) < 8 or tiff[:2] not in (b"II", b"MM"):
+        return False
+    order = "<" if tiff[:2] == b"II" else ">"
+    ifd = struct.unpack(order + "I", tiff[4:8])[0]
+    if ifd + 2 > len(tiff):
+        return False
+    count = struct.unpack(order + "H", tiff[ifd:ifd + 2])[0]
+    for n in range(count):
+        entry = tiff[ifd + 2 + 12 * n:ifd + 14 + 12 * n]
+        if len(entry) < 12:
+            break
+        if struct.unpack(order + "H", entry[:2])[0] == 0x0112:
+            return struct.unpack(order + "H", entry[8:10])[0] != 1
+    return False
+
+
+def optimize_jpeg(data, strip_metadata=False):
+    """
+    JPEG without comment/IPTC segments (and, with strip_metadata, XMP and
+    non-rotating EXIF), or None if there is nothing to drop.
+    """
+    if not data.startswith(b"\xff\xd8"):
+        return None
+    out, i, dropped = [data[:2]], 2, False
+    while i + 4 <= len(data):
+        if data[i] != 0xFF:
+            return None
+        marker = data[i + 1]
+        if marker == 0xDA:   # start of scan: the rest is image data
+            out.append(data[i:])
+            break
+        length = struct.unpack(">H", data[i + 2:i + 4])[0]
+        segment = data[i:i + 2 + length]
+        body = segment[4:]
+        drop = marker in JPEG_DROP_SEGMENTS
+        if marker == 0xE1 and strip_metadata:  # APP1: EXIF or XMP
+            drop = not (body.startswith(b"Exif\0\0") and _exif_rotates(body))
+        if drop:
+            dropped = True
+        else:
+            out.append(segment)
+        i += 2 + length
+    else:
+        return None
+    result = b"".join(out)
+    return result if dropped and len(result) < len(data) else None
+
+
+def optimize_bytes(data, strip_metadata=False):
+    if data.startswith(PNG_SIGNATURE):
+        return optimize_png(data, strip_metadata)
+    if data.startswith(b"\xff\xd8"):
+        return optimize_jpeg(data, strip_metadata)
+    return None
+
+
+def optimize_file(path, strip_metadata=False):
+    """(path, original size, smaller bytes or None); runs in a worker process with --jobs."""
+    with open(path, "rb") as f:
+        data = f.read()
+    return path, len(data), optimize_bytes(data, strip_metadata)
+
+
+def optimize(repos, jobs=1, dry_run=False, state_dir=DEFAULT_STATE_DIR, backend="auto", strip_metadata=False):
+    """
+    Recompress the PNGs and JPEGs of repos. Returns (rewritten [(path, old, new)],
+    number of files skipped because their hash is known to be optimal).
+    """
+    state_key = "assets.strip" if strip_metadata else "assets"
+    state = ScanCache(state_dir, pipeline_key(strip_metadata)) if state_dir else None
+    entry = state.load(state_key) if state else {"files": {}}
+    optimal = entry.get("files", {})   # sha256 -> size of images nothing more can be gained from
+
+    todo, skipped = [], 0
+    for repo in repos:
+        for e in build_manifest(repo, backend=backend):
+            if not e.name.lower().endswith((".png", ".jpg", ".jpeg")):
+                continue
+            try:
+                with open(e.path, "rb") as f:
+                    digest = hashlib.sha256(f.read()).hexdigest()
+            except OSError:
+                continue
+            if digest in optimal:
+                skipped += 1
+            else:
+                todo.append((e.path, digest))
+
+    work = functools.partial(optimize_file, strip_metadata=strip_metadata)
+    if jobs > 1 and len(todo) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            outcomes = list(pool.map(work, [path for path, _ in todo], chunksize=4))
+    else:
+        outcomes = [work(path) for path, _ in todo]
+
+    rewritten = []
+    for (path, digest), (_, size, smaller) in zip(todo, outcomes):
+        if smaller is None:
+            optimal[digest] = size
+            continue
+        rewritten.append((path, size, len(smaller)))
+        if not dry_run:
+            atomic_write_bytes(path, smaller)
+            optimal[hashlib.sha256(smaller).hexdigest()] = len(smaller)
+    if state:
+        state.save(state_key, {"config": state.config_key, "files": optimal})
+    return rewritten, skipped
+
+
+# --------------- MAIN ---------------
+
+
+def _mb(n):
+    return f"{n / 1024 / 1024:.2f} MB"
+
+
+def main(argv=None):
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("repos", nargs="*", default=["."], help="Repos to process (default: current directory).")
+    common.add_argument("--enumerate", choices=BACKENDS, default="auto",
+                        help="File listing: 'git' index (tracked files only), filesystem 'walk', "
+                             "or 'auto' (git where available; default).")
+
+    parser = argparse.ArgumentParser(description="Inventory and losslessly recompress image assets.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    inv = sub.add_parser("inventory", parents=[common], help="List images with dimensions and bytes.")
+    inv.add_argument("--budget-mb", type=float, default=DEFAULT_BUDGET_MB,
+                     help=f"Per-repo image budget (default: {DEFAULT_BUDGET_MB} MB).")
+    inv.add_argument("--top", type=int, default=20, help="Images listed per repo, largest first (0 = all).")
+    inv.add_argument("--json", action="store_true", help="Print the inventory as JSON.")
+    opt = sub.add_parser("optimize", parents=[common],
+                         help="Recompress PNGs and drop comments and timestamps, without changing any pixel.")
+    opt.add_argument("--jobs", type=int, default=1, help="Process N images concurrently (default: 1).")
+    opt.add_argument("--dry-run", action="store_true", help="Report the savings without rewriting files.")
+    opt.add_argument("--strip-metadata", action="store_true",
+                     help="Also drop PNG text/EXIF chunks and JPEG XMP and EXIF (EXIF that rotates the image "
+                          "is kept). These can hold authorship and licence information.")
+    opt.add_argument("--state-dir", default=DEFAULT_STATE_DIR,
+                     help="Where hashes of already-optimal images are kept (default: .scan_cache).")
+    args = parser.parse_args(argv)
+
+    if args.command == "optimize":
+        rewritten, skipped = optimize(args.repos, args.jobs, args.dry_run, args.state_dir, args.enumerate,
+                                      args.strip_metadata)
+        for path, old, new in rewritten:
+            print(f"{path}: {old:,} -> {new:,} bytes (-{(old - new) / old:.1%})")
+        saved = sum(old - new for _, old, new in rewritten)
+        verb = "would save" if args.dry_run else "saved"
+        print(f"\n{len(rewritten)} image(s) {'to rewrite' if args.dry_run else 'rewritten'}, {verb} {_mb(saved)}; "
+              f"{skipped} unchanged image(s) skipped from the cache.")
+        return 0
+
+    budget = int(args.budget_mb * 1024 * 1024)
+    report, over = {}, False
+    for repo in args.repos:
+        images = inventory(repo, backend=args.enumerate)
+        total = sum(i.size for i in images)
+        over |= total > budget
+        report[repo] = {"total_bytes": total, "budget_bytes": budget, "images": [i._asdict() for i in images]}
+        if args.json:
+            continue
+        status = "OVER BUDGET" if total > budget else "within budget"
+        print(f"\n{repo}: {len(images)} image(s), {_mb(total)} of {_mb(budget)} ({status})")
+        for i in images[:args.top or None]:
+            dims = f"{i.width}x{i.height}" if i.width else "?"
+            print(f"  {i.size:>12,}  {dims:>11}  {i.format:<5} {i.file}")
+        if args.top and len(images) > args.top:
+            print(f"  ... and {len(images) - args.top} more")
+    if args.json:
+        print(json.dumps(report, indent=2))
+    return 1 if over else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Buffered auto-fix pipeline.
+
+README scanners record their fixes on a FixSet instead of writing files
+directly. Every fix on a file is applied in memory on top of the previous
+ones, so fixes compose instead of overwriting each other, and commit()
+writes each changed file exactly once: temp file in the same directory,
+fsync, then os.replace(), so a crash never leaves a half-written README.
+In dry-run mode nothing is written and commit() returns unified diffs.
+"""
+
+import difflib
+import os
+from pathlib import Path
+
+
+def _open_temp(directory, mode):
+    """
+    (fd, path) of a new, exclusively created file in directory. The kernel
+    applies the umask to mode, as open() does, so nothing has to change the
+    process-wide umask (other threads may be creating files meanwhile).
+    """
+    flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0)
+    while True:
+        tmp = os.path.join(directory, f".tmp-{os.urandom(6).hex()}")
+        try:
+            return os.open(tmp, flags, mode), tmp
+        except FileExistsError:
+            continue
+
+
+def atomic_write_text(path, text, encoding="utf-8"):
+    """Replace path with text in one atomic rename, keeping the old file mode."""
+    atomic_write_bytes(path, text.encode(encoding))
+
+
+def atomic_write_bytes(path, data):
+    """
+    Replace path with data in one atomic rename, keeping the old file mode.
+    New files get the mode open() would give them (0o666 minus the umask).
+    """
+    path = Path(path)
+    try:
+        mode = path.stat().st_mode & 0o7777
+    except OSError:
+        mode = None
+    fd, tmp = _open_temp(path.parent, 0o666 if mode is None else 0o600)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        if mode is not None:
+            os.chmod(tmp, mode)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def unified_diff(label, old, new):
+    """git-style unified diff of old -> new for the file shown as label."""
+    lines = difflib.unified_diff(
+        old.splitlines(keepends=True), new.splitlines(keepends=True),
+        fromfile=f"a/{label}" if old else "/dev/null", tofile=f"b/{label}",
+    )
+    return "".join(line if line.endswith("\n") else line + "\n\\ No newline at end of file\n" for line in lines)
+
+
+class FileFix:
+    """Pending edits for one file, applied in order on the in-memory text."""
+
+    def __init__(self, path, original):
+        self.path = Path(path)
+        self.original = original
+        self.text = original
+
+    def apply(self, fn):
+        self.text = fn(self.text)
+
+    def prepend(self, snippet):
+        self.text = snippet + self.text
+
+    def append(self, snippet):
+        self.text = self.text + snippet
+
+    def replace(self, text):
+        self.text = text
+
+    @property
+    def changed(self):
+        return self.text != self.original
+
+
+class FixSet:
+    """All pending fixes for one repo; commit() writes each file once."""
+
+    def __init__(self, dry_run=False, root=None):
+        self.dry_run = dry_run
+        self.root = root  # diffs show paths relative to this directory
+        self._files = {}
+        self.stats = {"files_written": 0, "bytes_written": 0}
+
+    def file(self, path, original=""):
+        """FileFix for path; original is the current text ("" for a new file)."""
+        key = str(path)
+        if key not in self._files:
+            self._files[key] = FileFix(path, original)
+        return self._files[key]
+
+    def commit(self, cache=None):
+        """
+        Write every changed file (or, in dry-run mode, diff it).
+        Returns a list of unified diffs, empty unless dry_run.
+        """
+        diffs = []
+        for fix in self._files.values():
+            if not fix.changed:
+                continue
+            if self.dry_run:
+                label = os.path.relpath(fix.path, self.root) if self.root is not None else fix.path
+                diffs.append(unified_diff(label, fix.original, fix.text))
+                continue
+            atomic_write_text(fix.path, fix.text)
+            self.stats["files_written"] += 1
+            self.stats["bytes_written"] += len(fix.text.encode("utf-8"))
+            if cache is not None:
+                cache.invalidate(fix.path)
+        self._files.clear()
+        return diffs
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the portfolio scanners.
+
+Generates a deterministic synthetic workspace (a "forest" of repos with
+markdown, Python, Terraform and PNG files, READMEs of a chosen size and a
+chosen density of TODO markers and fake secrets), then times each scanner
+over it in a fresh child process so peak RSS is measured per target:
+
+- scanner:    lab_cloud_portfolio_scanner_v3.scan_repository (cache off)
+- validator:  scan_readme / scan_code / scan_iac / scan_security (AUTO_FIX off)
+- entrycheck: lab_cloudentrycheck.scan_repo
+
+Results (wall time, CPU time, peak RSS, files/sec per target and scale) are
+written as JSON. --compare flags targets that got slower or bigger than a
+stored baseline and exits non-zero.
+
+Usage:
+    python lab_benchmark.py --scales small medium --out bench.json
+    python lab_benchmark.py --compare bench_baseline.json
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import resource
+import shutil
+import string
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# --------------- CONFIGURATION ---------------
+
+SCALES = {
+    #         repos  depth  files/repo  README KB
+    "small":  dict(repos=5, depth=2, files=40, readme_kb=4),
+    "medium": dict(repos=20, depth=3, files=150, readme_kb=16),
+    "large":  dict(repos=60, depth=4, files=400, readme_kb=64),
+}
+TARGETS = ("scanner", "validator", "entrycheck")
+
+FILE_MIX = {".md": 0.3, ".py": 0.45, ".tf": 0.1, ".png": 0.15}
+TODO_DENSITY = 0.02     # chance that a markdown line carries a TODO-style marker
+SECRET_DENSITY = 0.05   # chance that a Python file carries a fake credential
+SEED = 1234
+
+THRESHOLD = 0.20        # relative slowdown / growth that counts as a regression
+
+PNG_HEADER = b"\x89PNG\r\n\x1a\n"
+WORDS = ("aws lambda s3 ec2 iam cloudwatch terraform deploy incident runbook monitoring "
+         "pipeline bucket instance troubleshoot automation the a of and to in").split()
+TODO_MARKERS = ("TODO", "TBD", "content to be added", "fill this in later")
+
+# --------------- GENERATOR ---------------
+
+
+def _sentence(rng, n=12):
+    return " ".join(rng.choice(WORDS) for _ in range(n)).capitalize() + "."
+
+
+def _markdown(rng, kb, todo_density):
+    lines = ["# " + _sentence(rng, 4), "", "## Overview", "",
+             "**Last Updated:** 2024-10-15", ""]
+    size = sum(len(line) + 1 for line in lines)
+    while size < kb * 1024:
+        if rng.random() < 0.08:
+            line = "## " + _sentence(rng, 3)
+        elif rng.random() < 0.05:
+            line = f"[link](https://example.com/{rng.randrange(1000)})"
+        else:
+            line = _sentence(rng)
+        if rng.random() < todo_density:
+            line += " " + rng.choice(TODO_MARKERS)
+        lines.append(line)
+        size += len(line) + 1
+    return "\n".join(lines) + "\n"
+
+
+def _python(rng, secret_density):
+    body = [f'"""{_sentence(rng, 6)}"""', "", "import os", "", "",
+            "def handler(event, context):"]
+    for _ in range(rng.randint(5, 60)):
+        body.append(f"    # {_sentence(rng, 8)}")
+        body.append(f"    value_{rng.randrange(1000)} = {rng.randrange(10 ** 6)}")
+    if rng.random() < secret_density:
+        # Built at runtime so this file does not trip the secret scanners itself
+        fake = "AK" + "IA" + "".join(rng.choice(string.ascii_uppercase + string.digits) for _ in range(16))
+        body.append(f'    aws_key = "{fake}"')
+    body += ["    try:", "        return value", "    except NameError:", "        return None", "",
+             "", "if __name__ == '__main__':", "    handler({}, None)"]
+    return "\n".join(body) + "\n"
+
+
+def _terraform(rng):
+    name = rng.choice(WORDS)
+    return f'resource "aws_s3_bucket" "{name}" {{\n  bucket = "{name}-{rng.randrange(10 ** 6)}"\n}}\n'
+
+
+def _png(rng):
+    return PNG_HEADER + bytes(rng.getrandbits(8) for _ in range(rng.randint(256, 4096)))
+
+
+def generate_forest(root, repos=5, depth=2, files=40, readme_kb=4,
+                    todo_density=TODO_DENSITY, secret_density=SECRET_DENSITY, seed=SEED):
+    """
+    Write a synthetic workspace under root; identical arguments give identical
+    trees. Returns the number of files written.
+    """
+    rng = random.Random(seed)
+    root = Path(root)
+    suffixes, weights = zip(*FILE_MIX.items())
+    written = 0
+    for r in range(repos):
+        repo = root / f"repo-{r:03d}"
+        dirs = [repo]
+        for d in range(1, depth + 1):
+            dirs += [repo.joinpath(*[f"d{d}-{i}" for i in range(d)]), repo / f"src{d}"]
+        for d in dirs:
+            d.mkdir(parents=True, exist_ok=True)
+        (repo / "README.md").write_text(_markdown(rng, readme_kb, todo_density), encoding="utf-8")
+        written += 1
+        for i in range(files - 1):
+            suffix = rng.choices(suffixes, weights)[0]
+            path = rng.choice(dirs) / f"f{i:04d}{suffix}"
+            if suffix == ".md":
+                path.write_text(_markdown(rng, rng.choice((1, 2, 4)), todo_density), encoding="utf-8")
+            elif suffix == ".py":
+                path.write_text(_python(rng, secret_density), encoding="utf-8")
+            elif suffix == ".tf":
+                path.write_text(_terraform(rng), encoding="utf-8")
+            else:
+                path.write_bytes(_png(rng))
+            written += 1
+    return written
+
+
+# --------------- CHILD (one target, one forest) ---------------
+
+
+def _peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _run_scanner(repos):
+    import lab_cloud_portfolio_scanner_v3 as scanner
+    for repo in repos:
+        scanner.scan_repository(str(repo), repo.name, cache=None)
+
+
+def _run_validator(repos):
+    import lab_cloud_portfolio_validator as validator
+    from lab_content_cache import ContentCache
+    validator.AUTO_FIX = False
+    for repo in repos:
+        cache = ContentCache()
+        validator.scan_readme(repo, repo.name, cache)
+        validator.scan_code(repo, cache=cache)
+        validator.scan_iac(repo)
+        validator.scan_security(repo, cache=cache)
+
+
+def _run_entrycheck(repos):
+    import lab_cloudentrycheck as entrycheck
+    for repo in repos:
+        entrycheck.scan_repo(repo.name, {"name": repo.name, "path": repo})
+
+
+RUNNERS = {"scanner": _run_scanner, "validator": _run_validator, "entrycheck": _run_entrycheck}
+
+
+def run_child(target, forest):
+    repos = sorted(p for p in Path(forest).iterdir() if p.is_dir())
+    cpu0, wall0 = time.process_time(), time.perf_counter()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        RUNNERS[target](repos)
+    wall, cpu = time.perf_counter() - wall0, time.process_time() - cpu0
+    print(json.dumps({"wall_s": wall, "cpu_s": cpu, "peak_rss_mb": _peak_rss_mb()}))
+
+
+# --------------- DRIVER ---------------
+
+
+def measure(target, forest, files, repeat=3):
+    """Best-of-repeat wall/CPU time and the largest peak RSS over fresh child processes."""
+    runs = []
+    for _ in range(repeat):
+        proc = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", target, str(forest)],
+                              capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+        if proc.returncode != 0:
+            raise RuntimeError(f"{target} benchmark failed:\n{proc.stderr}")
+        runs.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+    wall = min(r["wall_s"] for r in runs)
+    return {
+        "wall_s": round(wall, 4),
+        "cpu_s": round(min(r["cpu_s"] for r in runs), 4),
+        "peak_rss_mb": round(max(r["peak_rss_mb"] for r in runs), 1),
+        "files": files,
+        "files_per_s": round(files / wall, 1) if wall else None,
+    }
+
+
+def compare(results, baseline, threshold=THRESHOLD):
+    """List of regression messages for results slower or bigger than baseline."""
+    regressions = []
+    for scale, targets in results["scales"].items():
+        for target, now in targets.items():
+            before = baseline.get("scales", {}).get(scale, {}).get(target)
+            if not before:
+                continue
+            for metric in ("wall_s", "peak_rss_mb"):
+                if before[metric] and now[metric] > before[metric] * (1 + threshold):
+                    change = (now[metric] / before[metric] - 1) * 100
+                    regressions.append(f"{scale}/{target} {metric}: {before[metric]} -> {now[metric]} (+{change:.0f}%)")
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the portfolio scanners on synthetic workspaces.")
+    parser.add_argument("--scales", nargs="+", choices=sorted(SCALES), default=["small", "medium"])
+    parser.add_argument("--targets", nargs="+", choices=TARGETS, default=list(TARGETS))
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per target; the best wall time is kept.")
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--todo-density", type=float, default=TODO_DENSITY)
+    parser.add_argument("--secret-density", type=float, default=SECRET_DENSITY)
+    parser.add_argument("--out", default="benchmark_results.json", help="Where to write the results JSON.")
+    parser.add_argument("--compare", metavar="BASELINE", help="Flag regressions against a previous results JSON.")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help="Relative growth that counts as a regression (default: 0.20).")
+    parser.add_argument("--keep", metavar="DIR", help="Generate forests under DIR and keep them.")
+    parser.add_argument("--child", nargs=2, metavar=("TARGET", "FOREST"), help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.child:
+        run_child(*args.child)
+        return 0
+
+    results = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": args.seed,
+        "scales": {},
+    }
+    workdir = args.keep or tempfile.mkdtemp(prefix="lab-bench-")
+    try:
+        for scale in args.scales:
+            forest = Path(workdir) / scale
+            if forest.exists():
+                shutil.rmtree(forest)
+            files = generate_forest(forest, **SCALES[scale], todo_density=args.todo_density,
+                                    secret_density=args.secret_density, seed=args.seed)
+            results["scales"][scale] = {}
+            for target in args.targets:
+                r = measure(target, forest, files, args.repeat)
+                results["scales"][scale][target] = r
+                print(f"{scale:>7} {target:<11} {r['wall_s']:>8.3f}s  {r['peak_rss_mb']:>7.1f} MB  "
+                      f"{r['files_per_s']:>9} files/s")
+    finally:
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults saved to {args.out}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against {args.compare}:")
+            for line in regressions:
+                print(f"  [REGRESSION] {line}")
+            return 1
+        print(f"\nNo regressions against {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
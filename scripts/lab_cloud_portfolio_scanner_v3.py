@@ -3,13 +3,25 @@
 Cloud Portfolio Scanner - Profile & Portfolio Aware Version
 Scans GitHub repos for cloud content, documentation quality, README completeness,
 and provides Job & Certification alignment scores, treating profile and portfolio separately.
+With --watch it keeps running and re-scores only the repos whose files change.
 """
 
 import os
 import json
-import re
+import time
+import argparse
 from datetime import datetime
 
+from lab_autofix import atomic_write_text
+from lab_keywords import KeywordMatcher
+from lab_git_index import resolve_git_dir
+from lab_git_objects import GitError, GitTree, is_bare_repo
+from lab_manifest import BACKENDS, build_manifest
+from lab_markdown_index import index_markdown
+from lab_profiling import NULL_PROFILER, Profiler, format_profile, make_profiler, write_prometheus
+from lab_report_stream import ReportStream, read_records, summarize, write_summary
+from lab_scan_cache import MemoryScanCache, ScanCache, config_fingerprint, file_fingerprint, manifest_fingerprint, read_git_head
+
 # =============================
 # CONFIG
 # =============================
@@ -40,6 +52,12 @@ JOB_KEYWORDS = {
     "pipeline", "lambda", "cloudwatch", "s3", "ec2", "vpc", "rds", "sns", "sqs"
 }
 
+# True = "s3" only counts as a whole word, not inside "as3x"
+KEYWORD_WORD_BOUNDARY = False
+
+# "auto" = list tracked files from the git index in git repos (skips untracked/.gitignored), walk the rest
+MANIFEST_BACKEND = "auto"
+
 REQUIRED_README_SECTIONS = [
     "Overview",
     "Architecture",
@@ -51,6 +69,14 @@ REQUIRED_README_SECTIONS = [
 ]
 
 REPORT_PATH = os.path.join(REPOS_ROOT, "cloud_portfolio_report.json")
+CACHE_DIR = os.path.join(REPOS_ROOT, ".scan_cache")
+HISTORY_PATH = os.path.join(REPOS_ROOT, "cloud_portfolio_history.db")
+
+# Cached scores are discarded whenever any of the scoring inputs change
+CACHE_KEY = config_fingerprint(sorted(AWS_KEYWORDS), sorted(JOB_KEYWORDS), REQUIRED_README_SECTIONS,
+                               [KEYWORD_WORD_BOUNDARY])
+
+KEYWORD_MATCHER = KeywordMatcher({"cloud": AWS_KEYWORDS, "job": JOB_KEYWORDS}, word_boundary=KEYWORD_WORD_BOUNDARY)
 
 # =============================
 # ANSI COLORS
@@ -92,106 +118,208 @@ def detect_repo_type(repo_name):
 def score_readme(readme_text):
     if not readme_text:
         return 0.0, REQUIRED_README_SECTIONS.copy()
-    found = []
-    for section in REQUIRED_README_SECTIONS:
-        patterns = [rf"#+\s*{re.escape(section)}", rf"\b{re.escape(section)}\b"]
-        if any(re.search(p, readme_text, re.I) for p in patterns):
-            found.append(section)
+    # A section counts if a heading starts with it or it appears as a whole word
+    index = index_markdown(readme_text)
+    found = [section for section in REQUIRED_README_SECTIONS if index.has_section(section)]
     score = round((len(found)/len(REQUIRED_README_SECTIONS))*100, 1)
     missing = [s for s in REQUIRED_README_SECTIONS if s not in found]
     return score, missing
 
-def score_cloud_relevance(text):
-    if not text:
-        return 0.0
-    text_lower = text.lower()
-    hits = sum(1 for kw in AWS_KEYWORDS if kw in text_lower)
-    total_mentions = sum(text_lower.count(kw) for kw in AWS_KEYWORDS)
-    unique_score = (hits / len(AWS_KEYWORDS)) * 70
+def keyword_score(hits, total_mentions, keyword_count):
+    unique_score = (hits / keyword_count) * 70
     frequency_bonus = min((total_mentions / 50) * 30, 30)
     return round(unique_score + frequency_bonus, 1)
 
-def score_job_alignment(text):
+def score_keywords(text):
+    # Cloud and job scores share one keyword scan of the text
     if not text:
-        return 0.0
-    text_lower = text.lower()
-    hits = sum(1 for kw in JOB_KEYWORDS if kw in text_lower)
-    total_mentions = sum(text_lower.count(kw) for kw in JOB_KEYWORDS)
-    unique_score = (hits / len(JOB_KEYWORDS)) * 70
-    frequency_bonus = min((total_mentions / 50) * 30, 30)
-    return round(unique_score + frequency_bonus, 1)
+        return 0.0, 0.0
+    found = KEYWORD_MATCHER.scan(text)
+    return (keyword_score(*found["cloud"], len(AWS_KEYWORDS)),
+            keyword_score(*found["job"], len(JOB_KEYWORDS)))
+
+def score_cloud_relevance(text):
+    return score_keywords(text)[0]
 
-def score_documentation(repo_path):
+def score_job_alignment(text):
+    return score_keywords(text)[1]
+
+DOC_SUFFIXES = (".py", ".sh", ".ps1", ".js", ".ts")
+READ_CHUNK = 64 * 1024
+
+def chunks_are_documented(chunks, profiler=NULL_PROFILER):
+    # Stop as soon as the text qualifies instead of reading it whole
+    hashes, slashes, tail = 0, 0, ""
+    for chunk in chunks:
+        profiler.count("bytes_read", len(chunk))
+        window = tail + chunk
+        hashes += chunk.count("#")
+        slashes += (tail[-1:] + chunk).count("//")
+        if '"""' in window or "'''" in window or "/**" in window or hashes > 2 or slashes > 2:
+            return True
+        tail = window[-2:]
+    return False
+
+def _file_chunks(path):
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        while True:
+            chunk = f.read(READ_CHUNK)
+            if not chunk:
+                return
+            yield chunk
+
+def file_is_documented(path, profiler=NULL_PROFILER):
+    try:
+        return chunks_are_documented(_file_chunks(path), profiler)
+    except Exception:
+        return False
+
+def entry_is_documented(entry, cache=None, known=None, seen=None, profiler=NULL_PROFILER, source=None):
+    # known/seen are the previous and current per-file cache maps (rel_path -> [mtime_ns, size, documented])
+    # source is a GitTree to read blobs from instead of the working tree
+    if not entry.size:
+        return False
+    if source is not None:
+        return chunks_are_documented([source.get(entry.path).text], profiler)
+    if cache is None:
+        return file_is_documented(entry.path, profiler)
+    fingerprint = file_fingerprint(entry)
+    cached = known.get(entry.rel_path)
+    if cached and cached[:2] == fingerprint:
+        cache.count("file_hits")
+        documented = cached[2]
+    else:
+        cache.count("file_misses")
+        documented = file_is_documented(entry.path, profiler)
+    seen[entry.rel_path] = fingerprint + [documented]
+    return documented
+
+def score_documentation(manifest, cache=None, known=None, seen=None, profiler=NULL_PROFILER, source=None):
     total_files, documented = 0, 0
-    for root, dirs, files in os.walk(repo_path):
-        dirs[:] = [d for d in dirs if d not in IGNORE_NAMES]
-        for f in files:
-            if f.endswith((".py", ".sh", ".ps1", ".js", ".ts")):
-                total_files += 1
-                content = safe_read(os.path.join(root, f))
-                has_docstring = '"""' in content or "'''" in content
-                has_comments = content.count("#") > 2 or content.count("//") > 2
-                has_jsdoc = "/**" in content
-                if has_docstring or has_comments or has_jsdoc:
-                    documented += 1
+    for entry in manifest:
+        if entry.name.endswith(DOC_SUFFIXES):
+            total_files += 1
+            if entry_is_documented(entry, cache, known, seen, profiler, source):
+                documented += 1
     if total_files == 0:
         return 100.0
     return round((documented / total_files) * 100, 1)
 
-def count_files_by_type(repo_path):
+def count_files_by_type(manifest):
     counts = {"Python":0,"Shell":0,"Terraform":0,"YAML":0,"Markdown":0,"JavaScript":0,"Other":0}
-    for root, dirs, files in os.walk(repo_path):
-        dirs[:] = [d for d in dirs if d not in IGNORE_NAMES]
-        for f in files:
-            if f.endswith(".py"): counts["Python"] += 1
-            elif f.endswith((".sh",".bash")): counts["Shell"] += 1
-            elif f.endswith((".tf",".tfvars")): counts["Terraform"] += 1
-            elif f.endswith((".yml",".yaml")): counts["YAML"] += 1
-            elif f.endswith(".md"): counts["Markdown"] += 1
-            elif f.endswith((".js",".jsx",".ts",".tsx")): counts["JavaScript"] += 1
-            else: counts["Other"] += 1
+    for entry in manifest:
+        f = entry.name
+        if f.endswith(".py"):
+            counts["Python"] += 1
+        elif f.endswith((".sh",".bash")):
+            counts["Shell"] += 1
+        elif f.endswith((".tf",".tfvars")):
+            counts["Terraform"] += 1
+        elif f.endswith((".yml",".yaml")):
+            counts["YAML"] += 1
+        elif f.endswith(".md"):
+            counts["Markdown"] += 1
+        elif f.endswith((".js",".jsx",".ts",".tsx")):
+            counts["JavaScript"] += 1
+        else:
+            counts["Other"] += 1
     return {k:v for k,v in counts.items() if v>0}
 
-def auto_fix_empty_files(repo_path):
+def auto_fix_empty_files(manifest):
     fixes = []
-    for root, dirs, files in os.walk(repo_path):
-        dirs[:] = [d for d in dirs if d not in IGNORE_NAMES]
-        for f in files:
-            full = os.path.join(root, f)
-            if f.endswith((".py", ".sh", ".ps1")) and os.path.getsize(full) == 0:
-                try:
-                    with open(full, "w") as w:
-                        w.write('"""\nPlaceholder file\n"""\n' if f.endswith(".py") else "# Placeholder file\n")
-                    fixes.append(f)
-                except: pass
+    for entry in manifest:
+        f = entry.name
+        if f.endswith((".py", ".sh", ".ps1")) and entry.size == 0:
+            try:
+                with open(entry.path, "w") as w:
+                    w.write('"""\nPlaceholder file\n"""\n' if f.endswith(".py") else "# Placeholder file\n")
+                fixes.append(f)
+            except: pass
     return fixes
 
 def get_readme_stats(readme_text):
     if not readme_text: return {"lines":0,"words":0,"chars":0,"has_badges":False,"has_toc":False}
+    index = index_markdown(readme_text)
     return {
-        "lines": readme_text.count('\n'),
-        "words": len(readme_text.split()),
+        "lines": index.line_count,
+        "words": index.word_count,
         "chars": len(readme_text),
-        "has_badges": bool(re.search(r'!\[.*?\]\(.*?badge.*?\)', readme_text,re.I)),
-        "has_toc": bool(re.search(r'table of contents|toc', readme_text,re.I))
+        "has_badges": bool(index.badges),
+        "has_toc": index.contains_any(("table of contents", "toc"))
     }
 
 # =============================
 # SCAN REPO
 # =============================
-def scan_repository(repo_path, repo_name):
-    readme_path = os.path.join(repo_path, "README.md")
-    readme_text = safe_read(readme_path)
+def score_readme_file(repo_path, profiler=NULL_PROFILER):
+    return score_readme_text(safe_read(os.path.join(repo_path, "README.md")), profiler)
+
+def score_readme_text(readme_text, profiler=NULL_PROFILER):
+    profiler.count("bytes_read", len(readme_text))
+    profiler.count("files_regex_scanned", 1 if readme_text else 0)
+    readme_score, missing_sections = score_readme(readme_text)
+    cloud_score, job_score = score_keywords(readme_text)
+    return {
+        "readme_score": readme_score,
+        "missing_sections": missing_sections,
+        "cloud_score": cloud_score,
+        "job_score": job_score,
+        "readme_stats": get_readme_stats(readme_text),
+    }
+
+def scan_repository(repo_path, repo_name, cache=None, profiler=NULL_PROFILER, backend=MANIFEST_BACKEND):
     repo_type = detect_repo_type(repo_name)
+    with profiler.phase("traversal"):
+        manifest = build_manifest(repo_path, IGNORE_NAMES, backend=backend)
+    profiler.count("files_visited", len(manifest))
     
-    readme_score, missing_sections = score_readme(readme_text)
-    cloud_score = score_cloud_relevance(readme_text)
-    job_score = score_job_alignment(readme_text)
-    doc_score = score_documentation(repo_path)
-    fixes = auto_fix_empty_files(repo_path)
-    file_counts = count_files_by_type(repo_path)
-    readme_stats = get_readme_stats(readme_text)
+    entry = known = seen = None
+    if cache is not None:
+        with profiler.phase("cache_lookup"):
+            entry = cache.load(repo_name)
+            head = read_git_head(repo_path)
+            fingerprint = manifest_fingerprint(manifest)
+        if "result" in entry and entry.get("head") == head and entry.get("fingerprint") == fingerprint:
+            cache.count("repo_hits")
+            return entry["result"]
+        cache.count("repo_misses")
+        known, seen = entry.get("files", {}), {}
     
+    readme_entry = next((e for e in manifest if e.rel_path == "README.md"), None)
+    readme_fp = file_fingerprint(readme_entry) if readme_entry else None
+    if cache is not None and readme_fp and entry.get("readme", {}).get("fp") == readme_fp:
+        cache.count("file_hits")
+        readme = entry["readme"]["scores"]
+    else:
+        if cache is not None and readme_fp:
+            cache.count("file_misses")
+        with profiler.phase("readme"):
+            readme = score_readme_file(repo_path, profiler)
+
+    with profiler.phase("documentation"):
+        doc_score = score_documentation(manifest, cache, known, seen, profiler)
+    with profiler.phase("autofix"):
+        fixes = auto_fix_empty_files(manifest)
+    result = build_result(repo_type, readme, doc_score, count_files_by_type(manifest), fixes)
+
+    if cache is not None:
+        # Auto-fixes rewrote files, so the manifest fingerprint is stale; re-score next run
+        with profiler.phase("cache_save"):
+            cache.save(repo_name, {
+                "config": cache.config_key,
+                "head": head,
+                "fingerprint": None if fixes else fingerprint,
+                "result": result,
+                "files": seen,
+                "readme": {"fp": readme_fp, "scores": readme} if readme_fp else {},
+            })
+    return result
+
+def build_result(repo_type, readme, doc_score, file_counts, fixes=()):
+    readme_score, missing_sections = readme["readme_score"], readme["missing_sections"]
+    cloud_score, job_score = readme["cloud_score"], readme["job_score"]
+    readme_stats = readme["readme_stats"]
+
     # Adjust scoring weights for profile and portfolio
     if repo_type == "profile-repo":
         total_score = round((job_score*0.35)+(cloud_score*0.35)+(readme_score*0.25)+(doc_score*0.05), 1)
@@ -221,57 +349,346 @@ def scan_repository(repo_path, repo_name):
         "README Stats": readme_stats
     }
 
+def scan_tree(git_dir, repo_name, ref="HEAD", cache=None, profiler=NULL_PROFILER):
+    """Score the tree of ref straight from git objects; nothing is checked out or auto-fixed."""
+    repo_type = detect_repo_type(repo_name)
+    with GitTree(git_dir, ref) as tree:
+        if cache is not None:
+            entry = cache.load(repo_name)
+            # A commit's tree never changes, so the commit id alone keys the result
+            if "result" in entry and entry.get("source") == "tree" and entry.get("head") == tree.commit:
+                cache.count("repo_hits")
+                return entry["result"]
+            cache.count("repo_misses")
+        with profiler.phase("traversal"):
+            manifest = tree.manifest(IGNORE_NAMES)
+        profiler.count("files_visited", len(manifest))
+
+        readme_path = os.path.join(tree.root, "README.md")
+        with profiler.phase("readme"):
+            readme = score_readme_text(tree.get(readme_path).text if tree.exists(readme_path) else "", profiler)
+        with profiler.phase("documentation"):
+            doc_score = score_documentation(manifest, profiler=profiler, source=tree)
+        result = build_result(repo_type, readme, doc_score, count_files_by_type(manifest))
+
+    if cache is not None:
+        with profiler.phase("cache_save"):
+            cache.save(repo_name, {
+                "config": cache.config_key,
+                "source": "tree",
+                "head": tree.commit,
+                "result": result,
+            })
+    return result
+
+def scan_repository_job(repo_path, repo_name, cache_dir=None, profile=False, backend=MANIFEST_BACKEND, ref=None):
+    """
+    Pool-friendly wrapper: returns (result, cache stats, profile dict or None) for one repo.
+    Bare repos, and any git repo when ref is given, are scored from git objects.
+    """
+    cache = ScanCache(cache_dir, CACHE_KEY) if cache_dir else None
+    profiler = make_profiler(profile)
+    result = scan_path(repo_path, repo_name, cache, profiler, backend, ref)
+    return result, (cache.stats if cache else {}), profiler.to_dict()
+
+def scan_path(repo_path, repo_name, cache=None, profiler=NULL_PROFILER, backend=MANIFEST_BACKEND, ref=None):
+    """scan_tree for bare repos (and git repos when ref is given), scan_repository otherwise."""
+    git_dir = repo_path if is_bare_repo(repo_path) else (resolve_git_dir(repo_path) if ref is not None else None)
+    if git_dir is not None:
+        return scan_tree(git_dir, repo_name, ref or "HEAD", cache, profiler)
+    return scan_repository(repo_path, repo_name, cache, profiler, backend)
+
+# =============================
+# REPORT
+# =============================
+def skip_item(item):
+    """True for workspace entries that are never scanned as repos."""
+    return item in IGNORE_NAMES or item.startswith(".")
+
+def report_header(scanned_count, skipped_count, cache_stats):
+    return {
+        "scan_date": datetime.now().isoformat(),
+        "scan_location": REPOS_ROOT,
+        "repos_scanned": scanned_count,
+        "repos_skipped": skipped_count,
+        "cache": cache_stats,
+    }
+
+def save_report(report):
+    # Replaced in one rename, so a dashboard polling the file never reads half a report
+    atomic_write_text(REPORT_PATH, json.dumps(report, indent=2))
+
+def record_history(path, header, results):
+    """Append this scan to the SQLite history (see lab_history.py); returns the run id."""
+    from lab_history import HistoryStore
+
+    with HistoryStore(path) as store:
+        return store.record_run(header, results)
+
+def history_scores(results):
+    """Per-repo score columns as the history stores them, to tell whether a rescan changed anything."""
+    from lab_history import SCORE_COLUMNS
+
+    return {repo: tuple(result.get(key) for key in SCORE_COLUMNS) for repo, result in results.items()}
+
+# =============================
+# WATCH
+# =============================
+def affected_repos(paths):
+    """Top-level repo names under REPOS_ROOT touched by changed paths; None means all of them."""
+    names = set()
+    for path in paths:
+        rel = os.path.relpath(path, REPOS_ROOT)
+        if rel == ".":
+            return None
+        top = rel.split(os.sep, 1)[0]
+        if top == ".." or skip_item(top):
+            continue
+        names.add(top)
+    return names
+
+def watch(args):
+    """
+    Score every repo once, then keep running: each burst of filesystem changes
+    re-scores only the repos it touched and republishes the report. Scan cache
+    entries stay in memory between rescans, so a README edit re-reads that
+    README and nothing else. The cache is flushed to --cache-dir on exit.
+    With --history a run is recorded only when some repo's scores changed
+    since the last recorded run, so saving a file twice adds no rows.
+    """
+    import signal
+
+    from lab_watch import DEBOUNCE_S, POLL_INTERVAL_S, batches, open_watcher
+
+    def stop(signum, frame):
+        raise KeyboardInterrupt
+    # A supervisor stops the watcher with SIGTERM; flush the cache as on Ctrl-C
+    signal.signal(signal.SIGTERM, stop)
+
+    cache = MemoryScanCache(None if args.no_cache else args.cache_dir, CACHE_KEY)
+    results = {}
+    recorded = None   # history_scores() of the last run written to --history
+
+    def rescan(names):
+        nonlocal recorded
+        profiler = make_profiler(args.profile)
+        start = time.perf_counter()
+        for item in sorted(names):
+            repo_path = os.path.join(REPOS_ROOT, item)
+            if os.path.isdir(repo_path):
+                try:
+                    results[item] = scan_path(repo_path, item, cache, profiler, args.enumerate, args.ref)
+                except (OSError, GitError) as e:
+                    # Usually changing under us (a checkout, a delete); the next burst re-scores it
+                    print(f"{Colors.FAIL}[WATCH] {item}: {e}{Colors.ENDC}")
+            elif results.pop(item, None) is not None:
+                cache.forget(item)
+                print(f"{Colors.WARNING}[WATCH] {item} removed{Colors.ENDC}")
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        skipped_count = sum(1 for item in os.listdir(REPOS_ROOT) if skip_item(item))
+        report = report_header(len(results), skipped_count, dict(cache.stats))
+        if args.profile:
+            report["profile"] = profiler.to_dict()
+            if args.prometheus:
+                write_prometheus(args.prometheus, report["profile"], "portfolio_scanner")
+        report["results"] = dict(sorted(results.items()))
+        save_report(report)
+        if args.history:
+            scores = history_scores(report["results"])
+            if scores != recorded:
+                record_history(args.history, report, report["results"].items())
+                recorded = scores
+        for item in sorted(names):
+            if item in results:
+                print(f"{Colors.OKCYAN}[WATCH]{Colors.ENDC} {item}: {results[item]['TOTAL SCORE']}%")
+        print(f"{Colors.OKGREEN}[WATCH] re-scored {len(names)} repo(s) in {elapsed_ms:.1f} ms, "
+              f"report published{Colors.ENDC}")
+
+    def all_repos():
+        return {item for item in os.listdir(REPOS_ROOT)
+                if not skip_item(item) and os.path.isdir(os.path.join(REPOS_ROOT, item))}
+
+    # Subscribe before the first scan so edits made during it are not missed
+    watcher = open_watcher(REPOS_ROOT, IGNORE_NAMES, polling=args.poll is not None,
+                           interval=args.poll or POLL_INTERVAL_S)
+    print(f"Watching {Colors.OKCYAN}{REPOS_ROOT}{Colors.ENDC} with {type(watcher).__name__} (Ctrl-C to stop)\n")
+    try:
+        rescan(all_repos())
+        debounce = DEBOUNCE_S if args.debounce is None else args.debounce
+        for changed in batches(watcher, quiet=debounce):
+            names = affected_repos(changed)
+            # A burst may also remove repos that were scored before
+            names = all_repos() | set(results) if names is None else names
+            # Top-level files (the report, the history db) are not repos
+            names = {n for n in names if n in results or os.path.isdir(os.path.join(REPOS_ROOT, n))}
+            if names:
+                rescan(names)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+        cache.flush()
+    print(f"\n{Colors.OKGREEN}✅ Watch stopped; last report at:{Colors.ENDC} {REPORT_PATH}\n")
+
 # =============================
 # MAIN
 # =============================
-def main():
+def print_repo_header(item):
+    print(f"\n{Colors.OKBLUE}{'='*60}")
+    print(f"📂 Scanning: {Colors.BOLD}{item}{Colors.ENDC}")
+    print(f"{Colors.OKBLUE}{'='*60}{Colors.ENDC}")
+
+def print_repo_result(result):
+    print(f"{Colors.OKCYAN}Type:{Colors.ENDC} {result['Type']}")
+    print(f"{Colors.OKCYAN}README Score:{Colors.ENDC} {result['README Score']}%")
+    print(f"{Colors.OKCYAN}Cloud (Cert) Score:{Colors.ENDC} {result['Cloud (Cert) Score']}%")
+    print(f"{Colors.OKCYAN}Job Alignment Score:{Colors.ENDC} {result['Job Alignment Score']}%")
+    print(f"{Colors.OKCYAN}Documentation Score:{Colors.ENDC} {result['Documentation Score']}%")
+    
+    score = result['TOTAL SCORE']
+    if score >= 90:
+        score_color = Colors.OKGREEN
+    elif score >= 70:
+        score_color = Colors.OKCYAN
+    elif score >= 50:
+        score_color = Colors.WARNING
+    else:
+        score_color = Colors.FAIL
+    print(f"{Colors.BOLD}TOTAL SCORE: {score_color}{score}%{Colors.ENDC}")
+    
+    if result['File Counts']:
+        print(f"\n{Colors.OKCYAN}📊 File Breakdown:{Colors.ENDC}")
+        for ftype, count in result['File Counts'].items():
+            print(f"  • {ftype}: {count}")
+    
+    if result['Suggestions']:
+        print(f"\n{Colors.WARNING}💡 Suggestions:{Colors.ENDC}")
+        for s in result['Suggestions']:
+            if "solid" in s.lower():
+                print(f"  {Colors.OKGREEN}✅ {s}{Colors.ENDC}")
+            else:
+                print(f"  • {s}")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Scan repos for cloud content and documentation quality.")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="Scan N repos concurrently in a process pool (default: 1, serial).")
+    parser.add_argument("--cache-dir", default=CACHE_DIR,
+                        help="Directory for the incremental scan cache (default: .scan_cache).")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Re-score every repo from scratch and leave the cache untouched.")
+    parser.add_argument("--enumerate", choices=BACKENDS, default=MANIFEST_BACKEND,
+                        help="File listing: 'git' index (tracked files only), filesystem 'walk', "
+                             "or 'auto' (git where available; default).")
+    parser.add_argument("--ref", default=None,
+                        help="Score this commit, branch or tag from git objects instead of the working tree. "
+                             "Bare repos are always read this way (at HEAD unless --ref is given).")
+    parser.add_argument("--ndjson", metavar="PATH",
+                        help="Stream one JSON line per repo to PATH as it is scored, plus a "
+                             "PATH.summary.json sidecar, instead of the single JSON report.")
+    parser.add_argument("--profile", action="store_true",
+                        help="Record per-phase wall/CPU time and I/O counters and add them to the report.")
+    parser.add_argument("--prometheus", metavar="PATH",
+                        help="Also write the profile as a Prometheus text exposition file (implies --profile).")
+    parser.add_argument("--resume", action="store_true",
+                        help="With --ndjson, keep an existing partial report and skip repos already in it.")
+    parser.add_argument("--history", nargs="?", const=HISTORY_PATH, metavar="DB",
+                        help="Also append this scan to a SQLite history for trend queries "
+                             "(default DB: cloud_portfolio_history.db; query with lab_history.py). "
+                             "With --watch, a rescan is recorded only if it changed some repo's scores.")
+    parser.add_argument("--watch", action="store_true",
+                        help="Keep running and re-score repos as their files change, republishing the report "
+                             "after each burst of changes (inotify on Linux, polling elsewhere).")
+    parser.add_argument("--poll", type=float, metavar="SECONDS",
+                        help="With --watch, poll the workspace every SECONDS instead of using inotify.")
+    parser.add_argument("--debounce", type=float, metavar="SECONDS",
+                        help="With --watch, wait for SECONDS without changes before re-scoring (default: 0.2).")
+    args = parser.parse_args(argv)
+    if args.resume and not args.ndjson:
+        parser.error("--resume requires --ndjson")
+    if args.watch and (args.ndjson or args.jobs > 1):
+        parser.error("--watch writes the JSON report from a single process; drop --ndjson/--jobs")
+    if (args.poll is not None or args.debounce is not None) and not args.watch:
+        parser.error("--poll and --debounce require --watch")
+    if args.prometheus:
+        args.profile = True
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
     print(f"\n{Colors.HEADER}{Colors.BOLD}{'='*60}")
     print("🚀 Cloud Portfolio Scanner v3.1")
     print(f"{'='*60}{Colors.ENDC}")
     print(f"Scanning directory: {Colors.OKCYAN}{REPOS_ROOT}{Colors.ENDC}\n")
+    if args.watch:
+        return watch(args)
     
+    stream = ReportStream(args.ndjson, resume=args.resume) if args.ndjson else None
     results = {}
-    scanned_count, skipped_count = 0, 0
+    repos, skipped_count = [], 0
     
-    for item in os.listdir(REPOS_ROOT):
-        if item in IGNORE_NAMES or item.startswith("."):
+    for item in sorted(os.listdir(REPOS_ROOT)):
+        if skip_item(item):
             print(f"{Colors.WARNING}[SKIP] {item}{Colors.ENDC}")
             skipped_count += 1
             continue
         repo_path = os.path.join(REPOS_ROOT, item)
         if not os.path.isdir(repo_path): continue
-        
-        scanned_count += 1
-        print(f"\n{Colors.OKBLUE}{'='*60}")
-        print(f"📂 Scanning: {Colors.BOLD}{item}{Colors.ENDC}")
-        print(f"{Colors.OKBLUE}{'='*60}{Colors.ENDC}")
-        
-        result = scan_repository(repo_path, item)
-        results[item] = result
-        
-        print(f"{Colors.OKCYAN}Type:{Colors.ENDC} {result['Type']}")
-        print(f"{Colors.OKCYAN}README Score:{Colors.ENDC} {result['README Score']}%")
-        print(f"{Colors.OKCYAN}Cloud (Cert) Score:{Colors.ENDC} {result['Cloud (Cert) Score']}%")
-        print(f"{Colors.OKCYAN}Job Alignment Score:{Colors.ENDC} {result['Job Alignment Score']}%")
-        print(f"{Colors.OKCYAN}Documentation Score:{Colors.ENDC} {result['Documentation Score']}%")
-        
-        score = result['TOTAL SCORE']
-        if score >= 90: score_color = Colors.OKGREEN
-        elif score >= 70: score_color = Colors.OKCYAN
-        elif score >= 50: score_color = Colors.WARNING
-        else: score_color = Colors.FAIL
-        print(f"{Colors.BOLD}TOTAL SCORE: {score_color}{score}%{Colors.ENDC}")
-        
-        if result['File Counts']:
-            print(f"\n{Colors.OKCYAN}📊 File Breakdown:{Colors.ENDC}")
-            for ftype, count in result['File Counts'].items():
-                print(f"  • {ftype}: {count}")
-        
-        if result['Suggestions']:
-            print(f"\n{Colors.WARNING}💡 Suggestions:{Colors.ENDC}")
-            for s in result['Suggestions']:
-                if "solid" in s.lower(): print(f"  {Colors.OKGREEN}✅ {s}{Colors.ENDC}")
-                else: print(f"  • {s}")
+        if stream is not None and item in stream.done:
+            print(f"{Colors.OKCYAN}[RESUME] {item} already in report{Colors.ENDC}")
+            continue
+        repos.append((item, repo_path))
+    scanned_count = len(repos) + (len(stream.done) if stream is not None else 0)
+    
+    cache_dir = None if args.no_cache else args.cache_dir
+    profiler = Profiler() if args.profile else None
+    cache_stats = {}
+    def add_cache_stats(stats):
+        for key, value in stats.items():
+            cache_stats[key] = cache_stats.get(key, 0) + value
+    
+    def record(item, result):
+        # NDJSON mode keeps nothing in memory: each result is on disk once it is printed
+        if stream is not None:
+            stream.write(item, result)
+        else:
+            results[item] = result
+    
+    if args.jobs > 1:
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+
+        # Print each repo as its worker finishes; the report is re-sorted by name below
+        with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+            futures = {pool.submit(scan_repository_job, repo_path, item, cache_dir, args.profile, args.enumerate,
+                                   args.ref): item
+                       for item, repo_path in repos}
+            for future in as_completed(futures):
+                item = futures[future]
+                result, stats, profile = future.result()
+                add_cache_stats(stats)
+                if profiler:
+                    profiler.merge(profile)
+                print_repo_header(item)
+                print_repo_result(result)
+                record(item, result)
+        results = {item: results[item] for item, _ in repos if item in results}
+    else:
+        for item, repo_path in repos:
+            print_repo_header(item)
+            result, stats, profile = scan_repository_job(repo_path, item, cache_dir, args.profile, args.enumerate,
+                                                         args.ref)
+            add_cache_stats(stats)
+            if profiler:
+                profiler.merge(profile)
+            print_repo_result(result)
+            record(item, result)
+    
+    if stream is not None:
+        stream.close()
+        summary = summarize(read_records(args.ndjson))
+    else:
+        summary = summarize(results.items())
     
     print(f"\n{Colors.HEADER}{Colors.BOLD}{'='*60}")
     print("📊 SCAN SUMMARY")
@@ -279,30 +696,48 @@ def main():
     print(f"Total Repos Scanned: {Colors.OKGREEN}{scanned_count}{Colors.ENDC}")
     print(f"Total Repos Skipped: {Colors.WARNING}{skipped_count}{Colors.ENDC}")
     
-    if results:
-        sorted_repos = sorted(results.items(), key=lambda x:x[1]["TOTAL SCORE"], reverse=True)
-        top = sorted_repos[0]
+    if summary["count"]:
+        top, bottom = summary["top"], summary["bottom"]
         print(f"\n{Colors.OKGREEN}🏆 Top Performing Repo:{Colors.ENDC}")
-        print(f"  {Colors.BOLD}{top[0]}{Colors.ENDC} - {Colors.OKGREEN}{top[1]['TOTAL SCORE']}%{Colors.ENDC}")
-        if len(sorted_repos) > 1:
-            bottom = sorted_repos[-1]
+        print(f"  {Colors.BOLD}{top[0]}{Colors.ENDC} - {Colors.OKGREEN}{top[1]}%{Colors.ENDC}")
+        if summary["count"] > 1:
             print(f"\n{Colors.WARNING}📈 Needs Improvement:{Colors.ENDC}")
-            print(f"  {Colors.BOLD}{bottom[0]}{Colors.ENDC} - {Colors.WARNING}{bottom[1]['TOTAL SCORE']}%{Colors.ENDC}")
-        avg_score = round(sum(r["TOTAL SCORE"] for r in results.values())/len(results),1)
-        print(f"\n{Colors.OKCYAN}📊 Portfolio Average:{Colors.ENDC} {avg_score}%")
+            print(f"  {Colors.BOLD}{bottom[0]}{Colors.ENDC} - {Colors.WARNING}{bottom[1]}%{Colors.ENDC}")
+        print(f"\n{Colors.OKCYAN}📊 Portfolio Average:{Colors.ENDC} {summary['average']}%")
+    
+    if cache_stats:
+        print(f"\n{Colors.OKCYAN}🗃️  Cache:{Colors.ENDC} repos {cache_stats['repo_hits']} hit / "
+              f"{cache_stats['repo_misses']} miss, files {cache_stats['file_hits']} hit / "
+              f"{cache_stats['file_misses']} miss")
+    
+    if profiler:
+        print(f"\n{Colors.OKCYAN}⏱  Profile:{Colors.ENDC}")
+        print(format_profile(profiler.to_dict()))
     
     print(f"{Colors.HEADER}{'='*60}{Colors.ENDC}")
     
-    report = {
-        "scan_date": datetime.now().isoformat(),
-        "scan_location": REPOS_ROOT,
-        "repos_scanned": scanned_count,
-        "repos_skipped": skipped_count,
-        "results": results
-    }
+    report = report_header(scanned_count, skipped_count, cache_stats if cache_dir else None)
+    if profiler:
+        report["profile"] = profiler.to_dict()
+        if args.prometheus:
+            write_prometheus(args.prometheus, report["profile"], "portfolio_scanner")
+            print(f"\n{Colors.OKGREEN}✅ Prometheus metrics saved to:{Colors.ENDC} {args.prometheus}")
+    
+    if stream is not None:
+        summary_path = args.ndjson + ".summary.json"
+        write_summary(summary_path, dict(report, summary=summary))
+        if args.history:
+            record_history(args.history, report, read_records(args.ndjson))
+            print(f"{Colors.OKGREEN}✅ Scan recorded in history:{Colors.ENDC} {args.history}")
+        print(f"\n{Colors.OKGREEN}✅ Report streamed to:{Colors.ENDC} {args.ndjson}")
+        print(f"{Colors.OKGREEN}✅ Summary saved to:{Colors.ENDC} {summary_path}\n")
+        return
     
-    with open(REPORT_PATH, "w") as f:
-        json.dump(report, f, indent=2)
+    report["results"] = results
+    save_report(report)
+    if args.history:
+        record_history(args.history, report, results.items())
+        print(f"\n{Colors.OKGREEN}✅ Scan recorded in history:{Colors.ENDC} {args.history}")
     
     print(f"\n{Colors.OKGREEN}✅ Full report saved to:{Colors.ENDC} {REPORT_PATH}\n")
 
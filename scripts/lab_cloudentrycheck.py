@@ -12,12 +12,20 @@ import os
 import re
 import sys
 import json
-import time
 import argparse
 from pathlib import Path
 from datetime import datetime, timedelta
-
-import requests
+from functools import lru_cache
+
+from lab_diff_scan import LineRule, scan_since
+from lab_git_objects import GitError
+from lab_line_index import LineIndex
+from lab_local_links import check_repo as check_local_links
+from lab_manifest import build_manifest
+from lab_markdown_index import index_markdown
+from lab_profiling import NULL_PROFILER, Profiler, format_profile, write_prometheus
+from lab_reference_index import ReferenceIndex
+from lab_link_checker import LinkCache, check_links
 
 # --------------- CONFIGURATION ---------------
 
@@ -44,6 +52,9 @@ TODO_PATTERNS = [
 # Maximum age before a "Last Updated" is considered stale
 STALE_MONTHS = 4
 
+# "auto" = tracked files from the git index in git repos, a filesystem walk otherwise
+MANIFEST_BACKEND = "auto"
+
 # Simple map of project names you *expect* to exist and be referenced
 PROJECT_REFERENCES = {
     "AWS_Cloud_Support_Sim": {
@@ -72,8 +83,8 @@ def print_header(title: str):
     print("=" * 80 + "\n")
 
 
-def find_markdown_files(repo_path: Path):
-    return list(repo_path.rglob("*.md"))
+def find_markdown_files(repo_path: Path, backend=MANIFEST_BACKEND):
+    return [Path(e.path) for e in build_manifest(repo_path, backend=backend) if e.name.endswith(".md")]
 
 
 def read_text(path: Path):
@@ -93,26 +104,25 @@ def collect_links_from_text(text: str):
 
 
 def http_check(url: str, timeout=5):
-    try:
-        response = requests.get(url, timeout=timeout)
-        return response.status_code
-    except requests.RequestException:
-        return None
+    return check_links([url], timeout=timeout)[url]
 
 
 def parse_last_updated(text: str):
     """
     Looks for lines like:
     Last Updated: 2024-10-15
-    or
-    Last Updated: October 15, 2024
+    **Last Updated:** October 15, 2024
+    or "Last Updated:" anywhere else in a line
     """
-    pattern = re.compile(r"Last Updated:\s*(.+)", re.IGNORECASE)
-    match = pattern.search(text)
-    if not match:
-        return None
-
-    raw = match.group(1).strip()
+    index = index_markdown(text)
+    raw = index.meta("Last Updated")
+    if raw is None:
+        pos = index.lower.find("last updated:")
+        if pos == -1:
+            return None
+        end = text.find("\n", pos)
+        raw = text[pos + len("last updated:"):end if end != -1 else len(text)]
+    raw = raw.strip().strip("*_").strip()
 
     # Try a couple of formats
     for fmt in ("%Y-%m-%d", "%B %d, %Y", "%b %d, %Y"):
@@ -131,11 +141,21 @@ def months_ago(dt: datetime):
     return delta.days / 30.0
 
 
+@lru_cache(maxsize=None)
+def compile_patterns(patterns: tuple):
+    """One case-insensitive alternation with a named group (p0, p1, ...) per pattern."""
+    return re.compile(
+        "|".join(f"(?P<p{i}>{pat})" for i, pat in enumerate(patterns)),
+        flags=re.IGNORECASE,
+    )
+
+
 def find_patterns(text: str, patterns):
+    """(pattern, fragment, offset) for every hit, in one pass over text."""
+    patterns = tuple(patterns)
     hits = []
-    for pat in patterns:
-        for m in re.finditer(pat, text, flags=re.IGNORECASE):
-            hits.append((pat, m.group(0)))
+    for m in compile_patterns(patterns).finditer(text):
+        hits.append((patterns[int(m.lastgroup[1:])], m.group(0), m.start()))
     return hits
 
 
@@ -149,51 +169,94 @@ def find_project_mentions(text: str, project_names):
 
 # --------------- SCAN FUNCTIONS ---------------
 
-def scan_for_todos(md_files):
+def find_todos(file: str, text: str):
+    hits = find_patterns(text, TODO_PATTERNS)
+    if not hits:
+        return []
+    lines = LineIndex(text)
+    results = []
+    for pattern, fragment, offset in hits:
+        line_no, column = lines.locate(offset)
+        results.append({
+            "file": file,
+            "pattern": pattern,
+            "fragment": fragment,
+            "line": line_no,
+            "column": column,
+        })
+    return results
+
+
+def scan_for_todos(md_files, profiler=NULL_PROFILER):
     results = []
     for md in md_files:
         text = read_text(md)
-        hits = find_patterns(text, TODO_PATTERNS)
-        for pattern, fragment in hits:
-            # grab a small context
-            line_no = text.count("\n", 0, text.find(fragment)) + 1
-            results.append({
-                "file": str(md),
-                "pattern": pattern,
-                "fragment": fragment,
-                "line": line_no,
-            })
+        profiler.count("bytes_read", len(text))
+        profiler.count("files_regex_scanned")
+        results.extend(find_todos(str(md), text))
     return results
 
 
-def scan_for_broken_links(md_files):
+TODO_LINES = LineRule("todos", lambda rel_path: rel_path.endswith(".md"), find_todos, TODO_PATTERNS)
+
+
+def scan_for_todos_since(repo_key: str, repo_path: Path, base, profiler=NULL_PROFILER):
+    """TODO markers at HEAD, scanning only markdown lines changed since base (see lab_diff_scan)."""
+    scan = scan_since(repo_path, TODO_LINES, base, name=repo_key, profiler=profiler)
+    if scan.base:
+        print(f"[INFO] TODOs: {scan.files_changed} file(s) changed since {scan.base[:12]}")
+    else:
+        print(f"[INFO] TODOs: no stored findings to start from, scanned {scan.commit[:12]} in full")
+    return [dict(t, file=str(repo_path / t["file"])) for t in scan.findings]
+
+
+def scan_for_broken_links(md_files, link_cache=None, refresh=False, profiler=NULL_PROFILER, references=None):
+    """Check every URL in md_files; with a ReferenceIndex, its URLs are used and nothing is re-read."""
     all_links = set()
-    for md in md_files:
-        text = read_text(md)
-        links = collect_links_from_text(text)
-        all_links.update(links)
+    if references is not None:
+        all_links.update(references.urls())
+    else:
+        for md in md_files:
+            text = read_text(md)
+            profiler.count("bytes_read", len(text))
+            profiler.count("files_regex_scanned")
+            links = collect_links_from_text(text)
+            all_links.update(links)
 
     broken = []
     if not all_links:
         return broken
 
+    def report(url, status):
+        if status is None or status >= 400:
+            print(f"[BROKEN] {url} (status={status})")
+        else:
+            print(f"[OK] {url} (status={status})")
+
     print_header("Checking external links (this may take a bit)...")
+    # Politeness is per host inside the checker, so different hosts are checked concurrently
+    with profiler.phase("http"):
+        statuses = check_links(sorted(all_links), on_result=report, cache=link_cache, refresh=refresh,
+                               profiler=profiler if profiler.enabled else None)
+    if link_cache is not None:
+        link_cache.save()
+        stats = link_cache.stats
+        print(f"[INFO] Link cache: {stats['fresh']} fresh, {stats['revalidated']} revalidated, "
+              f"{stats['fetched']} fetched")
     for url in sorted(all_links):
-        status = http_check(url)
+        status = statuses[url]
         if status is None or status >= 400:
             broken.append({
                 "url": url,
                 "status": status,
             })
-            print(f"[BROKEN] {url} (status={status})")
-        else:
-            print(f"[OK] {url} (status={status})")
-        time.sleep(0.2)  # be polite
+            if references is not None:
+                broken[-1]["referenced_in"] = [f"{r.file}:{r.line}" for r in references.links_to(url)]
 
     return broken
 
 
-def scan_last_updated(md_files):
+def scan_last_updated(md_files, profiler=NULL_PROFILER):
     # We only care about top-level README files for "Last Updated"
     stale = []
     checked = []
@@ -201,6 +264,8 @@ def scan_last_updated(md_files):
         if md.name.lower() != "readme.md":
             continue
         text = read_text(md)
+        profiler.count("bytes_read", len(text))
+        profiler.count("files_regex_scanned")
         dt = parse_last_updated(text)
         if dt is None:
             continue
@@ -215,11 +280,13 @@ def scan_last_updated(md_files):
     return checked, stale
 
 
-def scan_project_references(portfolio_repo: Path):
+def scan_project_references(portfolio_repo: Path, references=None):
     """
     Check that:
     - Expected project repos exist (under same parent as portfolio/profile).
     - Portfolio README mentions required projects.
+    With a ReferenceIndex over all REPOS_CONFIG markdown, mentions are looked up
+    in the index, and required projects no markdown file mentions are listed too.
     """
     parent = portfolio_repo.parent
     portfolio_readme = portfolio_repo / "README.md"
@@ -236,22 +303,28 @@ def scan_project_references(portfolio_repo: Path):
 
     missing_in_portfolio = []
     if portfolio_readme.exists():
-        text = read_text(portfolio_readme)
-        mentioned = find_project_mentions(text, PROJECT_REFERENCES.keys())
+        if references is not None:
+            mentioned = references.projects_in(portfolio_readme)
+        else:
+            mentioned = find_project_mentions(read_text(portfolio_readme), PROJECT_REFERENCES.keys())
         for proj, meta in PROJECT_REFERENCES.items():
             if meta.get("expect_in_portfolio", False) and proj not in mentioned:
                 missing_in_portfolio.append(proj)
     else:
         print(f"[WARN] Portfolio README not found at {portfolio_readme}")
 
-    return {
+    results = {
         "existing_repos": existing_repos,
         "missing_required": missing_required,
         "missing_in_portfolio": missing_in_portfolio,
     }
+    if references is not None:
+        results["unreferenced"] = references.unreferenced(
+            [proj for proj, meta in PROJECT_REFERENCES.items() if meta.get("required", False)])
+    return results
 
 
-def scan_repo(repo_key: str, repo_conf: dict):
+def scan_repo(repo_key: str, repo_conf: dict, profiler=NULL_PROFILER, since=None):
     repo_name = repo_conf["name"]
     repo_path = repo_conf["path"]
 
@@ -264,11 +337,26 @@ def scan_repo(repo_key: str, repo_conf: dict):
             "path_exists": False,
         }
 
-    md_files = find_markdown_files(repo_path)
+    with profiler.phase("traversal"):
+        manifest = build_manifest(repo_path, backend=MANIFEST_BACKEND)
+        md_files = [Path(e.path) for e in manifest if e.name.endswith(".md")]
+    profiler.count("files_visited", len(md_files))
     print(f"[INFO] Found {len(md_files)} markdown files.")
 
-    todos = scan_for_todos(md_files)
-    checked_dates, stale_dates = scan_last_updated(md_files)
+    todos = None
+    if since is not None:
+        try:
+            todos = scan_for_todos_since(repo_key, repo_path, since, profiler)
+        except GitError as e:
+            print(f"[WARN] Incremental TODO scan unavailable ({e}); scanning every file.")
+    if todos is None:
+        with profiler.phase("todos"):
+            todos = scan_for_todos(md_files, profiler)
+    with profiler.phase("last_updated"):
+        checked_dates, stale_dates = scan_last_updated(md_files, profiler)
+    # Relative links, images and #anchors resolve against the manifest: no HTTP needed
+    with profiler.phase("local_links"):
+        broken_local, local_checked = check_local_links(repo_path, manifest)
 
     return {
         "repo": repo_key,
@@ -277,46 +365,81 @@ def scan_repo(repo_key: str, repo_conf: dict):
         "todos": todos,
         "checked_dates": checked_dates,
         "stale_dates": stale_dates,
+        "local_links_checked": local_checked,
+        "broken_local_links": [dict(b._asdict(), file=str(repo_path / b.file)) for b in broken_local],
     }
 
 
 # --------------- MAIN ---------------
 
-def main():
+def main(argv=None):
     parser = argparse.ArgumentParser(description="Scan Charles's GitHub profile + portfolio repos.")
     parser.add_argument(
         "--skip-links",
         action="store_true",
         help="Skip external link checking (faster, no HTTP requests).",
     )
+    parser.add_argument(
+        "--link-cache",
+        default=".link_cache.json",
+        help="Persistent link-status cache file (default: .link_cache.json). Pass '' to disable.",
+    )
+    parser.add_argument(
+        "--refresh-links",
+        action="store_true",
+        help="Ignore link cache TTLs and revalidate every external link.",
+    )
     parser.add_argument(
         "--json",
         action="store_true",
         help="Output JSON summary at the end.",
     )
-    args = parser.parse_args()
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Record per-phase wall/CPU time, I/O and HTTP counters; included in the JSON output.",
+    )
+    parser.add_argument(
+        "--prometheus",
+        metavar="PATH",
+        help="Also write the profile as a Prometheus text exposition file (implies --profile).",
+    )
+    parser.add_argument(
+        "--since",
+        metavar="BASE",
+        help="Only scan markdown lines changed since commit BASE for TODO markers ('last' = the commit "
+             "of the previous --since run); findings for other lines come from .scan_cache.",
+    )
+    args = parser.parse_args(argv)
+    profiler = Profiler() if args.profile or args.prometheus else NULL_PROFILER
 
     all_results = {}
 
     # Scan both repos for TODOs and Last Updated
     for key, conf in REPOS_CONFIG.items():
-        res = scan_repo(key, conf)
+        res = scan_repo(key, conf, profiler, args.since)
         all_results[key] = res
 
+    # Project mentions and URLs across all markdown, updated from .scan_cache
+    references = ReferenceIndex(PROJECT_REFERENCES, backend=MANIFEST_BACKEND, profiler=profiler).update(
+        {key: conf["path"] for key, conf in REPOS_CONFIG.items() if conf["path"].exists()})
+    s = references.stats
+    print(f"[INFO] Reference index: {s['files_indexed']} file(s) indexed, {s['files_reused']} reused, "
+          f"{s['files_removed']} removed")
+
     # Scan portfolio-specific details
     portfolio_conf = REPOS_CONFIG["portfolio"]
     portfolio_path = portfolio_conf["path"]
 
-    proj_ref_results = scan_project_references(portfolio_path)
+    with profiler.phase("project_references"):
+        proj_ref_results = scan_project_references(portfolio_path, references)
     all_results["project_references"] = proj_ref_results
 
     # External links: scan across both repos
     if not args.skip_links:
-        all_md_files = []
-        for conf in REPOS_CONFIG.values():
-            if conf["path"].exists():
-                all_md_files.extend(find_markdown_files(conf["path"]))
-        broken_links = scan_for_broken_links(all_md_files)
+        link_cache = LinkCache(args.link_cache) if args.link_cache else None
+        with profiler.phase("links"):
+            broken_links = scan_for_broken_links([], link_cache, args.refresh_links, profiler, references)
         all_results["broken_links"] = broken_links
     else:
         all_results["broken_links"] = []
@@ -345,6 +468,13 @@ def main():
         for s in res["stale_dates"]:
             print(f"    * {s['file']} -> {s['date']} (~{s['age_months']:.1f} months ago)")
 
+        broken_local = res["broken_local_links"]
+        print(f"  - Relative links/images checked: {res['local_links_checked']}, broken: {len(broken_local)}")
+        for b in broken_local[:5]:
+            print(f"    * {b['file']} (line {b['line']}): {b['target']} - {b['reason']}")
+        if len(broken_local) > 5:
+            print(f"    ... and {len(broken_local) - 5} more")
+
     # Project references summary
     pr = all_results["project_references"]
     print("\nProject references:")
@@ -354,15 +484,27 @@ def main():
         print("  [!] Missing required repos:", ", ".join(pr["missing_required"]))
     if pr["missing_in_portfolio"]:
         print("  [!] Not mentioned in portfolio README:", ", ".join(pr["missing_in_portfolio"]))
+    if pr.get("unreferenced"):
+        print("  [!] Required but not mentioned in any markdown:", ", ".join(pr["unreferenced"]))
 
     # Broken links summary
     broken_links = all_results["broken_links"]
     print(f"\nExternal link check: {len(broken_links)} broken/failed links.")
     for bl in broken_links[:10]:
         print(f"  - {bl['url']} (status={bl['status']})")
+        for ref in bl.get("referenced_in", [])[:3]:
+            print(f"      linked from {ref}")
     if len(broken_links) > 10:
         print(f"    ... and {len(broken_links) - 10} more")
 
+    if profiler.enabled:
+        all_results["profile"] = profiler.to_dict()
+        print("\nProfile:")
+        print(format_profile(all_results["profile"]))
+        if args.prometheus:
+            write_prometheus(args.prometheus, all_results["profile"], "entrycheck")
+            print(f"[INFO] Prometheus metrics saved to {args.prometheus}")
+
     # JSON output (optional)
     if args.json:
         print_header("JSON OUTPUT")
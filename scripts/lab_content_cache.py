@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Shared file content cache for one scan run.
+
+Scanners read files through ContentCache.get() instead of straight from
+disk, so a file that several checks need (code heuristics, secret scan,
+README) is read and decoded once. Entries are evicted least-recently-used
+once the byte budget is exceeded; files larger than max_file_bytes are never
+loaded and callers should read or stream them from disk themselves (the
+rule engine reads them uncached, the secret scan streams them).
+"""
+
+import os
+import threading
+from collections import OrderedDict, namedtuple
+
+from lab_secret_scan import SNIFF_SIZE, is_binary
+
+DEFAULT_BUDGET = 64 * 1024 * 1024     # bytes of file content kept in memory
+DEFAULT_MAX_FILE = 4 * 1024 * 1024    # larger files bypass the cache
+
+CachedText = namedtuple("CachedText", ["text", "size", "binary"])
+
+
+class ContentCache:
+    def __init__(self, budget=DEFAULT_BUDGET, max_file_bytes=DEFAULT_MAX_FILE):
+        self.budget = budget
+        self.max_file_bytes = min(max_file_bytes, budget)
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "bytes_read": 0, "peak_bytes": 0, "too_large": 0}
+
+    def get(self, path):
+        """
+        CachedText for path (text is "" for binaries and unreadable files),
+        or None if the file is over max_file_bytes and should be streamed.
+        """
+        key = str(path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return entry
+
+        entry = self._load(key)
+        with self._lock:
+            if entry is None:
+                self.stats["too_large"] += 1
+                return None
+            self.stats["misses"] += 1
+            self.stats["bytes_read"] += entry.size
+            if key not in self._entries:
+                self._entries[key] = entry
+                self._bytes += entry.size
+                while self._bytes > self.budget:
+                    _, old = self._entries.popitem(last=False)
+                    self._bytes -= old.size
+                    self.stats["evictions"] += 1
+                self.stats["peak_bytes"] = max(self.stats["peak_bytes"], self._bytes)
+        return entry
+
+    def _load(self, path):
+        try:
+            with open(path, "rb") as f:
+                head = f.read(SNIFF_SIZE)
+                if is_binary(head):
+                    return CachedText("", len(head), True)
+                rest = f.read(self.max_file_bytes + 1 - len(head)) if len(head) == SNIFF_SIZE else b""
+        except OSError:
+            return CachedText("", 0, True)
+        raw = head + rest
+        if len(raw) > self.max_file_bytes:
+            return None
+        return CachedText(raw.decode("utf-8", "ignore"), len(raw), False)
+
+    def head(self, path, size):
+        """First size raw bytes of path (b"" if unreadable); heads are small and not cached."""
+        try:
+            with open(path, "rb") as f:
+                return f.read(size)
+        except OSError:
+            return b""
+
+    def exists(self, path):
+        """True if path is a file this cache can load (GitTree answers from its tree listing)."""
+        return os.path.isfile(path)
+
+    def invalidate(self, path):
+        """Drop path after it has been rewritten."""
+        with self._lock:
+            entry = self._entries.pop(str(path), None)
+            if entry is not None:
+                self._bytes -= entry.size
+
+
+def merge_stats(total, stats):
+    """Accumulate one cache's stats into a run-wide dict."""
+    for key, value in stats.items():
+        if key == "peak_bytes":
+            total[key] = max(total.get(key, 0), value)
+        else:
+            total[key] = total.get(key, 0) + value
+    return total
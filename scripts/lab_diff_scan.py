@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Incremental line scanning between commits.
+
+Secret and TODO findings are stored per repo in the scan cache together with
+the commit they describe. A later scan diffs that commit against the new one
+with `git diff -U0` and only scans the added lines. Findings on removed or
+rewritten lines are dropped, findings below a hunk move by its line delta,
+and findings in untouched files are carried over. The result matches a full
+scan of the new commit, but the cost grows with the diff instead of the repo.
+
+Scans read committed content through git objects, so uncommitted edits in
+the working tree are ignored. Without stored findings for the base commit
+(first run, different rules, unknown base) the new commit is scanned in full.
+"""
+
+import os
+from collections import namedtuple
+
+from lab_git_index import resolve_git_dir
+from lab_git_objects import MAX_BLOB_BYTES, CatFile, GitError, GitTree, git_output, is_bare_repo, resolve_ref
+from lab_profiling import NULL_PROFILER
+from lab_scan_cache import ScanCache, config_fingerprint
+from lab_secret_scan import SNIFF_SIZE, is_binary
+
+DEFAULT_STATE_DIR = ".scan_cache"
+LAST = "last"   # base that means "the commit of the stored findings"
+
+Hunk = namedtuple("Hunk", ["old_start", "old_count", "new_start", "new_count", "added"])
+FileDiff = namedtuple("FileDiff", ["status", "old_path", "path", "hunks", "binary"])
+
+# One kind of finding: which repo-relative paths it covers, how to scan a block
+# of text (returning dicts with "file" and a 1-based "line") and what config
+# its stored findings depend on.
+LineRule = namedtuple("LineRule", ["name", "wants", "scan", "config"])
+
+DiffScanResult = namedtuple("DiffScanResult", ["findings", "commit", "base", "files_changed"])
+
+
+# ---------------- DIFF ----------------
+
+
+def _name_status(git_dir, base, head):
+    """(status, old_path, path) per changed file, in git's diff order."""
+    fields = git_output(git_dir, "diff", "--name-status", "-z", "-M", "--no-ext-diff", base, head).split(b"\0")
+    changes, i = [], 0
+    while i < len(fields) and fields[i]:
+        status = fields[i].decode()[0]
+        if status in "RC":
+            old, new = os.fsdecode(fields[i + 1]), os.fsdecode(fields[i + 2])
+            i += 3
+        else:
+            old = new = os.fsdecode(fields[i + 1])
+            i += 2
+        changes.append((status, None if status == "A" else old, None if status == "D" else new))
+    return changes
+
+
+def _hunk_header(line):
+    # @@ -old_start[,old_count] +new_start[,new_count] @@
+    old, new = line.split(b" ")[1:3]
+
+    def span(part):
+        start, _, count = part[1:].partition(b",")
+        return int(start), int(count) if count else 1
+
+    return span(old) + span(new)
+
+
+def parse_patch(data):
+    """(hunks, binary) per `diff --git` block of a -U0 patch, in order."""
+    blocks = []
+    lines = data.split(b"\n")
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        i += 1
+        if line.startswith(b"diff --git "):
+            blocks.append(([], False))
+        elif line.startswith(b"Binary files ") and blocks:
+            blocks[-1] = (blocks[-1][0], True)
+        elif line.startswith(b"@@ ") and blocks:
+            old_start, old_count, new_start, new_count = _hunk_header(line)
+            added, removed = [], 0
+            # Count body lines: an added line may itself start with "+++" or "---"
+            while (removed < old_count or len(added) < new_count) and i < len(lines):
+                body = lines[i]
+                i += 1
+                if body.startswith(b"-"):
+                    removed += 1
+                elif body.startswith(b"+"):
+                    added.append(body[1:].decode("utf-8", "ignore"))
+            while i < len(lines) and lines[i].startswith(b"\\"):
+                i += 1   # "\ No newline at end of file"
+            blocks[-1][0].append(Hunk(old_start, old_count, new_start, new_count, added))
+    return blocks
+
+
+def git_diff(git_dir, base, head):
+    """FileDiff for every file that differs between commits base and head."""
+    changes = _name_status(git_dir, base, head)
+    patch = git_output(git_dir, "diff", "-U0", "-M", "--no-color", "--no-ext-diff", base, head)
+    blocks = parse_patch(patch)
+    if len(blocks) != len(changes):
+        raise GitError("could not match the patch to the changed files")
+    return [FileDiff(status, old, new, hunks, binary)
+            for (status, old, new), (hunks, binary) in zip(changes, blocks)]
+
+
+def remap_line(line, hunks):
+    """Line number of old line `line` after applying hunks, or None if it was removed or rewritten."""
+    offset = 0
+    for h in hunks:
+        if h.old_count == 0:
+            # Pure insertion after old line old_start
+            if line <= h.old_start:
+                return line + offset
+        elif line < h.old_start:
+            return line + offset
+        elif line < h.old_start + h.old_count:
+            return None
+        offset += h.new_count - h.old_count
+    return line + offset
+
+
+# ---------------- MERGE ----------------
+
+
+def merge_findings(previous, diffs, rule, read, profiler=NULL_PROFILER):
+    """
+    Findings at the new commit from the findings at the base ({rel_path: [finding]})
+    and the diff between the two. Only added lines are scanned, except for files
+    the rule did not cover before (renamed into scope) and binary diffs, which
+    are read whole with read(rel_path) -> text or None.
+    """
+    touched = set()
+    for d in diffs:
+        touched.update(p for p in (d.old_path, d.path) if p)
+    merged = {rel: found for rel, found in previous.items() if rel not in touched}
+
+    for d in diffs:
+        if d.path is None or not rule.wants(d.path):
+            continue
+        found = []
+        if d.binary or (d.old_path is not None and not rule.wants(d.old_path)):
+            text = read(d.path)
+            if text:
+                profiler.count("bytes_read", len(text))
+                profiler.count("files_regex_scanned")
+                found = rule.scan(d.path, text)
+        else:
+            for f in previous.get(d.old_path, ()) if d.old_path else ():
+                line = remap_line(f["line"], d.hunks)
+                if line is not None:
+                    found.append(dict(f, file=d.path, line=line))
+            if any(h.added for h in d.hunks):
+                profiler.count("files_regex_scanned")
+            for h in d.hunks:
+                if not h.added:
+                    continue
+                text = "\n".join(h.added) + "\n"
+                profiler.count("bytes_read", len(text))
+                found.extend(dict(f, line=f["line"] + h.new_start - 1) for f in rule.scan(d.path, text))
+        if found:
+            merged[d.path] = sorted(found, key=lambda f: f["line"])
+    return merged
+
+
+def blob_reader(cat, commit):
+    """read(rel_path) for merge_findings: text of rel_path at commit, None for binaries and big files."""
+    def read(rel_path):
+        data = cat.read(f"{commit}:{rel_path}")
+        if data is None or len(data) > MAX_BLOB_BYTES or is_binary(data[:SNIFF_SIZE]):
+            return None
+        return data.decode("utf-8", "ignore")
+    return read
+
+
+def full_findings(git_dir, commit, rule, profiler=NULL_PROFILER):
+    """{rel_path: [finding]} for every file rule wants in commit."""
+    findings = {}
+    with GitTree(git_dir, commit) as tree:
+        for entry in tree.manifest():
+            if not rule.wants(entry.rel_path):
+                continue
+            cached = tree.get(entry.path)
+            profiler.count("files_visited")
+            profiler.count("bytes_read", cached.size)
+            if cached.binary:
+                continue
+            profiler.count("files_regex_scanned")
+            found = rule.scan(entry.rel_path, cached.text)
+            if found:
+                findings[entry.rel_path] = found
+    return findings
+
+
+# ---------------- SCAN ----------------
+
+
+def _resolve(git_dir, ref):
+    try:
+        return resolve_ref(git_dir, ref) if ref else None
+    except GitError:
+        return None
+
+
+def flatten(findings):
+    """Findings sorted by (file, line) from a {rel_path: [finding]} map."""
+    return [f for rel in sorted(findings) for f in findings[rel]]
+
+
+def scan_since(repo_path, rule, base=LAST, head="HEAD", state_dir=DEFAULT_STATE_DIR, name=None,
+               profiler=NULL_PROFILER):
+    """
+    Findings of rule at commit head. If findings stored under state_dir are for
+    base (LAST: whatever commit they are for), only the diff base..head is
+    scanned; otherwise head is scanned in full. The result is stored for the
+    next run. Returns a DiffScanResult; base is None after a full scan.
+    """
+    repo_path = os.fspath(repo_path)
+    git_dir = repo_path if is_bare_repo(repo_path) else resolve_git_dir(repo_path)
+    if git_dir is None:
+        raise GitError(f"not a git repository: {repo_path}")
+    commit = resolve_ref(git_dir, head)
+    if not commit:
+        raise GitError(f"unknown ref: {head}")
+
+    state = ScanCache(state_dir, config_fingerprint([rule.name], rule.config)) if state_dir else None
+    key = f"{name or os.path.basename(os.path.abspath(repo_path))}.{rule.name}"
+    entry = state.load(key) if state else {}
+    stored = entry.get("commit")
+    base_commit = stored if base == LAST else _resolve(git_dir, base)
+
+    result = None
+    if stored and base_commit == stored:
+        try:
+            with profiler.phase("diff"):
+                diffs = git_diff(git_dir, stored, commit)
+        except GitError:
+            diffs = None   # e.g. the stored commit was garbage-collected
+        if diffs is not None:
+            profiler.count("files_visited", len(diffs))
+            cat = CatFile(git_dir)
+            try:
+                with profiler.phase(f"rule.{rule.name}"):
+                    findings = merge_findings(entry["findings"], diffs, rule, blob_reader(cat, commit), profiler)
+            finally:
+                cat.close()
+            result = DiffScanResult(flatten(findings), commit, stored, len(diffs))
+    if result is None:
+        with profiler.phase(f"rule.{rule.name}"):
+            findings = full_findings(git_dir, commit, rule, profiler)
+        result = DiffScanResult(flatten(findings), commit, None, None)
+
+    if state:
+        state.save(key, {"config": state.config_key, "commit": commit, "findings": findings})
+    return result
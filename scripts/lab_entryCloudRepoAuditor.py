@@ -1,7 +1,23 @@
-import os
-import re
+import argparse
 from pathlib import Path
-from prettytable import PrettyTable
+
+from lab_autofix import FixSet
+from lab_markdown_index import index_markdown
+from lab_rule_engine import (
+    Profile,
+    add_profile_args,
+    file_exists,
+    read_file,
+    run_profile,
+    scan_code,
+    scan_iac,
+    scan_security,
+    scan_security_findings,
+)
+
+# scan_code / scan_iac / scan_security(_findings) are shared with the validator and live in the rule engine
+__all__ = ["PROFILE", "main", "scan_code", "scan_iac", "scan_readme", "scan_security",
+           "scan_security_findings"]
 
 # ---------------- CONFIG ----------------
 AUTO_FIX = True  # True = auto-fix missing sections, False = just rate
@@ -10,11 +26,13 @@ PORTFOLIO_REPO = "charles-bucher.github.io"
 PROFILE_REPO = "charles-bucher"
 
 # ---------------- HELPER FUNCTIONS ----------------
-def scan_readme(repo_path, repo_name):
+def scan_readme(repo_path, repo_name, cache=None, fixer=None):
     """
     Enhanced README scanner:
     - Gives up to 100% for rich lab READMEs
     - Checks for title, description, usage, diagrams, tables, skills, IaC examples
+    - Auto-fixes stack on one in-memory copy and are written by fixer.commit()
+      (immediately when no fixer is passed)
     """
     readme_path = Path(repo_path) / "README.md"
     score = 0
@@ -22,116 +40,84 @@ def scan_readme(repo_path, repo_name):
 
     # Portfolio/Profile repos assumed complete
     if repo_name in [PORTFOLIO_REPO, PROFILE_REPO]:
-        return (100 if readme_path.exists() else 0, fixes)
+        return (100 if file_exists(readme_path, cache) else 0, fixes)
+
+    own_fixer = AUTO_FIX and fixer is None
+    if own_fixer:
+        fixer = FixSet()
 
-    if not readme_path.exists():
+    if not file_exists(readme_path, cache):
         if AUTO_FIX:
-            readme_path.write_text("# Project Title\n\nDescription here...\n")
+            fixer.file(readme_path).replace("# Project Title\n\nDescription here...\n")
             fixes.append("Created README.md template")
+            if own_fixer:
+                fixer.commit(cache)
         return 0, fixes
 
-    text = readme_path.read_text(errors='ignore')
+    text = read_file(readme_path, cache)
+    index = index_markdown(text)
+    fix = fixer.file(readme_path, text) if AUTO_FIX else None
 
     # Basic sections (40%)
-    if re.search(r'#\s*\w+', text): score += 10
-    else: 
-        if AUTO_FIX: readme_path.write_text("# Project Title\n" + text); fixes.append("Added project title")
+    if index.has_heading_text():
+        score += 10
+    else:
+        if AUTO_FIX:
+            fix.prepend("# Project Title\n")
+            fixes.append("Added project title")
 
-    if re.search(r'Description', text, re.I): score += 10
-    else: 
-        if AUTO_FIX: readme_path.write_text(text + "\n\nDescription here...\n"); fixes.append("Added description")
+    if index.contains('Description'):
+        score += 10
+    else:
+        if AUTO_FIX:
+            fix.append("\n\nDescription here...\n")
+            fixes.append("Added description")
 
-    if re.search(r'(Usage|Install)', text, re.I): score += 10
+    if index.contains_any(('Usage', 'Install')):
+        score += 10
     else:
-        if AUTO_FIX: readme_path.write_text(text + "\n\n## Usage\nInstructions here...\n"); fixes.append("Added Usage section")
+        if AUTO_FIX:
+            fix.append("\n\n## Usage\nInstructions here...\n")
+            fixes.append("Added Usage section")
 
-    if re.search(r'!\[.*\]\(.*\)', text): score += 10
+    if index.images:
+        score += 10
     else:
-        if AUTO_FIX: readme_path.write_text(text + "\n\n![Diagram](diagram.png)\n"); fixes.append("Added diagram placeholder")
+        if AUTO_FIX:
+            fix.append("\n\n![Diagram](diagram.png)\n")
+            fixes.append("Added diagram placeholder")
+
+    if own_fixer:
+        fixer.commit(cache)
 
     # Advanced lab sections (60%)
-    if re.search(r'Scenario Walkthrough', text, re.I): score += 20
-    if re.search(r'Skills Demonstrated', text, re.I): score += 20
-    if re.search(r'(Infrastructure as Code|Terraform|CloudFormation)', text, re.I): score += 10
-    if re.search(r'(Monitoring|Operational Signals|Logs)', text, re.I): score += 10
+    if index.contains('Scenario Walkthrough'):
+        score += 20
+    if index.contains('Skills Demonstrated'):
+        score += 20
+    if index.contains_any(('Infrastructure as Code', 'Terraform', 'CloudFormation')):
+        score += 10
+    if index.contains_any(('Monitoring', 'Operational Signals', 'Logs')):
+        score += 10
 
     return min(score, 100), fixes
 
-def scan_code(repo_path):
-    score = 0
-    code_files = [f for f in Path(repo_path).rglob("*.*")
-                  if not any(part.startswith('.') for part in f.parts) and f.suffix in ('.py', '.sh', '.ps1')]
-    if code_files:
-        score += 30
-        for f in code_files:
-            try:
-                content = f.read_text(errors='ignore')
-            except PermissionError:
-                continue
-            if "try:" in content or "except" in content or "if __name__ == '__main__':" in content:
-                score += 10
-                break
-    return min(score, 40)
-
-def scan_iac(repo_path):
-    score = 0
-    iac_files = [f for f in Path(repo_path).rglob("*.*")
-                 if not any(part.startswith('.') for part in f.parts) and f.suffix in ('.tf', '.yaml', '.yml')]
-    if iac_files: score += 20
-    return score
-
-def scan_security(repo_path):
-    score = 0
-    code_files = [f for f in Path(repo_path).rglob("*.*")
-                  if not any(part.startswith('.') for part in f.parts)]
-    insecure = False
-    for f in code_files:
-        try:
-            content = f.read_text(errors='ignore')
-        except PermissionError:
-            continue
-        if re.search(r'AKIA|SECRET|password|access_key', content, re.I):
-            insecure = True
-            break
-    if not insecure: score += 10
-    return score
+# ---------------- PROFILE ----------------
+PROFILE = Profile(
+    "Cloud Portfolio Validator Results",
+    scan_readme,
+    skip_repos=SKIP_REPOS,
+    portfolio_repo=PORTFOLIO_REPO,
+    profile_repo=PROFILE_REPO,
+    max_findings=None,
+    name="auditor",
+)
 
 # ---------------- MAIN ----------------
-def main():
-    REPO_BASE = Path.cwd()
-    repos = [f for f in os.listdir(REPO_BASE) if Path(REPO_BASE, f).is_dir()]
-    table = PrettyTable()
-    table.field_names = ["Repo", "README", "Code", "IaC", "Security", "Portfolio Bonus", "Total %"]
-
-    print("\n🔍 Cloud Portfolio Validator Results\n")
-
-    for repo in repos:
-        if repo in SKIP_REPOS:
-            print(f"⏭ Skipping {repo}")
-            continue
-
-        path = Path(REPO_BASE) / repo
-
-        readme_score, fixes = scan_readme(path, repo)
-        code_score = scan_code(path)
-        iac_score = scan_iac(path)
-        security_score = scan_security(path)
-        portfolio_bonus = 10 if repo == PORTFOLIO_REPO else 0
-
-        total_score = readme_score + code_score + iac_score + security_score + portfolio_bonus
-        total_score = min(total_score, 100)
-
-        label = repo
-        if repo == PORTFOLIO_REPO: label += " (PORTFOLIO)"
-        elif repo == PROFILE_REPO: label += " (PROFILE)"
-
-        table.add_row([label, f"{readme_score}%", f"{code_score}%", f"{iac_score}%", f"{security_score}%", f"{portfolio_bonus}%", f"{total_score:.1f}%"])
-
-        if fixes:
-            print(f"📁 {label} - Auto-fixes applied: {', '.join(fixes)}")
-
-    print(table)
-    print("\n✅ Scan Complete\n")
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Audit cloud portfolio repos and auto-fix README gaps.")
+    args = add_profile_args(parser).parse_args(argv)
+    run_profile(PROFILE, args)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Tracked-file listing straight from a repository's git index.
+
+read_index() parses .git/index (versions 2, 3 and 4) without spawning git
+and returns one IndexEntry per tracked path with the stat data git cached
+for it and its blob id. Build outputs, virtualenvs, data dumps and anything
+else that is untracked or .gitignored never show up, so scanners that
+enumerate from here skip them without a hardcoded ignore list.
+
+Indexes this parser does not handle (split or sparse indexes, unknown
+versions) fall back to `git ls-files -z`, which lists paths only.
+"""
+
+import os
+import struct
+import subprocess
+from collections import namedtuple
+
+IndexEntry = namedtuple("IndexEntry", ["rel_path", "mode", "size", "mtime_ns", "blob"])
+
+_HEADER = struct.Struct(">4sLL")
+# ctime s/ns, mtime s/ns, dev, ino, mode, uid, gid, size, sha1, flags
+_ENTRY = struct.Struct(">10L20sH")
+_GITLINK = 0o160000
+_EXTENDED = 0x4000
+_SKIP_WORKTREE = 0x4000   # in the extended flags
+
+
+class UnsupportedIndex(Exception):
+    pass
+
+
+def resolve_git_dir(repo_path):
+    """The git directory of a working tree (following `gitdir:` files), or None."""
+    git_dir = os.path.join(repo_path, ".git")
+    if os.path.isfile(git_dir):
+        try:
+            with open(git_dir, "r", encoding="utf-8") as f:
+                line = f.readline().strip()
+        except OSError:
+            return None
+        if not line.startswith("gitdir:"):
+            return None
+        git_dir = os.path.join(repo_path, line[len("gitdir:"):].strip())
+    return git_dir if os.path.isdir(git_dir) else None
+
+
+def _varint(buf, pos):
+    # git's offset varint, used for v4 path prefix compression
+    c = buf[pos]
+    pos += 1
+    value = c & 0x7F
+    while c & 0x80:
+        c = buf[pos]
+        pos += 1
+        value = ((value + 1) << 7) | (c & 0x7F)
+    return value, pos
+
+
+def parse_index(data):
+    """IndexEntry list for the raw bytes of a git index file."""
+    signature, version, count = _HEADER.unpack_from(data, 0)
+    if signature != b"DIRC" or version not in (2, 3, 4):
+        raise UnsupportedIndex(f"index version {version}")
+    entries = []
+    pos = _HEADER.size
+    prev_path = b""
+    for _ in range(count):
+        start = pos
+        fields = _ENTRY.unpack_from(data, pos)
+        pos += _ENTRY.size
+        mtime_s, mtime_ns, mode, size, sha, flags = fields[2], fields[3], fields[6], fields[9], fields[10], fields[11]
+        ext_flags = 0
+        if flags & _EXTENDED:
+            if version < 3:
+                raise UnsupportedIndex("extended flags in a v2 index")
+            ext_flags, = struct.unpack_from(">H", data, pos)
+            pos += 2
+        if version == 4:
+            strip, pos = _varint(data, pos)
+            end = data.index(b"\0", pos)
+            path = prev_path[:len(prev_path) - strip] + data[pos:end]
+            pos = end + 1
+        else:
+            end = data.index(b"\0", pos)
+            path = data[pos:end]
+            # Entries are NUL-padded to a multiple of 8 bytes
+            pos = start + ((end - start) // 8 + 1) * 8
+        prev_path = path
+        if (flags >> 12) & 3 or ext_flags & _SKIP_WORKTREE:
+            continue  # conflict stages and sparse-checkout entries have no worktree file of their own
+        if mode & 0o170000 == 0o040000:
+            raise UnsupportedIndex("sparse index")
+        if mode == _GITLINK:
+            continue  # submodule
+        entries.append(IndexEntry(os.fsdecode(path), mode, size, mtime_s * 1_000_000_000 + mtime_ns, sha.hex()))
+
+    # Extensions follow the entries; a split index keeps most entries elsewhere
+    while pos + 8 <= len(data) - 20:
+        sig, length = struct.unpack_from(">4sL", data, pos)
+        if sig == b"link":
+            raise UnsupportedIndex("split index")
+        pos += 8 + length
+    return entries
+
+
+def read_index(repo_path):
+    """Tracked entries of repo_path from .git/index; None if it is not a readable git index."""
+    git_dir = resolve_git_dir(repo_path)
+    if git_dir is None:
+        return None
+    try:
+        with open(os.path.join(git_dir, "index"), "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    try:
+        return parse_index(data)
+    except (UnsupportedIndex, struct.error, ValueError, IndexError):
+        return None
+
+
+def ls_files(repo_path):
+    """Tracked paths from `git ls-files -z`, or None if git is unavailable or this is not a repo."""
+    try:
+        out = subprocess.run(["git", "-C", os.fspath(repo_path), "ls-files", "-z"],
+                             capture_output=True, check=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return [os.fsdecode(p) for p in out.split(b"\0") if p]
+
+
+def tracked_files(repo_path):
+    """
+    IndexEntry list for every tracked file: parsed from the index when
+    possible, else from `git ls-files` (size/mtime/blob unknown). None for
+    directories that are not git working trees.
+    """
+    entries = read_index(repo_path)
+    if entries is not None:
+        return entries
+    if resolve_git_dir(repo_path) is None:
+        return None
+    paths = ls_files(repo_path)
+    if paths is None:
+        return None
+    return [IndexEntry(p, None, None, None, None) for p in paths]
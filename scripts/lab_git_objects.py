@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Read a repository's files at any commit straight from git object storage.
+
+GitTree lists the tree of a ref once with `git ls-tree -r -l -z` and reads
+blobs on demand through a single long-lived `git cat-file --batch` process,
+so bare mirrors (and historical commits of ordinary clones) can be scored
+without a checkout. Blobs over max_bytes are left out of the listing and
+binary blobs come back empty, as with ContentCache.
+
+GitTree is a ContentCache whose loader reads blobs instead of files, so the
+rule engine, the secret scanner and the README checks use it unchanged:
+paths are os.path.join(root, rel_path) for whatever root the caller passes.
+"""
+
+import os
+import subprocess
+import threading
+from collections import namedtuple
+from pathlib import Path
+
+from lab_content_cache import DEFAULT_BUDGET, CachedText, ContentCache
+from lab_manifest import FileEntry
+from lab_secret_scan import SNIFF_SIZE, is_binary
+
+MAX_BLOB_BYTES = 4 * 1024 * 1024   # larger blobs are skipped
+
+TreeEntry = namedtuple("TreeEntry", ["mode", "oid", "size", "rel_path"])
+
+
+class GitError(Exception):
+    pass
+
+
+def is_bare_repo(path):
+    """True for a bare repository directory (HEAD, objects/ and refs/ at the top, no work tree)."""
+    return (os.path.isfile(os.path.join(path, "HEAD"))
+            and os.path.isdir(os.path.join(path, "objects"))
+            and os.path.isdir(os.path.join(path, "refs")))
+
+
+def git_output(git_dir, *args):
+    try:
+        return subprocess.run(["git", f"--git-dir={git_dir}", *args], capture_output=True, check=True).stdout
+    except FileNotFoundError:
+        raise GitError("git is not installed")
+    except subprocess.CalledProcessError as e:
+        raise GitError(e.stderr.decode("utf-8", "replace").strip())
+
+
+def resolve_ref(git_dir, ref="HEAD"):
+    """Commit id that ref points to."""
+    return git_output(git_dir, "rev-parse", "--verify", "--quiet", f"{ref}^{{commit}}").decode().strip()
+
+
+def list_tree(git_dir, commit):
+    """TreeEntry for every regular file blob in commit (no submodules or symlinks)."""
+    entries = []
+    for record in git_output(git_dir, "ls-tree", "-r", "-l", "-z", "--full-tree", commit).split(b"\0"):
+        if not record:
+            continue
+        meta, path = record.split(b"\t", 1)
+        mode, kind, oid, size = meta.split()
+        if kind != b"blob" or mode == b"120000":
+            continue
+        entries.append(TreeEntry(mode.decode(), oid.decode(), int(size), os.fsdecode(path)))
+    return entries
+
+
+class CatFile:
+    """One `git cat-file --batch` process serving blob reads; safe to share between threads."""
+
+    def __init__(self, git_dir):
+        try:
+            self._proc = subprocess.Popen(["git", f"--git-dir={git_dir}", "cat-file", "--batch"],
+                                          stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        except FileNotFoundError:
+            raise GitError("git is not installed")
+        self._lock = threading.Lock()
+
+    def read(self, oid):
+        """Raw contents of object oid, or None if it does not exist."""
+        with self._lock:
+            self._proc.stdin.write(oid.encode() + b"\n")
+            self._proc.stdin.flush()
+            header = self._proc.stdout.readline().split()
+            if len(header) != 3:
+                if not header:
+                    raise GitError("git cat-file exited")
+                return None  # "<oid> missing"
+            size = int(header[2])
+            data = self._proc.stdout.read(size)
+            self._proc.stdout.read(1)  # trailing newline
+            return data
+
+    def close(self):
+        if self._proc.poll() is None:
+            self._proc.stdin.close()
+            self._proc.wait()
+        self._proc.stdout.close()
+
+
+class GitTree(ContentCache):
+    def __init__(self, git_dir, ref="HEAD", root=None, budget=DEFAULT_BUDGET, max_blob_bytes=MAX_BLOB_BYTES):
+        super().__init__(budget)
+        self.git_dir = os.fspath(git_dir)
+        self.root = str(Path(root if root is not None else self.git_dir))
+        self.commit = resolve_ref(self.git_dir, ref)
+        if not self.commit:
+            raise GitError(f"unknown ref: {ref}")
+        self.skipped = {"too_large": 0}
+        self._blobs = {}
+        for entry in list_tree(self.git_dir, self.commit):
+            if entry.size > max_blob_bytes:
+                self.skipped["too_large"] += 1
+                continue
+            self._blobs[os.path.join(self.root, *entry.rel_path.split("/"))] = entry
+        self._cat = CatFile(self.git_dir)
+
+    def manifest(self, ignore_names=(), skip_hidden=False):
+        """FileEntry list in tree order; stat and mtime are None, blob is the object id."""
+        ignore_names = set(ignore_names)
+        files = []
+        for path, entry in self._blobs.items():
+            parts = entry.rel_path.split("/")
+            if any(p in ignore_names for p in parts[:-1]):
+                continue
+            if skip_hidden and any(p.startswith(".") for p in parts):
+                continue
+            files.append(FileEntry(path, entry.rel_path, parts[-1], os.path.splitext(parts[-1])[1],
+                                   entry.size, None, None, entry.oid))
+        return files
+
+    def exists(self, path):
+        return str(path) in self._blobs
+
+    def head(self, path, size):
+        entry = self._blobs.get(str(path))
+        data = self._cat.read(entry.oid) if entry is not None else None
+        return (data or b"")[:size]
+
+    def _load(self, path):
+        entry = self._blobs.get(path)
+        data = self._cat.read(entry.oid) if entry is not None else None
+        if data is None:
+            return CachedText("", 0, True)
+        if is_binary(data[:SNIFF_SIZE]):
+            return CachedText("", len(data[:SNIFF_SIZE]), True)
+        return CachedText(data.decode("utf-8", "ignore"), len(data), False)
+
+    def close(self):
+        self._cat.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
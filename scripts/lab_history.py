@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Scan history for the portfolio scanner, in SQLite.
+
+Every scanner run with --history adds one row to `runs` (date, location,
+repo count, fleet average), plus one row per repo to `results` (type and
+every score), `suggestions` and `file_counts`. Each run is written in a
+single transaction. `results` is keyed by (repo, run_id), so the trend of one
+repo is an index range scan, and the fleet average is stored on the run row.
+Dashboards can therefore query years of history in milliseconds instead of
+re-parsing archived JSON reports. Old reports can be backfilled with `import`.
+
+Usage:
+    python lab_history.py trend REPO [--limit N]
+    python lab_history.py regressions [--threshold POINTS]
+    python lab_history.py fleet [--limit N]
+    python lab_history.py runs [--limit N]
+    python lab_history.py import cloud_portfolio_report*.json
+    (all accept --db PATH and --json)
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+
+# --------------- CONFIGURATION ---------------
+
+HISTORY_PATH = os.path.join(os.getcwd(), "cloud_portfolio_history.db")
+
+# report key -> results column
+SCORE_COLUMNS = {
+    "README Score": "readme_score",
+    "Cloud (Cert) Score": "cloud_score",
+    "Job Alignment Score": "job_score",
+    "Documentation Score": "doc_score",
+    "TOTAL SCORE": "total_score",
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    scan_date TEXT NOT NULL,
+    scan_location TEXT,
+    repos_scanned INTEGER,
+    repos_skipped INTEGER,
+    repo_count INTEGER NOT NULL,
+    average_score REAL
+);
+-- also keeps a report from being imported twice
+CREATE UNIQUE INDEX IF NOT EXISTS runs_scan ON runs (scan_date, scan_location);
+CREATE TABLE IF NOT EXISTS results (
+    repo TEXT NOT NULL,
+    run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    type TEXT,
+    readme_score REAL,
+    cloud_score REAL,
+    job_score REAL,
+    doc_score REAL,
+    total_score REAL,
+    readme_words INTEGER,
+    PRIMARY KEY (repo, run_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS results_run ON results (run_id);
+CREATE TABLE IF NOT EXISTS suggestions (
+    run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    repo TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    PRIMARY KEY (run_id, repo, position)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS file_counts (
+    run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    repo TEXT NOT NULL,
+    file_type TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (run_id, repo, file_type)
+) WITHOUT ROWID;
+"""
+
+# --------------- STORE ---------------
+
+
+class HistoryStore:
+    """Scan runs and their per-repo results in one SQLite file."""
+
+    def __init__(self, path=HISTORY_PATH):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.row_factory = sqlite3.Row
+        # WAL lets a dashboard read while a scan is being recorded
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("PRAGMA foreign_keys=ON")
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def record_run(self, header, results):
+        """
+        Store one scan: header is the report without its results, results an
+        iterable of (repo, result dict), e.g. a report's results.items() or
+        lab_report_stream.read_records(). Returns the new run id.
+        """
+        rows, suggestions, file_counts = [], [], []
+        for repo, result in results:
+            rows.append((repo, result.get("Type"), *(result.get(key) for key in SCORE_COLUMNS),
+                         (result.get("README Stats") or {}).get("words")))
+            suggestions.extend((repo, i, text) for i, text in enumerate(result.get("Suggestions") or ()))
+            file_counts.extend((repo, ftype, count) for ftype, count in (result.get("File Counts") or {}).items())
+        totals = [row[6] for row in rows if row[6] is not None]
+        average = round(sum(totals) / len(totals), 1) if totals else None
+
+        with self.db:  # one transaction: a run is stored completely or not at all
+            run_id = self.db.execute(
+                "INSERT INTO runs (scan_date, scan_location, repos_scanned, repos_skipped, repo_count, average_score)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (header.get("scan_date"), header.get("scan_location"), header.get("repos_scanned"),
+                 header.get("repos_skipped"), len(rows), average)).lastrowid
+            self.db.executemany(
+                "INSERT INTO results (repo, run_id, type, readme_score, cloud_score, job_score, doc_score,"
+                " total_score, readme_words) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(row[0], run_id, *row[1:]) for row in rows])
+            self.db.executemany("INSERT INTO suggestions (run_id, repo, position, text) VALUES (?, ?, ?, ?)",
+                                [(run_id, *s) for s in suggestions])
+            self.db.executemany("INSERT INTO file_counts (run_id, repo, file_type, count) VALUES (?, ?, ?, ?)",
+                                [(run_id, *c) for c in file_counts])
+        return run_id
+
+    def record_report(self, report):
+        """Store a full JSON report (header plus results) as a run; returns the run id, None if already stored."""
+        header = {k: v for k, v in report.items() if k != "results"}
+        try:
+            return self.record_run(header, report.get("results", {}).items())
+        except sqlite3.IntegrityError:
+            return None
+
+    # ---- queries ----
+
+    def runs(self, limit=20):
+        """Most recent runs first."""
+        return self.db.execute("SELECT * FROM runs ORDER BY scan_date DESC, id DESC LIMIT ?", (limit,)).fetchall()
+
+    def trend(self, repo, limit=20):
+        """Scores of one repo in its most recent runs, oldest first."""
+        rows = self.db.execute(
+            "SELECT r.id AS run_id, r.scan_date, s.type, s.readme_score, s.cloud_score, s.job_score,"
+            " s.doc_score, s.total_score FROM results s JOIN runs r ON r.id = s.run_id"
+            " WHERE s.repo = ? ORDER BY r.scan_date DESC, r.id DESC LIMIT ?", (repo, limit)).fetchall()
+        return rows[::-1]
+
+    def regressions(self, threshold=0.0):
+        """Repos whose total score dropped by more than threshold points between the last two runs."""
+        last = [row["id"] for row in self.db.execute("SELECT id FROM runs ORDER BY scan_date DESC, id DESC LIMIT 2")]
+        if len(last) < 2:
+            return []
+        return self.db.execute(
+            "SELECT cur.repo, prev.total_score AS previous, cur.total_score AS current,"
+            " ROUND(cur.total_score - prev.total_score, 1) AS delta"
+            " FROM results cur JOIN results prev ON prev.repo = cur.repo AND prev.run_id = ?"
+            " WHERE cur.run_id = ? AND cur.total_score < prev.total_score - ?"
+            " ORDER BY delta, cur.repo", (last[1], last[0], threshold)).fetchall()
+
+    def fleet(self, limit=50):
+        """Fleet average score per run, oldest first."""
+        rows = self.db.execute("SELECT id AS run_id, scan_date, repo_count, average_score FROM runs"
+                               " ORDER BY scan_date DESC, id DESC LIMIT ?", (limit,)).fetchall()
+        return rows[::-1]
+
+    def suggestions(self, run_id, repo):
+        return [row["text"] for row in self.db.execute(
+            "SELECT text FROM suggestions WHERE run_id = ? AND repo = ? ORDER BY position", (run_id, repo))]
+
+    def file_counts(self, run_id, repo):
+        return {row["file_type"]: row["count"] for row in self.db.execute(
+            "SELECT file_type, count FROM file_counts WHERE run_id = ? AND repo = ?", (run_id, repo))}
+
+
+# --------------- OUTPUT ---------------
+
+
+def print_rows(rows, as_json=False):
+    rows = [dict(row) for row in rows]
+    if as_json:
+        print(json.dumps(rows, indent=2))
+        return
+    if not rows:
+        print("(no rows)")
+        return
+    columns = list(rows[0])
+    widths = {c: max(len(c), *(len(str(row[c])) for row in rows)) for c in columns}
+    print("  ".join(c.ljust(widths[c]) for c in columns).rstrip())
+    print("  ".join("-" * widths[c] for c in columns))
+    for row in rows:
+        print("  ".join(str(row[c]).ljust(widths[c]) for c in columns).rstrip())
+
+
+# --------------- MAIN ---------------
+
+
+def parse_args(argv=None):
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--db", default=HISTORY_PATH, help="History database (default: ./cloud_portfolio_history.db).")
+    common.add_argument("--json", action="store_true", help="Print rows as JSON.")
+
+    parser = argparse.ArgumentParser(description="Query the portfolio scanner's score history.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    trend = sub.add_parser("trend", parents=[common], help="Scores of one repo over its recent runs.")
+    trend.add_argument("repo")
+    trend.add_argument("--limit", type=int, default=20)
+    regressions = sub.add_parser("regressions", parents=[common],
+                                 help="Repos whose total score dropped since the previous run.")
+    regressions.add_argument("--threshold", type=float, default=0.0,
+                             help="Only report drops of more than this many points.")
+    fleet = sub.add_parser("fleet", parents=[common], help="Fleet average score per run.")
+    fleet.add_argument("--limit", type=int, default=50)
+    runs = sub.add_parser("runs", parents=[common], help="Recent scan runs.")
+    runs.add_argument("--limit", type=int, default=20)
+    imports = sub.add_parser("import", parents=[common], help="Backfill archived JSON reports.")
+    imports.add_argument("reports", nargs="+")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.command != "import" and not os.path.exists(args.db):
+        print(f"No scan history at {args.db}; run the scanner with --history first.", file=sys.stderr)
+        return 1
+    with HistoryStore(args.db) as store:
+        if args.command == "import":
+            reports = []
+            for path in args.reports:
+                with open(path, "r", encoding="utf-8") as f:
+                    reports.append((path, json.load(f)))
+            # Oldest first, so run ids follow scan order
+            for path, report in sorted(reports, key=lambda r: r[1].get("scan_date") or ""):
+                run_id = store.record_report(report)
+                print(f"{path}: " + (f"run {run_id}" if run_id else "already recorded"))
+        elif args.command == "trend":
+            print_rows(store.trend(args.repo, args.limit), args.json)
+        elif args.command == "regressions":
+            print_rows(store.regressions(args.threshold), args.json)
+        elif args.command == "fleet":
+            print_rows(store.fleet(args.limit), args.json)
+        elif args.command == "runs":
+            print_rows(store.runs(args.limit), args.json)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Import-time budget for the `lab` CLI.
+
+Runs each command in BUDGETS (`python -X importtime lab.py <command> --help`)
+in a fresh interpreter. It sums the self time of every module imported beyond
+what a bare `python -c pass` already imports. A command fails when the best
+of --repeat runs is over its budget, or when it imports any module in
+HEAVY_MODULES: those belong inside the code paths that need them, not at
+module level. tests/test_import_budget.py runs the module half of the check
+under pytest (which modules get imported is deterministic, timings on a
+loaded runner are not); the millisecond budget is enforced by this script.
+
+Usage:
+    python lab_import_budget.py
+    python lab_import_budget.py --repeat 5 --scale 2.0
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+# --------------- CONFIGURATION ---------------
+
+# command line after `lab.py` -> budget in ms of imports beyond interpreter startup
+BUDGETS = {
+    ("--help",): 5,
+    ("incident", "--help"): 5,
+    ("check-links", "--help"): 30,
+    ("check-local-links", "--help"): 80,
+    ("assets", "--help"): 80,
+    ("history", "--help"): 30,
+    ("references", "--help"): 80,
+    ("entrycheck", "--help"): 80,
+    ("scan", "--help"): 80,
+    ("validate", "--help"): 80,
+    ("audit", "--help"): 80,
+}
+
+# Never imported just to parse arguments
+HEAVY_MODULES = {
+    "asyncio", "aiohttp", "requests", "prettytable", "boto3", "botocore",
+    "multiprocessing", "concurrent.futures.process",
+}
+
+LAB = os.path.join(os.path.dirname(os.path.abspath(__file__)), "lab.py")
+
+# --------------- MEASUREMENT ---------------
+
+
+def import_times(args):
+    """{module: self time in us} from `python -X importtime args`."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", *args], capture_output=True, text=True,
+                          cwd=os.path.dirname(LAB))
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # the header line
+        times[fields[2].strip()] = int(fields[0])
+    return times
+
+
+def measure(command, baseline, repeat=3):
+    """(best ms over repeat runs, modules imported beyond startup) for one lab command."""
+    best, modules = None, set()
+    for _ in range(repeat):
+        extra = {m: us for m, us in import_times([LAB, *command]).items() if m not in baseline}
+        modules.update(extra)
+        ms = sum(extra.values()) / 1000
+        best = ms if best is None else min(best, ms)
+    return best, modules
+
+
+def heavy_imports(modules):
+    """Modules in HEAVY_MODULES (or below them) among modules."""
+    return sorted({h for m in modules for h in HEAVY_MODULES if m == h or m.startswith(h + ".")})
+
+
+def imported_modules(command, baseline=None):
+    """Modules one lab command imports beyond interpreter startup."""
+    if baseline is None:
+        baseline = set(import_times(["-c", "pass"]))
+    return set(import_times([LAB, *command])) - set(baseline)
+
+
+def check(repeat=3, scale=1.0):
+    """List of failure messages; empty when every command is within budget."""
+    baseline = set(import_times(["-c", "pass"]))
+    failures = []
+    for command, budget in BUDGETS.items():
+        ms, modules = measure(command, baseline, repeat)
+        heavy = heavy_imports(modules)
+        limit = budget * scale
+        status = "OK" if ms <= limit and not heavy else "OVER"
+        label = "lab " + " ".join(command)
+        print(f"[{status}] {label:<30} {ms:>7.1f} ms (budget {limit:.0f} ms, {len(modules)} modules)")
+        if ms > limit:
+            failures.append(f"{label}: {ms:.1f} ms > {limit:.0f} ms")
+        if heavy:
+            failures.append(f"{label}: imports {', '.join(heavy)}")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check the lab CLI's import time against its budget.")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per command; the fastest counts.")
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help="Multiply every budget, e.g. 2.0 on slow CI runners.")
+    args = parser.parse_args(argv)
+    failures = check(args.repeat, args.scale)
+    if failures:
+        print(f"\n{len(failures)} import budget violation(s):")
+        for line in failures:
+            print(f"  - {line}")
+        return 1
+    print("\nAll commands within their import budget.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Shared multi-keyword matcher.
+
+Counts every keyword of one or more named keyword sets in one call and
+returns unique hits and total mentions per set. Keywords shared by several
+sets are counted once, and the text is lower-cased once.
+
+- Substring mode (default) keeps the old `kw in text` / `text.count(kw)`
+  semantics with a single C-level count per unique keyword. In CPython
+  that beats one big regex alternation, which has to step through every
+  character in the regex engine.
+- word_boundary=True compiles all keywords into one alternation (longest
+  first) and only matches keywords not glued to other letters or digits
+  ("s3" matches "s3://bucket" but not "as3x").
+
+Run this file directly for a micro-benchmark against the naive
+`kw in text` / `text.count(kw)` approach.
+"""
+
+import re
+from collections import Counter
+
+
+class KeywordMatcher:
+    def __init__(self, keyword_sets, word_boundary=False):
+        self.keyword_sets = {name: {kw.lower() for kw in kws} for name, kws in keyword_sets.items()}
+        self.word_boundary = word_boundary
+        union = set().union(*self.keyword_sets.values()) if self.keyword_sets else set()
+        self._union = sorted(union)
+        self._pattern = None
+        if word_boundary and union:
+            alternation = "|".join(re.escape(kw) for kw in sorted(union, key=lambda k: (-len(k), k)))
+            self._pattern = re.compile(rf"(?<![a-z0-9])(?:{alternation})(?![a-z0-9])", re.IGNORECASE)
+
+    def count(self, text):
+        """Counter of keyword -> mentions."""
+        if not text or not self._union:
+            return Counter()
+        if self._pattern is not None:
+            return Counter(m.lower() for m in self._pattern.findall(text))
+        text_lower = text.lower()
+        return Counter({kw: n for kw in self._union if (n := text_lower.count(kw))})
+
+    def scan(self, text):
+        """{set name: (unique keywords hit, total mentions)} for every set in one call."""
+        counts = self.count(text)
+        results = {}
+        for name, kws in self.keyword_sets.items():
+            hits = [kw for kw in kws if counts.get(kw)]
+            results[name] = (len(hits), sum(counts[kw] for kw in hits))
+        return results
+
+
+# =============================
+# MICRO-BENCHMARK
+# =============================
+def _naive_scan(text, keyword_sets):
+    text_lower = text.lower()
+    results = {}
+    for name, kws in keyword_sets.items():
+        hits = sum(1 for kw in kws if kw in text_lower)
+        total = sum(text_lower.count(kw) for kw in kws)
+        results[name] = (hits, total)
+    return results
+
+
+def main():
+    import random
+    import timeit
+
+    from lab_cloud_portfolio_scanner_v3 import AWS_KEYWORDS, JOB_KEYWORDS
+
+    sets = {"cloud": AWS_KEYWORDS, "job": JOB_KEYWORDS}
+    rng = random.Random(42)
+    vocab = sorted(AWS_KEYWORDS | JOB_KEYWORDS) + ["the", "instance", "deploy", "runbook", "bucket", "##", "\n"] * 20
+    matcher = KeywordMatcher(sets)
+
+    bounded = KeywordMatcher(sets, word_boundary=True)
+
+    print(f"{'README size':>12} {'naive (ms)':>12} {'matcher (ms)':>13} {'speedup':>8} {'word-boundary (ms)':>19}")
+    for words in (1_000, 10_000, 100_000):
+        text = " ".join(rng.choice(vocab) for _ in range(words))
+        assert matcher.scan(text) == _naive_scan(text, sets)
+        naive = min(timeit.repeat(lambda: _naive_scan(text, sets), number=5, repeat=3)) / 5
+        fast = min(timeit.repeat(lambda: matcher.scan(text), number=5, repeat=3)) / 5
+        words_only = min(timeit.repeat(lambda: bounded.scan(text), number=5, repeat=3)) / 5
+        print(f"{len(text):>12,} {naive * 1000:>12.2f} {fast * 1000:>13.2f} {naive / fast:>7.1f}x "
+              f"{words_only * 1000:>19.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+"""
+Offset -> (line, column) lookup for a block of text.
+
+Newline offsets are computed once per text; every lookup is then a bisect,
+so mapping thousands of regex hits back to lines costs O(log n) each instead
+of re-counting newlines from the start of the file.
+"""
+
+from bisect import bisect_right
+from itertools import accumulate
+
+
+class LineIndex:
+    def __init__(self, text: str):
+        # starts[i] is the offset of the first character of line i + 1
+        self.starts = [0]
+        self.starts.extend(accumulate(len(line) + 1 for line in text.split("\n")[:-1]))
+
+    def line(self, offset: int) -> int:
+        """1-based line number containing offset."""
+        return bisect_right(self.starts, offset)
+
+    def locate(self, offset: int):
+        """(line, column), both 1-based, for offset."""
+        line = bisect_right(self.starts, offset)
+        return line, offset - self.starts[line - 1] + 1
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Concurrent external link checker.
+
+Checks many URLs at once with asyncio + aiohttp:
+- a global cap on in-flight requests,
+- a token bucket per host instead of a global sleep, so slow or strict hosts
+  are throttled without holding up everything else (a request waits for its
+  host's token before it takes one of the global slots),
+- one keep-alive connection pool shared by all requests,
+- HEAD first, falling back to GET when HEAD fails or is refused,
+- an optional persistent LinkCache: URLs checked within their TTL are skipped,
+  expired ones are revalidated with If-None-Match / If-Modified-Since.
+
+Usage:
+    python lab_link_checker.py URL [URL ...]
+"""
+
+import json
+import time
+from typing import Callable, Dict, Iterable, Optional
+from urllib.parse import urlsplit
+
+from lab_autofix import atomic_write_text
+
+# --------------- CONFIGURATION ---------------
+
+MAX_CONCURRENCY = 20   # requests in flight across all hosts
+HOST_RATE = 5.0        # sustained requests per second per host
+HOST_BURST = 2         # requests a host may receive back-to-back
+TIMEOUT = 5            # seconds per request
+USER_AGENT = "lab-link-checker/1.0"
+OK_TTL = 7 * 24 * 3600      # seconds before a working link is re-checked
+BROKEN_TTL = 24 * 3600      # seconds before a broken link is re-checked
+
+# --------------- RATE LIMITING ---------------
+
+
+class TokenBucket:
+    """Simple token bucket; acquire() waits until a token is available."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+
+    async def acquire(self):
+        import asyncio
+
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+# --------------- CACHE ---------------
+
+
+def is_broken(status: Optional[int]) -> bool:
+    return status is None or status >= 400
+
+
+class LinkCache:
+    """
+    Persistent {url: {"status", "etag", "last_modified", "checked_at"}} store.
+    Working and broken results expire after separate TTLs.
+    """
+
+    def __init__(self, path, ok_ttl=OK_TTL, broken_ttl=BROKEN_TTL):
+        self.path = str(path)
+        self.ok_ttl = ok_ttl
+        self.broken_ttl = broken_ttl
+        self.stats = {"fresh": 0, "revalidated": 0, "fetched": 0}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def get(self, url: str) -> Optional[dict]:
+        return self.entries.get(url)
+
+    def is_fresh(self, url: str, now: Optional[float] = None) -> bool:
+        entry = self.entries.get(url)
+        if entry is None:
+            return False
+        ttl = self.broken_ttl if is_broken(entry["status"]) else self.ok_ttl
+        return (now or time.time()) - entry["checked_at"] < ttl
+
+    def validators(self, url: str) -> Dict[str, str]:
+        """Conditional request headers for a previously working url."""
+        entry = self.entries.get(url)
+        if entry is None or is_broken(entry["status"]):
+            return {}
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def record(self, url: str, status: Optional[int], etag=None, last_modified=None):
+        self.entries[url] = {
+            "status": status,
+            "etag": etag,
+            "last_modified": last_modified,
+            "checked_at": time.time(),
+        }
+
+    def save(self):
+        try:
+            atomic_write_text(self.path, json.dumps(self.entries, indent=1, sort_keys=True))
+        except OSError:
+            pass
+
+
+# --------------- CHECKER ---------------
+
+
+class LinkChecker:
+    def __init__(self, concurrency=MAX_CONCURRENCY, host_rate=HOST_RATE, host_burst=HOST_BURST, timeout=TIMEOUT,
+                 cache: Optional[LinkCache] = None, refresh=False, profiler=None):
+        self.concurrency = concurrency
+        self.host_rate = host_rate
+        self.host_burst = host_burst
+        self.timeout = timeout
+        self.cache = cache
+        self.refresh = refresh  # ignore TTLs and revalidate every cached url
+        self.profiler = profiler  # optional lab_profiling profiler; counts http_requests
+        self._buckets = {}
+        self._slots = None  # global in-flight cap, created on the running loop
+
+    def _bucket(self, url: str) -> TokenBucket:
+        host = urlsplit(url).netloc.lower()
+        if host not in self._buckets:
+            self._buckets[host] = TokenBucket(self.host_rate, self.host_burst)
+        return self._buckets[host]
+
+    async def _request(self, session, method: str, url: str, headers: Dict[str, str]):
+        import asyncio
+
+        import aiohttp
+
+        # Pace on the host first: a request sleeping on a busy host's bucket
+        # must not hold a global slot that other hosts could use.
+        await self._bucket(url).acquire()
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.concurrency)
+        async with self._slots:
+            if self.profiler is not None:
+                self.profiler.count("http_requests")
+            try:
+                async with session.request(method, url, headers=headers, allow_redirects=True) as response:
+                    return response.status, response.headers.get("ETag"), response.headers.get("Last-Modified")
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+                return None, None, None
+
+    async def check_url(self, session, url: str) -> Optional[int]:
+        """Status code for url, or None if it could not be fetched."""
+        cache = self.cache
+        if cache is not None and not self.refresh and cache.is_fresh(url):
+            cache.stats["fresh"] += 1
+            return cache.get(url)["status"]
+
+        headers = cache.validators(url) if cache is not None else {}
+        status, etag, last_modified = await self._request(session, "HEAD", url, headers)
+        if is_broken(status):
+            # Plenty of servers reject or mishandle HEAD; confirm with a real GET.
+            status, etag, last_modified = await self._request(session, "GET", url, headers)
+
+        if cache is not None:
+            if status == 304 and headers:
+                # Unchanged since the last successful check: keep the old status and validators
+                cached = cache.get(url)
+                status = cached["status"]
+                etag = etag or cached.get("etag")
+                last_modified = last_modified or cached.get("last_modified")
+                cache.stats["revalidated"] += 1
+            else:
+                cache.stats["fetched"] += 1
+            cache.record(url, status, etag, last_modified)
+        return status
+
+    async def check_all(self, urls: Iterable[str], on_result: Optional[Callable] = None) -> Dict[str, Optional[int]]:
+        import asyncio
+
+        import aiohttp
+
+        urls = list(dict.fromkeys(urls))
+        results = {}
+        self._slots = asyncio.Semaphore(self.concurrency)
+        connector = aiohttp.TCPConnector(limit=self.concurrency)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout,
+                                         headers={"User-Agent": USER_AGENT}) as session:
+            async def run(url):
+                status = await self.check_url(session, url)
+                results[url] = status
+                if on_result is not None:
+                    on_result(url, status)
+
+            await asyncio.gather(*(run(url) for url in urls))
+        return results
+
+
+def check_links(urls: Iterable[str], on_result: Optional[Callable] = None, **kwargs) -> Dict[str, Optional[int]]:
+    """
+    Check every URL and return {url: status}. status is None on connection
+    errors or timeouts. on_result(url, status) is called as each check completes.
+    """
+    import asyncio
+
+    return asyncio.run(LinkChecker(**kwargs).check_all(urls, on_result))
+
+
+# --------------- MAIN ---------------
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Check external URLs concurrently.")
+    parser.add_argument("urls", nargs="+", metavar="URL")
+    args = parser.parse_args(argv)
+    for url, status in sorted(check_links(args.urls).items()):
+        label = "BROKEN" if status is None or status >= 400 else "OK"
+        print(f"[{label}] {url} (status={status})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Offline check of relative links, images and #anchors in markdown.
+
+The repo's file list (git index or a walk, see lab_manifest) becomes a set of
+paths and directories. Each markdown file is tokenized once with
+index_markdown, and every relative link or image target is resolved against
+that set, the way GitHub renders it: relative to the file, or to the repo
+root for targets starting with "/", with %20-style escapes decoded.
+Fragments are looked up in the heading slugs of the target file, which is
+indexed on first use. External URLs are left to the HTTP link check. No
+network and no stat calls are needed, so thousands of references are
+checked per second.
+
+Usage:
+    python lab_local_links.py [REPO ...] [--enumerate git|walk|auto] [--json]
+"""
+
+import argparse
+import json
+import posixpath
+import re
+import sys
+import time
+from collections import namedtuple
+from pathlib import Path
+from urllib.parse import unquote
+
+from lab_manifest import BACKENDS, build_manifest
+from lab_markdown_index import index_markdown
+
+BrokenRef = namedtuple("BrokenRef", ["file", "line", "kind", "target", "reason"])
+
+_SCHEME_RE = re.compile(r"^[A-Za-z][A-Za-z0-9+.-]*:")
+_TITLE_RE = re.compile(r"""\s+(?:"[^"]*"|'[^']*')$""")
+
+
+def _read(path):
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    try:
+        return data.decode("utf-8")
+    except UnicodeDecodeError:
+        return data.decode("latin-1")
+
+
+def split_target(raw):
+    """(path, fragment) of a markdown link target, decoded; None for external URLs."""
+    target = raw.strip()
+    if target.startswith("<") and ">" in target:
+        target = target[1:target.index(">")]
+    else:
+        target = _TITLE_RE.sub("", target)   # drop a "title"; raw spaces stay in the path
+    if not target or target.startswith("//") or _SCHEME_RE.match(target):
+        return None
+    path, _, fragment = target.partition("#")
+    return unquote(path.partition("?")[0]), unquote(fragment)
+
+
+class LocalLinks:
+    """Path set and heading slugs of one repo; check() validates the references of one markdown file."""
+
+    def __init__(self, rel_paths, read):
+        self.files = set(rel_paths)
+        self.dirs = {""}
+        for rel in self.files:
+            parent = posixpath.dirname(rel)
+            while parent not in self.dirs:
+                self.dirs.add(parent)
+                parent = posixpath.dirname(parent)
+        self._lower = {}   # case-folded path -> path, for "case differs" hints
+        self.read = read   # rel_path -> text or None
+        self._slugs = {}
+        self.checked = 0
+
+    def slugs(self, rel_path, index=None):
+        """Heading anchors of a markdown file."""
+        if rel_path not in self._slugs:
+            if index is None:
+                index = index_markdown(self.read(rel_path) or "")
+            self._slugs[rel_path] = {h.slug for h in index.headings}
+        return self._slugs[rel_path]
+
+    def _case_hint(self, rel_path):
+        if not self._lower:
+            self._lower = {p.lower(): p for p in self.files | self.dirs}
+        other = self._lower.get(rel_path.lower())
+        return f" (case differs: {other})" if other else ""
+
+    def check(self, rel_path, text):
+        """BrokenRef for every relative link or image in one markdown file that does not resolve."""
+        index = index_markdown(text)
+        self.slugs(rel_path, index)
+        broken = []
+        refs = [("link", link.url, link.line) for link in index.links]
+        refs += [("image", image.url, image.line) for image in index.images]
+        for kind, raw, line in refs:
+            split = split_target(raw)
+            if split is None:
+                continue
+            self.checked += 1
+            path, fragment = split
+            reason = self._resolve(rel_path, kind, path, fragment)
+            if reason:
+                broken.append(BrokenRef(rel_path, line, kind, raw, reason))
+        return sorted(broken, key=lambda b: b.line)
+
+    def _resolve(self, rel_path, kind, path, fragment):
+        """None if the target exists, else why not."""
+        if not path:
+            target = rel_path   # "#anchor" within the same file
+        else:
+            base = "" if path.startswith("/") else posixpath.dirname(rel_path)
+            target = posixpath.normpath(posixpath.join(base, path.lstrip("/")))
+            if target == ".":
+                target = ""
+            if target == ".." or target.startswith("../"):
+                return "points outside the repository"
+            if target not in self.files:
+                if target in self.dirs:
+                    return "image points to a directory" if kind == "image" else None
+                return "missing file" + self._case_hint(target)
+        if fragment and target.lower().endswith(".md") and fragment.lower() not in self.slugs(target):
+            return f"no heading for #{fragment}"
+        return None
+
+
+def check_repo(repo_path, manifest=None, backend="auto", read=None):
+    """(broken references, references checked) for every markdown file of one repo."""
+    repo_path = Path(repo_path)
+    if manifest is None:
+        manifest = build_manifest(repo_path, backend=backend)
+    if read is None:
+        def read(rel_path):
+            return _read(repo_path / rel_path)
+    links = LocalLinks([e.rel_path for e in manifest], read)
+    broken = []
+    for e in manifest:
+        if e.name.lower().endswith(".md"):
+            broken.extend(links.check(e.rel_path, read(e.rel_path) or ""))
+    return broken, links.checked
+
+
+# --------------- MAIN ---------------
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check relative links, images and anchors in markdown, offline.")
+    parser.add_argument("repos", nargs="*", default=["."], help="Repos to check (default: current directory).")
+    parser.add_argument("--enumerate", choices=BACKENDS, default="auto",
+                        help="File listing: 'git' index (tracked files only), filesystem 'walk', "
+                             "or 'auto' (git where available; default).")
+    parser.add_argument("--json", action="store_true", help="Print broken references as JSON.")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    all_broken, checked = [], 0
+    for repo in args.repos:
+        broken, count = check_repo(repo, backend=args.enumerate)
+        checked += count
+        all_broken.extend(dict(b._asdict(), file=str(Path(repo) / b.file)) for b in broken)
+    elapsed = time.perf_counter() - start
+
+    if args.json:
+        print(json.dumps(all_broken, indent=2))
+    else:
+        for b in all_broken:
+            print(f"[BROKEN] {b['file']}:{b['line']} {b['kind']} {b['target']} - {b['reason']}")
+        rate = checked / elapsed if elapsed else 0
+        print(f"\n{checked} relative reference(s) checked in {elapsed * 1000:.1f} ms "
+              f"({rate:,.0f}/s), {len(all_broken)} broken.")
+    return 1 if all_broken else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+File manifest for repo scanners.
+
+Walks a repository once with os.scandir and records every file with its
+suffix, size and mtime so the scoring passes can share one traversal
+instead of each calling os.walk (and os.path.getsize) on their own.
+
+With backend="git" (or "auto" inside a git working tree) the file list
+comes from the git index instead, so untracked and .gitignored files are
+never visited. Entries whose stat still matches the index carry the blob
+id git recorded, which identifies their content without reading it.
+"""
+
+import os
+from collections import namedtuple
+
+from lab_git_index import tracked_files
+
+# =============================
+# MANIFEST
+# =============================
+FileEntry = namedtuple("FileEntry", ["path", "rel_path", "name", "suffix", "size", "mtime", "stat", "blob"],
+                       defaults=(None,))
+
+BACKENDS = ("auto", "git", "walk")
+
+
+def _walk(top, rel_top, ignore_names, skip_hidden, entries):
+    try:
+        with os.scandir(top) as it:
+            dir_entries = list(it)
+    except OSError:
+        return
+    subdirs = []
+    for entry in dir_entries:
+        if skip_hidden and entry.name.startswith("."):
+            continue
+        rel_path = entry.name if not rel_top else rel_top + "/" + entry.name
+        try:
+            if entry.is_dir():
+                # Same rules as os.walk(followlinks=False): prune by name, never follow links.
+                if entry.name not in ignore_names and not entry.is_symlink():
+                    subdirs.append((entry.path, rel_path))
+                continue
+            st = entry.stat()
+        except OSError:
+            continue
+        entries.append(FileEntry(
+            path=entry.path,
+            rel_path=rel_path,
+            name=entry.name,
+            suffix=os.path.splitext(entry.name)[1],
+            size=st.st_size,
+            mtime=st.st_mtime,
+            stat=st,
+        ))
+    for path, rel_path in subdirs:
+        _walk(path, rel_path, ignore_names, skip_hidden, entries)
+
+
+def _from_index(top, tracked, ignore_names, skip_hidden):
+    entries = []
+    for item in tracked:
+        parts = item.rel_path.split("/")
+        if any(p in ignore_names for p in parts[:-1]):
+            continue
+        if skip_hidden and any(p.startswith(".") for p in parts):
+            continue
+        path = os.path.join(top, *parts)
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue  # deleted in the working tree
+        if not os.path.isfile(path):
+            continue
+        # The blob id only describes the file if it has not changed since it was staged
+        unchanged = item.blob and st.st_size & 0xFFFFFFFF == item.size and st.st_mtime_ns == item.mtime_ns
+        entries.append(FileEntry(
+            path=path,
+            rel_path=item.rel_path,
+            name=parts[-1],
+            suffix=os.path.splitext(parts[-1])[1],
+            size=st.st_size,
+            mtime=st.st_mtime,
+            stat=st,
+            blob=item.blob if unchanged else None,
+        ))
+    return entries
+
+
+def build_manifest(repo_path, ignore_names=(), skip_hidden=False, backend="walk"):
+    """
+    Return a list of FileEntry for every file under repo_path.
+    Directories named in ignore_names are pruned; skip_hidden also drops
+    every file or directory whose name starts with a dot.
+
+    backend="walk" walks the filesystem; order matches os.walk (files of a
+    directory first, then its subdirectories, top-down). backend="git" lists
+    only tracked files, in index order; "auto" uses git for working trees
+    and walks everything else.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"unknown manifest backend: {backend}")
+    top = os.fspath(repo_path)
+    if backend != "walk":
+        tracked = tracked_files(top)
+        if tracked is not None:
+            return _from_index(top, tracked, set(ignore_names), skip_hidden)
+        if backend == "git":
+            raise ValueError(f"not a git working tree: {top}")
+    entries = []
+    _walk(top, "", set(ignore_names), skip_hidden, entries)
+    return entries
+
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+One-pass markdown structure index.
+
+index_markdown(text) tokenizes a README once into headings (with GitHub
+style anchor slugs), links, images, badges, tables and metadata lines such
+as `**Last Updated:** 2024-10-15` or `- Severity: High`, plus a lower-cased
+copy of the text, its word set and short word n-grams. README checks then
+answer from the index with set lookups and substring tests instead of
+running several case-insensitive regexes over the whole text per section.
+
+Indexes are cached per content hash, so the same README seen by several
+scanners in one process is tokenized once.
+"""
+
+import hashlib
+import re
+from collections import OrderedDict, namedtuple
+
+MAX_NGRAM = 4         # longest phrase answered from the n-gram set
+CACHE_ENTRIES = 256   # indexes kept per process
+
+Heading = namedtuple("Heading", ["level", "text", "slug", "line"])
+Link = namedtuple("Link", ["text", "url", "line"])
+Image = namedtuple("Image", ["alt", "url", "line"])
+
+_HEADING_RE = re.compile(r"^ {0,3}(#{1,6})(?:[ \t]+(.*?))?(?:[ \t]+#+)?[ \t]*$")
+# Anything that follows a run of '#', as `#+\s*...` sees it
+_HASH_LED_RE = re.compile(r"#+\s*(?=([^\n]*))")
+_IMAGE_RE = re.compile(r"!\[([^\n]*?)\]\(([^\n]*?)\)")
+# Targets are captured raw, like images: spaces, <...> and a "title" are left to the caller
+_LINK_RE = re.compile(r"(?<!!)\[([^\]\n]*)\]\(([^)\n]*)\)")
+_TABLE_RULE_RE = re.compile(r"^\s*\|?\s*:?-{3,}:?\s*(\|\s*:?-{3,}:?\s*)*\|?\s*$")
+_META_RE = re.compile(r"^[ \t>*_-]*?([A-Za-z][A-Za-z0-9 /()_-]{0,48}?)[*_]*[ \t]*:[*_]*[ \t]*(\S.*?)[ \t*_]*$")
+_WORD_RE = re.compile(r"\w+")
+_SLUG_STRIP_RE = re.compile(r"[^\w\- ]")
+
+
+def slugify(text, seen=None):
+    """GitHub-style heading anchor; seen (a dict) de-duplicates with -1, -2, ..."""
+    slug = _SLUG_STRIP_RE.sub("", text.strip().lower()).replace(" ", "-")
+    if seen is None:
+        return slug
+    count = seen.get(slug, 0)
+    seen[slug] = count + 1
+    return slug if count == 0 else f"{slug}-{count}"
+
+
+class MarkdownIndex:
+    def __init__(self, text):
+        self.text = text
+        self.lower = text.lower()
+        self.headings = []
+        self.links = []
+        self.images = []
+        self.tables = 0
+        self.metadata = {}      # lower-cased key -> first value seen
+        self.hash_led = [m.group(1) for m in _HASH_LED_RE.finditer(self.lower)]
+
+        slugs = {}
+        in_fence = False
+        prev = ""
+        for line_no, line in enumerate(text.splitlines(), 1):
+            stripped = line.lstrip()
+            if stripped.startswith(("```", "~~~")):
+                in_fence = not in_fence
+                prev = ""
+                continue
+            if in_fence:
+                continue
+            m = _HEADING_RE.match(line)
+            if m:
+                title = (m.group(2) or "").strip()
+                self.headings.append(Heading(len(m.group(1)), title, slugify(title, slugs), line_no))
+            if "](" in line:
+                for im in _IMAGE_RE.finditer(line):
+                    self.images.append(Image(im.group(1), im.group(2), line_no))
+                for lm in _LINK_RE.finditer(line):
+                    self.links.append(Link(lm.group(1), lm.group(2), line_no))
+            if "|" in prev and "-" in line and _TABLE_RULE_RE.match(line):
+                self.tables += 1
+            if ":" in line and not m:
+                mm = _META_RE.match(line)
+                if mm:
+                    self.metadata.setdefault(mm.group(1).strip().lower(), mm.group(2))
+            prev = line
+
+        words = _WORD_RE.findall(self.lower)
+        self.word_count = len(text.split())
+        self.words = set(words)
+        self.ngrams = set()
+        self._ngrams_from_runs()
+
+    def _ngrams_from_runs(self):
+        # n-grams only span words separated by exactly one space, matching `\bword word\b`
+        for run in self.lower.split("\n"):
+            tokens, prev_end = [], 0
+            for m in _WORD_RE.finditer(run):
+                if tokens and (m.start() != prev_end + 1 or run[prev_end] != " "):
+                    self._add_ngrams(tokens)
+                    tokens = []
+                tokens.append(m.group(0))
+                prev_end = m.end()
+            self._add_ngrams(tokens)
+
+    def _add_ngrams(self, tokens):
+        for n in range(2, MAX_NGRAM + 1):
+            for i in range(len(tokens) - n + 1):
+                self.ngrams.add(" ".join(tokens[i:i + n]))
+
+    # ---------- queries ----------
+
+    def contains(self, needle):
+        """Case-insensitive substring test."""
+        return needle.lower() in self.lower
+
+    def contains_any(self, needles):
+        return any(n.lower() in self.lower for n in needles)
+
+    def has_phrase(self, phrase):
+        """Same as re.search(rf"\\b{re.escape(phrase)}\\b", text, re.I)."""
+        p = phrase.lower()
+        tokens = p.split(" ")
+        if all(_WORD_RE.fullmatch(t) for t in tokens):
+            if len(tokens) == 1:
+                return p in self.words
+            if len(tokens) <= MAX_NGRAM:
+                return p in self.ngrams
+        return re.search(rf"\b{re.escape(p)}\b", self.lower) is not None
+
+    def after_hash(self, prefix):
+        """Same as re.search(rf"#+\\s*{re.escape(prefix)}", text, re.I)."""
+        p = prefix.lower()
+        return any(h.startswith(p) for h in self.hash_led)
+
+    def has_section(self, name):
+        """A heading starting with name, or name anywhere as a whole phrase."""
+        return self.after_hash(name) or self.has_phrase(name)
+
+    def has_heading_text(self):
+        """Same as re.search(r"#\\s*\\w+", text)."""
+        return any(h[:1].isalnum() or h[:1] == "_" for h in self.hash_led)
+
+    def meta(self, key):
+        """Value of a `Key: value` metadata line (bold/list markers stripped), or None."""
+        return self.metadata.get(key.lower())
+
+    @property
+    def badges(self):
+        return [im for im in self.images if "badge" in im.url.lower()]
+
+    @property
+    def line_count(self):
+        return self.text.count("\n")
+
+
+_cache = OrderedDict()
+
+
+def index_markdown(text):
+    """MarkdownIndex for text, reused for identical content."""
+    key = hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+    index = _cache.get(key)
+    if index is not None:
+        _cache.move_to_end(key)
+        return index
+    index = MarkdownIndex(text)
+    _cache[key] = index
+    if len(_cache) > CACHE_ENTRIES:
+        _cache.popitem(last=False)
+    return index
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Lightweight per-phase instrumentation for the scanners.
+
+Scan functions take a `profiler` argument and wrap their phases in
+`with profiler.phase("readme"):` and bump counters with
+`profiler.count("bytes_read", n)`. With --profile a Profiler records wall
+and CPU time per phase plus the counters; otherwise NULL_PROFILER is passed,
+whose phase() hands back one shared no-op context manager and whose count()
+does nothing, so disabled instrumentation costs a method call.
+
+Profiles from worker processes travel back as plain dicts (to_dict) and
+are folded together with merge(). write_prometheus() renders a profile in
+the Prometheus text exposition format for node_exporter's textfile
+collector or a pushgateway.
+"""
+
+import contextlib
+import time
+
+# Counters the scanners report; listed so the output always has the same keys.
+# files_regex_scanned counts files whose text went through a regex pass, not
+# individual pattern evaluations.
+COUNTERS = ("files_visited", "bytes_read", "files_regex_scanned", "http_requests")
+
+
+class Profiler:
+    enabled = True
+
+    def __init__(self):
+        self.phases = {}    # name -> {"wall_s", "cpu_s", "calls"}
+        self.counters = dict.fromkeys(COUNTERS, 0)
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        wall0, cpu0 = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            stats = self.phases.setdefault(name, {"wall_s": 0.0, "cpu_s": 0.0, "calls": 0})
+            stats["wall_s"] += time.perf_counter() - wall0
+            stats["cpu_s"] += time.process_time() - cpu0
+            stats["calls"] += 1
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def merge(self, profile):
+        """Add another profile (a Profiler or its to_dict()) into this one."""
+        if profile is None:
+            return self
+        if isinstance(profile, Profiler):
+            profile = profile.to_dict()
+        for name, stats in profile.get("phases", {}).items():
+            mine = self.phases.setdefault(name, {"wall_s": 0.0, "cpu_s": 0.0, "calls": 0})
+            for key in mine:
+                mine[key] += stats[key]
+        for name, value in profile.get("counters", {}).items():
+            self.count(name, value)
+        return self
+
+    def to_dict(self):
+        return {
+            "phases": {name: {"wall_s": round(s["wall_s"], 6), "cpu_s": round(s["cpu_s"], 6), "calls": s["calls"]}
+                       for name, s in self.phases.items()},
+            "counters": dict(self.counters),
+        }
+
+
+class NullProfiler:
+    enabled = False
+    _null = contextlib.nullcontext()
+
+    def phase(self, name):
+        return self._null
+
+    def count(self, name, n=1):
+        pass
+
+    def merge(self, profile):
+        return self
+
+    def to_dict(self):
+        return None
+
+
+NULL_PROFILER = NullProfiler()
+
+
+def make_profiler(enabled):
+    return Profiler() if enabled else NULL_PROFILER
+
+
+def format_profile(profile):
+    """Human-readable phase table for a to_dict() profile."""
+    lines = [f"  {'phase':<22} {'wall s':>9} {'cpu s':>9} {'calls':>7}"]
+    for name, s in sorted(profile["phases"].items(), key=lambda kv: -kv[1]["wall_s"]):
+        lines.append(f"  {name:<22} {s['wall_s']:>9.3f} {s['cpu_s']:>9.3f} {s['calls']:>7}")
+    lines.append("  " + ", ".join(f"{k}={v}" for k, v in profile["counters"].items()))
+    return "\n".join(lines)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render_prometheus(profile, tool):
+    out = []
+
+    def family(name, kind, help_text, samples):
+        out.append(f"# HELP {name} {help_text}")
+        out.append(f"# TYPE {name} {kind}")
+        for labels, value in samples:
+            label_str = ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+            out.append(f"{name}{{{label_str}}} {value}")
+
+    phases = sorted(profile["phases"].items())
+    family("lab_scan_phase_wall_seconds", "gauge", "Wall-clock seconds spent in each scan phase.",
+           [({"tool": tool, "phase": p}, s["wall_s"]) for p, s in phases])
+    family("lab_scan_phase_cpu_seconds", "gauge", "CPU seconds spent in each scan phase.",
+           [({"tool": tool, "phase": p}, s["cpu_s"]) for p, s in phases])
+    family("lab_scan_phase_calls", "gauge", "Times each scan phase ran.",
+           [({"tool": tool, "phase": p}, s["calls"]) for p, s in phases])
+    for name, value in sorted(profile["counters"].items()):
+        family(f"lab_scan_{name}", "gauge", f"{name.replace('_', ' ').capitalize()} during the last scan.",
+               [({"tool": tool}, value)])
+    return "\n".join(out) + "\n"
+
+
+def write_prometheus(path, profile, tool):
+    """Atomically write a profile as a Prometheus text exposition file."""
+    from lab_autofix import atomic_write_text
+
+    atomic_write_text(path, render_prometheus(profile, tool))
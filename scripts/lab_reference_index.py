@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Inverted index of project mentions and URLs across markdown.
+
+Each markdown file is tokenized in one pass with a single regex: the URLs in
+it, plus every whole-word mention of a configured project name (including
+inside URLs). The result is stored per file under .scan_cache together with
+its fingerprint (git blob id or mtime and size). update() only re-reads files
+whose fingerprint moved and drops files that disappeared. From these per-file
+entries the index builds project -> [(file, line)] and url -> [(file, line)],
+so "who links to X" and "which projects are never mentioned" are dict
+lookups instead of a rescan of every file.
+
+Usage:
+    python lab_reference_index.py who-links-to CloudOpsLab https://github.com/...
+    python lab_reference_index.py unreferenced [--all]
+"""
+
+import argparse
+import os
+import re
+import sys
+from bisect import bisect_left
+from collections import namedtuple
+from pathlib import Path
+
+from lab_line_index import LineIndex
+from lab_manifest import build_manifest
+from lab_profiling import NULL_PROFILER
+from lab_scan_cache import ScanCache, config_fingerprint, file_fingerprint
+
+DEFAULT_STATE_DIR = ".scan_cache"
+
+# Same URL shape as lab_cloudentrycheck.collect_links_from_text
+URL_PATTERN = r"https?://[^\s)>\]]+"
+
+Reference = namedtuple("Reference", ["file", "line"])
+
+
+def _read(path):
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    try:
+        return data.decode("utf-8")
+    except UnicodeDecodeError:
+        return data.decode("latin-1")
+
+
+def compile_tokenizer(projects):
+    """One regex that finds URLs and whole-word project names in a single scan."""
+    names = sorted(projects, key=lambda p: (-len(p), p))
+    alternatives = [f"(?P<url>{URL_PATTERN})"]
+    if names:
+        alternatives.append(r"\b(?P<project>" + "|".join(re.escape(n) for n in names) + r")\b")
+    return re.compile("|".join(alternatives))
+
+
+def tokenize(text, tokenizer, project_re):
+    """{"projects": {name: [lines]}, "urls": {url: [lines]}} for one markdown text."""
+    lines = LineIndex(text)
+    projects, urls = {}, {}
+    for m in tokenizer.finditer(text):
+        line = lines.line(m.start())
+        if m.lastgroup == "url":
+            url = m.group("url")
+            urls.setdefault(url, []).append(line)
+            # A URL like github.com/me/CloudOpsLab also mentions the project
+            if project_re is not None:
+                for pm in project_re.finditer(url):
+                    projects.setdefault(pm.group(0), []).append(line)
+        else:
+            projects.setdefault(m.group("project"), []).append(line)
+    return {"projects": projects, "urls": urls}
+
+
+class ReferenceIndex:
+    """Project mentions and URLs of every markdown file in a set of repos, kept up to date incrementally."""
+
+    def __init__(self, projects, state_dir=DEFAULT_STATE_DIR, backend="auto", profiler=NULL_PROFILER):
+        self.projects = sorted(projects)
+        self.backend = backend
+        self.profiler = profiler
+        self._tokenizer = compile_tokenizer(self.projects)
+        self._project_re = (re.compile(r"\b(?:" + "|".join(re.escape(p) for p in self.projects) + r")\b")
+                            if self.projects else None)
+        self.state = ScanCache(state_dir, config_fingerprint(self.projects, [URL_PATTERN])) if state_dir else None
+        self.stats = {"files_indexed": 0, "files_reused": 0, "files_removed": 0}
+        self._files = {}        # file -> {"projects": ..., "urls": ...}
+        self._by_project = {}
+        self._by_url = {}
+        self._url_keys = []
+
+    def update(self, repos):
+        """Bring the index up to date with the markdown of repos ({repo key: path}); returns self."""
+        self._files = {}
+        for key, repo_path in repos.items():
+            self._update_repo(key, Path(repo_path))
+        self._invert()
+        return self
+
+    def _update_repo(self, key, repo_path):
+        entry = self.state.load(f"{key}.references") if self.state else {"files": {}}
+        known = entry.get("files", {})
+        with self.profiler.phase("traversal"):
+            manifest = [e for e in build_manifest(repo_path, backend=self.backend) if e.name.endswith(".md")]
+        self.profiler.count("files_visited", len(manifest))
+
+        files, changed = {}, False
+        with self.profiler.phase("reference_index"):
+            for e in manifest:
+                fp = file_fingerprint(e)
+                cached = known.get(e.rel_path)
+                if cached is not None and cached["fp"] == fp:
+                    self.stats["files_reused"] += 1
+                    files[e.rel_path] = cached
+                    continue
+                text = _read(e.path)
+                if text is None:
+                    continue
+                self.profiler.count("bytes_read", len(text))
+                self.profiler.count("files_regex_scanned")
+                self.stats["files_indexed"] += 1
+                files[e.rel_path] = dict(tokenize(text, self._tokenizer, self._project_re), fp=fp)
+                changed = True
+        removed = len(known.keys() - files.keys())
+        self.stats["files_removed"] += removed
+
+        if self.state and (changed or removed):
+            self.state.save(f"{key}.references", {"config": self.state.config_key, "files": files})
+        for rel_path, found in files.items():
+            self._files[str(repo_path / rel_path)] = found
+
+    def _invert(self):
+        self._by_project, self._by_url = {}, {}
+        for file, found in self._files.items():
+            for name, lines in found["projects"].items():
+                self._by_project.setdefault(name, []).extend(Reference(file, line) for line in lines)
+            for url, lines in found["urls"].items():
+                self._by_url.setdefault(url, []).extend(Reference(file, line) for line in lines)
+        self._url_keys = sorted(self._by_url)
+
+    # ---- queries ----
+
+    def mentions(self, project):
+        """Every (file, line) that mentions project."""
+        return sorted(self._by_project.get(project, ()))
+
+    def links_to(self, url):
+        """(file, line) of links to url or to anything below it (url/..., url?..., url#...)."""
+        refs = []
+        base = url.rstrip("/")
+        for i in range(bisect_left(self._url_keys, base), len(self._url_keys)):
+            key = self._url_keys[i]
+            if not key.startswith(base):
+                break
+            if len(key) == len(base) or key[len(base)] in "/?#":
+                refs.extend(self._by_url[key])
+        return sorted(refs)
+
+    def who_links_to(self, target):
+        """References to a configured project name or to a URL."""
+        if target in self._by_project or target in self.projects:
+            return self.mentions(target)
+        return self.links_to(target)
+
+    def unreferenced(self, projects=None):
+        """Projects (default: all configured) that no indexed file mentions."""
+        return [p for p in (self.projects if projects is None else projects) if p not in self._by_project]
+
+    def projects_in(self, file):
+        """Projects mentioned in one indexed file."""
+        return set(self._files.get(str(file), {}).get("projects", ()))
+
+    def urls(self):
+        """Every URL found in any indexed file."""
+        return list(self._url_keys)
+
+
+# --------------- MAIN ---------------
+
+
+def main(argv=None):
+    from lab_cloudentrycheck import MANIFEST_BACKEND, PROJECT_REFERENCES, REPOS_CONFIG
+
+    parser = argparse.ArgumentParser(description="Query project mentions and links across the entrycheck repos.")
+    parser.add_argument("--state-dir", default=DEFAULT_STATE_DIR,
+                        help="Where the index is persisted (default: .scan_cache).")
+    sub = parser.add_subparsers(dest="command", required=True)
+    who = sub.add_parser("who-links-to", help="Files and lines that mention a project or link to a URL.")
+    who.add_argument("targets", nargs="+", metavar="PROJECT_OR_URL")
+    unref = sub.add_parser("unreferenced", help="Projects not mentioned in any markdown file.")
+    unref.add_argument("--all", action="store_true",
+                       help="Check every configured project, not only the required ones.")
+    args = parser.parse_args(argv)
+
+    repos = {key: conf["path"] for key, conf in REPOS_CONFIG.items() if conf["path"].exists()}
+    index = ReferenceIndex(PROJECT_REFERENCES, args.state_dir, MANIFEST_BACKEND).update(repos)
+    s = index.stats
+    print(f"[INFO] Reference index: {s['files_indexed']} file(s) indexed, {s['files_reused']} reused, "
+          f"{s['files_removed']} removed")
+
+    if args.command == "who-links-to":
+        for target in args.targets:
+            refs = index.who_links_to(target)
+            print(f"\n{target}: {len(refs)} reference(s)")
+            for ref in refs:
+                print(f"  - {ref.file}:{ref.line}")
+        return 0
+
+    wanted = None if args.all else [p for p, meta in PROJECT_REFERENCES.items() if meta.get("required", False)]
+    missing = index.unreferenced(wanted)
+    print("\nUnreferenced projects: " + (", ".join(missing) if missing else "none"))
+    return 1 if missing else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
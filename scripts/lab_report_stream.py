@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Streaming NDJSON report for the portfolio scanner.
+
+Each repo is appended as one compact line, {"repo": name, "result": {...}},
+and flushed as soon as it is scored, so a crash keeps everything scored so
+far. A resumed run re-opens the file, drops a torn last line and skips the
+repos already in it. summarize() reads the stream back one line at a time
+to compute the top, bottom and average scores in constant memory.
+"""
+
+import json
+import os
+
+from lab_autofix import atomic_write_text
+
+SCORE_KEY = "TOTAL SCORE"
+
+
+def read_records(path):
+    """Yield (repo, result) for every complete line of an NDJSON report."""
+    try:
+        f = open(path, "r", encoding="utf-8")
+    except FileNotFoundError:
+        return
+    with f:
+        for line in f:
+            if not line.endswith("\n"):
+                break  # torn write from an interrupted run
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            yield record["repo"], record["result"]
+
+
+class ReportStream:
+    def __init__(self, path, resume=False):
+        self.path = path
+        self.done = set()
+        if resume and os.path.exists(path):
+            good = 0
+            with open(path, "rb") as f:
+                for raw in f:
+                    if not raw.endswith(b"\n"):
+                        break
+                    try:
+                        self.done.add(json.loads(raw)["repo"])
+                    except (ValueError, KeyError):
+                        pass
+                    good += len(raw)
+            with open(path, "r+b") as f:
+                f.truncate(good)
+            self._f = open(path, "a", encoding="utf-8")
+        else:
+            self._f = open(path, "w", encoding="utf-8")
+
+    def write(self, repo, result):
+        self._f.write(json.dumps({"repo": repo, "result": result}, separators=(",", ":")) + "\n")
+        self._f.flush()
+        self.done.add(repo)
+
+    def close(self):
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def summarize(records):
+    """
+    Top, bottom and average TOTAL SCORE over (repo, result) pairs in one pass.
+    Ties keep the first repo seen as top and the last one as bottom.
+    """
+    count, total = 0, 0.0
+    top = bottom = None
+    for repo, result in records:
+        score = result[SCORE_KEY]
+        count += 1
+        total += score
+        if top is None or score > top[1]:
+            top = (repo, score)
+        if bottom is None or score <= bottom[1]:
+            bottom = (repo, score)
+    return {
+        "count": count,
+        "top": top,
+        "bottom": bottom,
+        "average": round(total / count, 1) if count else None,
+    }
+
+
+def write_summary(path, summary):
+    """Atomically write the summary sidecar next to the NDJSON report."""
+    atomic_write_text(path, json.dumps(summary, indent=2))
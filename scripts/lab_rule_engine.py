@@ -0,0 +1,518 @@
+#!/usr/bin/env python3
+"""
+Rule engine for the portfolio validator and auditor.
+
+Each rule declares what it needs from a file: a suffix filter, exact
+repo-relative filenames, the decoded content, or only the first N bytes.
+The engine lists the repo once, loads each file's content or head at most
+once (through a shared ContentCache) and hands files to the rules that
+asked for them in batches. Rules that have already reached a verdict (code, IaC) set `done`
+and receive nothing further. Single-rule runs such as scan_code() and
+scan_iac() therefore stop early; a full profile always walks every file,
+since the secret and image-size rules have to see all of them.
+
+A Profile bundles the rules and repo settings for one script, so the
+validator and the auditor differ only in config and README scoring.
+"""
+
+import json
+import os
+from pathlib import Path
+
+from lab_assets import IMAGE_SUFFIXES, SNIFF_BYTES, image_dimensions
+from lab_autofix import FixSet
+from lab_content_cache import DEFAULT_BUDGET, ContentCache, merge_stats
+from lab_diff_scan import DEFAULT_STATE_DIR, LineRule, scan_since
+from lab_git_index import resolve_git_dir
+from lab_git_objects import GitTree, is_bare_repo
+from lab_manifest import BACKENDS, build_manifest
+from lab_profiling import NULL_PROFILER, Profiler, format_profile, make_profiler, write_prometheus
+from lab_secret_scan import SECRET_RULES, Finding, scan_files, scan_text
+
+BATCH_SIZE = 256
+
+# ---------------- ENUMERATION ----------------
+
+
+def list_repo_files(repo_path, backend="walk"):
+    """
+    One enumeration shared by every rule: files with a suffix,
+    skipping anything under a dot-directory. backend is a lab_manifest backend.
+    """
+    return [e for e in build_manifest(repo_path, skip_hidden=True, backend=backend) if "." in e.name]
+
+
+def read_file(path, cache=None):
+    """Decoded text of path, through the cache when one is given."""
+    if cache is not None:
+        cached = cache.get(path)
+        if cached is not None:
+            return cached.text
+    try:
+        return Path(path).read_text(errors='ignore')
+    except OSError:
+        return ""
+
+
+def file_exists(path, cache=None):
+    """Whether path is a file, asking the cache when one is given (a GitTree has no working tree)."""
+    return cache.exists(path) if cache is not None else Path(path).is_file()
+
+
+# ---------------- RULES ----------------
+
+
+class Rule:
+    name = "rule"
+    suffixes = None         # only files with one of these suffixes (None = any)
+    filenames = None        # only these repo-relative paths (None = any)
+    needs_content = False   # pass decoded text ("" for binaries)
+    head_bytes = 0          # pass the first N raw bytes instead of the content
+
+    def __init__(self):
+        self.done = False
+        self.repo_path = None
+        self.cache = None
+        self.profiler = NULL_PROFILER
+
+    def start(self, repo_path, cache, profiler=NULL_PROFILER):
+        self.repo_path = repo_path
+        self.cache = cache
+        self.profiler = profiler
+
+    def wants(self, entry):
+        if self.suffixes is not None and entry.suffix not in self.suffixes:
+            return False
+        if self.filenames is not None and entry.rel_path not in self.filenames:
+            return False
+        return True
+
+    def visit(self, entry, content):
+        pass
+
+    def visit_batch(self, batch):
+        for entry, content in batch:
+            if self.done:
+                return
+            self.visit(entry, content)
+
+    def result(self):
+        raise NotImplementedError
+
+
+class CodeRule(Rule):
+    """30 pts for any .py/.sh/.ps1 file, +10 if one has try/except or a main guard."""
+
+    name = "code"
+    suffixes = (".py", ".sh", ".ps1")
+    needs_content = True
+
+    def __init__(self):
+        super().__init__()
+        self.has_code = False
+        self.has_handling = False
+
+    def visit(self, entry, content):
+        self.has_code = True
+        if content and ("try:" in content or "except" in content or "if __name__ == '__main__':" in content):
+            self.has_handling = True
+            self.done = True
+
+    def result(self):
+        return min((30 if self.has_code else 0) + (10 if self.has_handling else 0), 40)
+
+
+class IacRule(Rule):
+    """20 pts if any Terraform/YAML/CloudFormation file exists."""
+
+    name = "iac"
+    suffixes = (".tf", ".yaml", ".yml")
+
+    def __init__(self):
+        super().__init__()
+        self.found = False
+
+    def visit(self, entry, content):
+        self.found = True
+        self.done = True
+
+    def result(self):
+        return 20 if self.found else 0
+
+
+class SecurityRule(Rule):
+    """
+    10 pts if the secret engine finds nothing; result is (score, findings).
+    Reads whole files through the secret engine, since a secret can sit anywhere in one.
+    """
+
+    name = "security"
+
+    def __init__(self):
+        super().__init__()
+        self.findings = []
+
+    def visit_batch(self, batch):
+        paths = [entry.path for entry, _ in batch]
+        self.profiler.count("files_regex_scanned", len(paths))
+        self.findings.extend(scan_files(paths, self.repo_path, cache=self.cache))
+
+    def result(self):
+        self.findings.sort(key=lambda f: (f.file, f.line))
+        return (10 if not self.findings else 0), self.findings
+
+
+def _is_secret_candidate(rel_path):
+    # Same files as list_repo_files: a suffix, nothing under a dot-directory
+    parts = rel_path.split("/")
+    return "." in parts[-1] and not any(p.startswith(".") for p in parts)
+
+
+SECRET_LINES = LineRule("security", _is_secret_candidate,
+                        lambda rel_path, text: [f._asdict() for f in scan_text(text, rel_path)],
+                        sorted(SECRET_RULES.items()))
+
+
+class DiffSecurityRule(SecurityRule):
+    """SecurityRule that only scans lines changed since a base commit (see lab_diff_scan)."""
+
+    filenames = ()   # reads nothing during the traversal
+
+    def __init__(self, base, head="HEAD", state_dir=DEFAULT_STATE_DIR, repo_name=None):
+        super().__init__()
+        self.base = base
+        self.head = head
+        self.state_dir = state_dir
+        self.repo_name = repo_name
+
+    def start(self, repo_path, cache, profiler=NULL_PROFILER):
+        super().start(repo_path, cache, profiler)
+        self.done = True
+
+    def result(self):
+        scan = scan_since(self.repo_path, SECRET_LINES, self.base, self.head, self.state_dir, self.repo_name,
+                          self.profiler)
+        self.findings = [Finding(**f) for f in scan.findings]
+        return super().result()
+
+
+class AssetRule(Rule):
+    """
+    Image bytes in the repo; result is (score, bytes): -10 pts when over the budget (see lab_assets).
+    Only the head of each image-named file is read, to skip files that are not images at all.
+    """
+
+    name = "assets"
+    head_bytes = SNIFF_BYTES
+
+    def __init__(self, budget_bytes):
+        super().__init__()
+        self.budget_bytes = budget_bytes
+        self.total = 0
+        self.not_images = 0
+
+    def wants(self, entry):
+        return entry.name.lower().endswith(IMAGE_SUFFIXES)
+
+    def visit(self, entry, head):
+        if image_dimensions(head)[0] == "unknown":
+            self.not_images += 1   # e.g. markdown saved under a .png name
+            return
+        self.total += entry.size
+
+    def result(self):
+        over = self.budget_bytes is not None and self.total > self.budget_bytes
+        return (-10 if over else 0), self.total
+
+
+class ReadmeRule(Rule):
+    """Delegates to a profile's README scorer; result is (score, fixes). Edits go to the fixer."""
+
+    name = "readme"
+    filenames = ("README.md",)
+    needs_content = True
+
+    def __init__(self, readme_fn, repo_name, fixer=None):
+        super().__init__()
+        self.readme_fn = readme_fn
+        self.repo_name = repo_name
+        self.fixer = fixer
+
+    def result(self):
+        # README.md (if present) was loaded into the cache during traversal
+        return self.readme_fn(self.repo_path, self.repo_name, self.cache, self.fixer)
+
+
+# ---------------- ENGINE ----------------
+
+
+def _load_batch(active, entries, cache):
+    """Per active rule, the (entry, payload) pairs it asked for; each file is read at most once."""
+    batches = [[] for _ in active]
+    head_size = max(rule.head_bytes for rule in active)
+    for entry in entries:
+        content = head = None
+        loaded = False
+        for i, rule in enumerate(active):
+            if not rule.wants(entry):
+                continue
+            if rule.needs_content:
+                if not loaded:
+                    cached = cache.get(entry.path)
+                    # Files over the cache's max_file_bytes are read once, uncached
+                    content = read_file(entry.path) if cached is None else cached.text
+                    loaded = True
+                batches[i].append((entry, content))
+            elif rule.head_bytes:
+                if head is None:
+                    head = cache.head(entry.path, head_size)
+                batches[i].append((entry, head[:rule.head_bytes]))
+            else:
+                batches[i].append((entry, None))
+    return batches
+
+
+def run_rules(repo_path, rules, files=None, cache=None, batch_size=BATCH_SIZE, profiler=NULL_PROFILER,
+              backend="walk"):
+    """Run rules over one repo in a single traversal; returns {rule.name: result}."""
+    if files is None:
+        with profiler.phase("traversal"):
+            files = list_repo_files(repo_path, backend)
+    if cache is None:
+        cache = ContentCache()
+    for rule in rules:
+        rule.start(repo_path, cache, profiler)
+
+    for start in range(0, len(files), batch_size):
+        active = [r for r in rules if not r.done]
+        if not active:
+            break
+        chunk = files[start:start + batch_size]
+        profiler.count("files_visited", len(chunk))
+        with profiler.phase("read"):
+            batches = _load_batch(active, chunk, cache)
+        for rule, batch in zip(active, batches):
+            if batch and not rule.done:
+                with profiler.phase(f"rule.{rule.name}"):
+                    rule.visit_batch(batch)
+
+    results = {}
+    for rule in rules:
+        with profiler.phase(f"rule.{rule.name}"):
+            results[rule.name] = rule.result()
+    return results
+
+
+def scan_code(repo_path, files=None, cache=None):
+    """Code score (0-40) for one repo; see CodeRule."""
+    return run_rules(repo_path, [CodeRule()], files, cache)["code"]
+
+
+def scan_iac(repo_path, files=None):
+    """IaC score (0-20) for one repo; see IacRule."""
+    return run_rules(repo_path, [IacRule()], files)["iac"]
+
+
+def scan_security(repo_path, files=None, cache=None, since=None, state_dir=DEFAULT_STATE_DIR):
+    """Security score (0-10) for one repo; scan_security_findings() also returns the findings."""
+    return scan_security_findings(repo_path, files, cache, since, state_dir)[0]
+
+
+def scan_security_findings(repo_path, files=None, cache=None, since=None, state_dir=DEFAULT_STATE_DIR):
+    """
+    (score, findings) from the secret engine for one repo; see SecurityRule.
+    With since (a commit, or "last"), only lines changed since then are scanned; see DiffSecurityRule.
+    """
+    rule = SecurityRule() if since is None else DiffSecurityRule(since, state_dir=state_dir)
+    return run_rules(repo_path, [rule], files, cache)["security"]
+
+
+# ---------------- PROFILES ----------------
+
+
+class Profile:
+    """Config plus rule set for one validator-style script."""
+
+    def __init__(self, title, readme_fn, skip_repos=(), portfolio_repo=None, profile_repo=None, max_findings=5,
+                 name="validator", asset_budget_mb=None):
+        self.title = title
+        self.name = name  # tool label in exported metrics
+        self.readme_fn = readme_fn
+        self.skip_repos = list(skip_repos)
+        self.portfolio_repo = portfolio_repo
+        self.profile_repo = profile_repo
+        self.max_findings = max_findings  # secret findings printed per repo (None = all)
+        self.asset_budget_mb = asset_budget_mb  # image bytes per repo before the score is docked (None = no limit, the default)
+
+    def rules(self, repo_name, fixer=None):
+        budget = None if self.asset_budget_mb is None else int(self.asset_budget_mb * 1024 * 1024)
+        return [ReadmeRule(self.readme_fn, repo_name, fixer), CodeRule(), IacRule(), SecurityRule(),
+                AssetRule(budget)]
+
+
+def score_repo(profile, path, repo, cache_budget=DEFAULT_BUDGET, dry_run=False, profiling=False, backend="walk",
+               ref=None, since=None):
+    """
+    Run a profile's rules against one repo, then write its auto-fixes once per file.
+    Bare repos, and any git repo when ref is given, are read from git objects at ref
+    and their auto-fixes are only diffed. With since, git repos are secret-scanned
+    only on lines changed since that commit.
+    Returns the table row, the auto-fixes, the secret findings, cache stats,
+    (dry run only) unified diffs of the fixes and (profiling only) phase timings.
+    """
+    profiler = make_profiler(profiling)
+    files = None
+    git_dir = path if is_bare_repo(path) else (resolve_git_dir(path) if ref is not None else None)
+    if git_dir is not None:
+        cache = GitTree(git_dir, ref or "HEAD", root=path, budget=cache_budget)
+        with profiler.phase("traversal"):
+            files = [e for e in cache.manifest(skip_hidden=True) if "." in e.name]
+        dry_run = True
+    else:
+        cache = ContentCache(cache_budget)
+    fixer = FixSet(dry_run, root=path)
+    rules = profile.rules(repo, fixer)
+    if since is not None and (is_bare_repo(path) or resolve_git_dir(path) is not None):
+        rules = [DiffSecurityRule(since, ref or "HEAD", repo_name=repo) if r.name == "security" else r for r in rules]
+    try:
+        results = run_rules(path, rules, files, cache, profiler=profiler, backend=backend)
+        with profiler.phase("autofix"):
+            diffs = fixer.commit(cache)
+    finally:
+        if isinstance(cache, GitTree):
+            cache.close()
+    profiler.count("bytes_read", cache.stats["bytes_read"])
+    readme_score, fixes = results["readme"]
+    code_score = results["code"]
+    iac_score = results["iac"]
+    security_score, findings = results["security"]
+    asset_score, asset_bytes = results["assets"]
+    portfolio_bonus = 10 if repo == profile.portfolio_repo else 0
+
+    total_score = readme_score + code_score + iac_score + security_score + portfolio_bonus
+    total_score = max(min(total_score, 100) + asset_score, 0)
+
+    label = repo
+    if repo == profile.portfolio_repo:
+        label += " (PORTFOLIO)"
+    elif repo == profile.profile_repo:
+        label += " (PROFILE)"
+
+    row = [
+        label,
+        f"{readme_score}%",
+        f"{code_score}%",
+        f"{iac_score}%",
+        f"{security_score}%",
+        f"{portfolio_bonus}%",
+        f"{asset_bytes / 1024 / 1024:.1f} MB" + (f" ({asset_score}%)" if asset_score else ""),
+        f"{total_score:.1f}%"
+    ]
+    return row, fixes, findings, cache.stats, diffs, profiler.to_dict()
+
+
+def report_repo(row, fixes, findings, max_findings=5, diffs=()):
+    if fixes:
+        verb = "planned (dry run)" if diffs else "applied"
+        print(f"📁 {row[0]} - Auto-fixes {verb}: {', '.join(fixes)}")
+        for diff in diffs:
+            print(diff, end="")
+    if findings:
+        print(f"🔐 {row[0]} - {len(findings)} potential secret(s):")
+        shown = findings if max_findings is None else findings[:max_findings]
+        for f in shown:
+            print(f"    * {f.file}:{f.line} [{f.rule}]")
+        if len(findings) > len(shown):
+            print(f"    ... and {len(findings) - len(shown)} more")
+
+
+def run_profile(profile, args):
+    """Score every repo under the current directory and print the results table."""
+    from prettytable import PrettyTable
+
+    if args.prometheus:
+        args.profile = True
+    REPO_BASE = Path.cwd()
+    # The scan state directory lives in the workspace too; it is not a repo
+    repos = sorted(f for f in os.listdir(REPO_BASE) if Path(REPO_BASE, f).is_dir() and f != DEFAULT_STATE_DIR)
+    table = PrettyTable()
+    table.field_names = ["Repo", "README", "Code", "IaC", "Security", "Portfolio Bonus", "Images", "Total %"]
+
+    print(f"\n🔍 {profile.title}\n")
+
+    to_scan = []
+    for repo in repos:
+        if repo in profile.skip_repos:
+            print(f"⏭ Skipping {repo}")
+            continue
+        to_scan.append(repo)
+
+    rows, cache_stats = {}, {}
+    profiler = Profiler() if args.profile else None
+    cache_budget = int(args.cache_mb * 1024 * 1024)
+    if args.jobs > 1:
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+
+        # Fixes and findings are reported as workers finish; table rows stay in repo-name order
+        with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+            futures = {pool.submit(score_repo, profile, Path(REPO_BASE) / repo, repo, cache_budget, args.dry_run,
+                                   args.profile, args.enumerate, args.ref, args.since): repo
+                       for repo in to_scan}
+            for future in as_completed(futures):
+                row, fixes, findings, stats, diffs, timings = future.result()
+                merge_stats(cache_stats, stats)
+                if profiler:
+                    profiler.merge(timings)
+                rows[futures[future]] = row
+                report_repo(row, fixes, findings, profile.max_findings, diffs)
+    else:
+        for repo in to_scan:
+            row, fixes, findings, stats, diffs, timings = score_repo(profile, Path(REPO_BASE) / repo, repo,
+                                                                     cache_budget, args.dry_run, args.profile,
+                                                                     args.enumerate, args.ref, args.since)
+            merge_stats(cache_stats, stats)
+            if profiler:
+                profiler.merge(timings)
+            rows[repo] = row
+            report_repo(row, fixes, findings, profile.max_findings, diffs)
+
+    for repo in to_scan:
+        table.add_row(rows[repo])
+
+    print(table)
+    if cache_stats:
+        print(f"\n🗃️  Content cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, "
+              f"{cache_stats['evictions']} evictions, {cache_stats['bytes_read'] / 1024 / 1024:.1f} MB read, "
+              f"peak {cache_stats['peak_bytes'] / 1024 / 1024:.1f} MB")
+    if profiler:
+        timings = profiler.to_dict()
+        print("\n⏱  Profile:")
+        print(format_profile(timings))
+        print(json.dumps({"profile": timings}, indent=2))
+        if args.prometheus:
+            write_prometheus(args.prometheus, timings, profile.name)
+            print(f"\n📈 Prometheus metrics saved to: {args.prometheus}")
+    print("\n✅ Scan Complete\n")
+
+
+def add_profile_args(parser):
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="Scan N repos concurrently in a process pool (default: 1, serial).")
+    parser.add_argument("--cache-mb", type=float, default=DEFAULT_BUDGET / 1024 / 1024,
+                        help="Per-repo file content cache budget in MB (default: 64).")
+    parser.add_argument("--enumerate", choices=BACKENDS, default="auto",
+                        help="File listing: 'git' index (tracked files only), filesystem 'walk', "
+                             "or 'auto' (git where available; default).")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Do not write auto-fixes; print them as unified diffs instead.")
+    parser.add_argument("--ref", default=None,
+                        help="Score this commit, branch or tag from git objects instead of the working tree "
+                             "(implies --dry-run). Bare repos are always read this way.")
+    parser.add_argument("--since", metavar="BASE", default=None,
+                        help="Secret-scan only lines changed since commit BASE ('last' = the commit of the "
+                             "previous --since run), reusing the findings stored in .scan_cache for the rest.")
+    parser.add_argument("--profile", action="store_true",
+                        help="Record per-phase wall/CPU time and I/O counters and print them as JSON.")
+    parser.add_argument("--prometheus", metavar="PATH",
+                        help="Also write the profile as a Prometheus text exposition file (implies --profile).")
+    return parser
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Incremental scan cache for the portfolio scanner.
+
+One JSON file per repo under .scan_cache/ holds the last result together with
+the repo HEAD commit, a fingerprint of the file manifest and per-file
+(mtime, size) entries. A repo whose HEAD and manifest are unchanged is not
+re-scored at all; otherwise only files whose (mtime, size) moved are re-read.
+Files listed from the git index with a known blob id are keyed by that id
+instead of their mtime, so a fresh checkout or a `touch` does not invalidate them.
+Entries written under a different scoring config (keywords, README sections)
+are ignored. MemoryScanCache keeps the entries in memory for --watch.
+"""
+
+import hashlib
+import json
+import os
+
+from lab_autofix import atomic_write_text
+from lab_git_index import resolve_git_dir
+
+# Bump when the scoring logic changes in a way the config key does not capture.
+CACHE_VERSION = 2
+
+
+def config_fingerprint(*parts):
+    """Stable hash of the scoring config (sets should be passed sorted)."""
+    blob = json.dumps([CACHE_VERSION] + [list(p) for p in parts], sort_keys=True)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def file_fingerprint(entry):
+    """(blob id or mtime_ns, size) pair for a manifest entry."""
+    return [entry.blob or entry.stat.st_mtime_ns, entry.size]
+
+
+def manifest_fingerprint(manifest):
+    h = hashlib.sha256()
+    for entry in manifest:
+        key = entry.blob or entry.stat.st_mtime_ns
+        h.update(f"{entry.rel_path}\0{key}\0{entry.size}\n".encode("utf-8", "surrogateescape"))
+    return h.hexdigest()
+
+
+def _read_first_line(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return f.readline().strip()
+    except OSError:
+        return ""
+
+
+def read_git_head(repo_path):
+    """
+    Resolve the HEAD commit of a working tree without spawning git.
+    Returns None for non-git directories or unresolvable refs.
+    """
+    git_dir = resolve_git_dir(repo_path)
+    if git_dir is None:
+        return None
+    head = _read_first_line(os.path.join(git_dir, "HEAD"))
+    if not head.startswith("ref:"):
+        return head or None
+    ref = head[len("ref:"):].strip()
+    sha = _read_first_line(os.path.join(git_dir, ref))
+    if sha:
+        return sha
+    try:
+        with open(os.path.join(git_dir, "packed-refs"), "r", encoding="utf-8") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 2 and parts[1] == ref:
+                    return parts[0]
+    except OSError:
+        pass
+    return None
+
+
+class ScanCache:
+    """Per-repo cache entries stored as JSON files in cache_dir."""
+
+    def __init__(self, cache_dir, config_key):
+        self.cache_dir = cache_dir
+        self.config_key = config_key
+        self.stats = {"repo_hits": 0, "repo_misses": 0, "file_hits": 0, "file_misses": 0}
+
+    def _path(self, repo_name):
+        safe = "".join(c if c.isalnum() or c in "-_." else "_" for c in repo_name)
+        return os.path.join(self.cache_dir, safe + ".json")
+
+    def load(self, repo_name):
+        """Cached entry for repo_name, or an empty entry if missing or stale."""
+        try:
+            with open(self._path(repo_name), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            entry = None
+        if not isinstance(entry, dict) or entry.get("config") != self.config_key:
+            return {"config": self.config_key, "files": {}}
+        return entry
+
+    def save(self, repo_name, entry):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        try:
+            atomic_write_text(self._path(repo_name), json.dumps(entry, separators=(",", ":")))
+        except OSError:
+            pass
+
+    def count(self, key, n=1):
+        self.stats[key] += n
+
+
+class MemoryScanCache(ScanCache):
+    """
+    ScanCache kept in memory for long-running scans. Entries start warm from
+    cache_dir (if given) and are only written back there by flush().
+    """
+
+    def __init__(self, cache_dir, config_key):
+        super().__init__(cache_dir, config_key)
+        self._memory = {}
+        self._dirty = set()
+
+    def load(self, repo_name):
+        if repo_name not in self._memory:
+            self._memory[repo_name] = (super().load(repo_name) if self.cache_dir
+                                       else {"config": self.config_key, "files": {}})
+        return self._memory[repo_name]
+
+    def save(self, repo_name, entry):
+        self._memory[repo_name] = entry
+        self._dirty.add(repo_name)
+
+    def forget(self, repo_name):
+        self._memory.pop(repo_name, None)
+        self._dirty.discard(repo_name)
+
+    def flush(self):
+        """Write entries saved since the last flush to cache_dir."""
+        if self.cache_dir:
+            for repo_name in sorted(self._dirty):
+                super().save(repo_name, self._memory[repo_name])
+        self._dirty.clear()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Secret scanning engine.
+
+Reports every hardcoded-secret hit in a repo as (file, line, rule):
+- binaries (screenshots, archives, executables) are sniffed by magic bytes
+  or NUL bytes in the first block and skipped,
+- files are streamed in overlapping chunks, so memory stays flat regardless
+  of file size,
+- files are scanned in parallel on a thread pool.
+
+Usage:
+    python lab_secret_scan.py [REPO_PATH]
+"""
+
+import io
+import re
+import sys
+from collections import namedtuple
+from pathlib import Path
+
+from lab_manifest import build_manifest
+
+# ---------------- CONFIG ----------------
+SECRET_RULES = {
+    "aws-access-key-id": r"AKIA",
+    "secret": r"SECRET",
+    "password": r"password",
+    "access-key": r"access_key",
+}
+
+CHUNK_SIZE = 1024 * 1024   # bytes read per chunk
+OVERLAP = 256              # bytes carried into the next chunk; must exceed the longest match
+SNIFF_SIZE = 8192          # bytes inspected for binary detection
+MAX_WORKERS = 8
+
+# Signatures that contain bytes no text file starts with
+BINARY_MAGIC = (
+    b"\x89PNG\r\n\x1a\n",   # PNG
+    b"\xff\xd8\xff",         # JPEG
+    b"PK\x03\x04",           # zip, jar, docx, xlsx
+    b"\x1f\x8b",             # gzip
+    b"\xfd7zXZ\x00",         # xz
+    b"7z\xbc\xaf\x27\x1c",   # 7z
+    b"\x7fELF",              # ELF
+    b"\xca\xfe\xba\xbe",     # Mach-O fat / Java class
+    b"\xcf\xfa\xed\xfe",     # Mach-O 64
+    b"\x00\x00\x01\x00",     # ICO
+    b"SQLite format 3\x00",  # SQLite
+)
+
+# Printable signatures (GIF, %PDF-, RIFF, wOFF, bzip2 "BZh", PE "MZ") are not
+# listed: ordinary text can start with them too. Such files are only treated
+# as binary when their head contains a NUL byte, as real ones nearly always do.
+
+Finding = namedtuple("Finding", ["file", "line", "rule", "match"])
+
+RULE_NAMES = list(SECRET_RULES)
+SECRET_PATTERN = re.compile(
+    b"|".join(f"(?P<r{i}>{pat})".encode() for i, pat in enumerate(SECRET_RULES.values())),
+    re.IGNORECASE,
+)
+
+# ---------------- ENGINE ----------------
+
+
+def is_binary(head: bytes) -> bool:
+    """True if the first bytes of a file look like a binary format."""
+    return head.startswith(BINARY_MAGIC) or b"\x00" in head
+
+
+def scan_stream(stream, rel_path, pattern=SECRET_PATTERN):
+    """Findings for an open binary stream, read CHUNK_SIZE bytes at a time."""
+    findings = []
+    tail = b""
+    line = 1  # line number at the start of the current buffer
+    while True:
+        chunk = stream.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        buf = tail + chunk
+        pos, pos_line = 0, line
+        for m in pattern.finditer(buf):
+            if m.end() <= len(tail):
+                continue  # fully inside the overlap: reported with the previous chunk
+            pos_line += buf.count(b"\n", pos, m.start())
+            pos = m.start()
+            findings.append(Finding(rel_path, pos_line, RULE_NAMES[int(m.lastgroup[1:])],
+                                    m.group(0).decode("ascii", "replace")))
+        tail = buf[-OVERLAP:]
+        line += buf.count(b"\n", 0, len(buf) - len(tail))
+    return findings
+
+
+def scan_text(text, rel_path, pattern=SECRET_PATTERN):
+    """Findings for already-decoded file contents."""
+    return scan_stream(io.BytesIO(text.encode("utf-8", "ignore")), rel_path, pattern)
+
+
+def scan_file(path, rel_path=None, cache=None):
+    """
+    Findings for one file; binaries and unreadable files yield none.
+    With a ContentCache, small files are scanned from the cached text and
+    only files too large for the cache are streamed from disk.
+    """
+    rel_path = rel_path or str(path)
+    if cache is not None:
+        cached = cache.get(path)
+        if cached is not None:
+            return [] if cached.binary else scan_text(cached.text, rel_path)
+    try:
+        with open(path, "rb") as f:
+            head = f.read(SNIFF_SIZE)
+            if not head or is_binary(head):
+                return []
+            f.seek(0)
+            return scan_stream(f, rel_path)
+    except OSError:
+        return []
+
+
+def scan_files(paths, root=None, workers=MAX_WORKERS, cache=None):
+    """Scan many files in parallel; findings are sorted by (file, line)."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    root = Path(root) if root else None
+    jobs = [(p, str(Path(p).relative_to(root)) if root else str(p), cache) for p in paths]
+    findings = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for result in pool.map(lambda job: scan_file(*job), jobs):
+            findings.extend(result)
+    findings.sort(key=lambda f: (f.file, f.line))
+    return findings
+
+
+def candidate_files(repo_path):
+    """Files the validator considers: names with a suffix, nothing under dot-directories."""
+    return [e.path for e in build_manifest(repo_path, skip_hidden=True) if "." in e.name]
+
+
+def scan_repo(repo_path, workers=MAX_WORKERS, files=None, cache=None):
+    """Findings for a repo; files (paths) defaults to candidate_files(repo_path)."""
+    if files is None:
+        files = candidate_files(repo_path)
+    return scan_files(files, repo_path, workers, cache)
+
+
+# ---------------- MAIN ----------------
+
+
+def main(argv=None):
+    args = sys.argv[1:] if argv is None else argv
+    repo = Path(args[0]) if args else Path.cwd()
+    findings = scan_repo(repo)
+    for f in findings:
+        print(f"{f.file}:{f.line}: [{f.rule}] {f.match}")
+    print(f"\n{len(findings)} potential secret(s) in {repo}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Filesystem change notification for long-running scans.
+
+open_watcher(root) returns an InotifyWatcher on Linux: inotify through
+ctypes, one watch per directory, with directories added as they appear.
+Elsewhere, or when inotify is unavailable or out of watches, it returns a
+PollingWatcher that compares (mtime, size) snapshots. Both skip directories
+named in ignore_names and expose read(timeout) -> set of changed paths.
+
+batches() debounces the raw events. It waits for a first change, then keeps
+collecting until the tree has been quiet for `quiet` seconds (or `max_wait`
+has passed), and yields the whole burst as one set. A batch that contains
+root itself means "anything may have changed" (the inotify queue overflowed).
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import time
+
+DEBOUNCE_S = 0.2      # quiet period that ends a burst of events
+MAX_BATCH_S = 2.0     # a continuous stream of events is still flushed this often
+POLL_INTERVAL_S = 1.0
+
+# inotify(7)
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+              | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+_EVENT = struct.Struct("iIII")   # wd, mask, cookie, len; then len bytes of NUL-padded name
+
+
+def _skip(name, ignore_names):
+    return name in ignore_names
+
+
+class InotifyWatcher:
+    def __init__(self, root, ignore_names=()):
+        self.root = os.path.abspath(root)
+        self.ignore_names = set(ignore_names)
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError(errno.ENOSYS, "inotify is not available")
+        self._libc = libc
+        self._fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._dirs = {}   # wd -> directory path
+        try:
+            self._add_tree(self.root)
+        except OSError:
+            self.close()
+            raise
+
+    def _add_watch(self, path):
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err in (errno.ENOENT, errno.ENOTDIR, errno.EACCES):
+                return  # vanished or unreadable meanwhile
+            raise OSError(err, f"inotify_add_watch failed for {path}")
+        self._dirs[wd] = path
+
+    def _add_tree(self, top):
+        """Watch top and every directory below it; returns the files found (all new to us)."""
+        files = []
+        for dirpath, dirnames, filenames in os.walk(top):
+            dirnames[:] = [d for d in dirnames if not _skip(d, self.ignore_names)]
+            self._add_watch(dirpath)
+            files.extend(os.path.join(dirpath, f) for f in filenames)
+        return files
+
+    def _forget(self, path):
+        # A watched directory moved away: its watches (and its subdirectories') now report stale paths
+        prefix = path + os.sep
+        for wd, watched in list(self._dirs.items()):
+            if watched == path or watched.startswith(prefix):
+                self._libc.inotify_rm_watch(self._fd, wd)
+                del self._dirs[wd]
+
+    def read(self, timeout=None):
+        """Paths changed since the last read; waits up to timeout seconds (None: until something changes)."""
+        changed = set()
+        while not changed:
+            ready, _, _ = select.select([self._fd], [], [], timeout)
+            if not ready:
+                return changed
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                continue
+            pos = 0
+            while pos + _EVENT.size <= len(data):
+                wd, mask, _cookie, length = _EVENT.unpack_from(data, pos)
+                name = os.fsdecode(data[pos + _EVENT.size:pos + _EVENT.size + length].rstrip(b"\0"))
+                pos += _EVENT.size + length
+                self._handle(wd, mask, name, changed)
+        return changed
+
+    def _handle(self, wd, mask, name, changed):
+        if mask & IN_Q_OVERFLOW:
+            changed.add(self.root)
+            return
+        directory = self._dirs.get(wd)
+        if directory is None:
+            return
+        if mask & IN_IGNORED:
+            del self._dirs[wd]  # the directory is gone
+            return
+        if mask & IN_MOVE_SELF:
+            self._forget(directory)
+            return
+        if name and _skip(name, self.ignore_names):
+            return
+        path = os.path.join(directory, name) if name else directory
+        changed.add(path)
+        if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+            changed.update(self._add_tree(path))
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+class PollingWatcher:
+    def __init__(self, root, ignore_names=(), interval=POLL_INTERVAL_S):
+        self.root = os.path.abspath(root)
+        self.ignore_names = set(ignore_names)
+        self.interval = interval
+        self._snapshot = self._scan()
+        self._next = time.monotonic() + interval
+
+    def _scan(self):
+        snapshot = {}
+        stack = [self.root]
+        while stack:
+            try:
+                with os.scandir(stack.pop()) as it:
+                    entries = list(it)
+            except OSError:
+                continue
+            for entry in entries:
+                if _skip(entry.name, self.ignore_names):
+                    continue
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    else:
+                        st = entry.stat(follow_symlinks=False)
+                        snapshot[entry.path] = (st.st_mtime_ns, st.st_size)
+                except OSError:
+                    continue
+        return snapshot
+
+    def read(self, timeout=None):
+        """Paths changed since the last read; waits up to timeout seconds (None: until something changes)."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            now = time.monotonic()
+            if now >= self._next:
+                self._next = now + self.interval
+                old, self._snapshot = self._snapshot, self._scan()
+                changed = {p for p in old.keys() | self._snapshot.keys() if old.get(p) != self._snapshot.get(p)}
+                if changed:
+                    return changed
+            wake = self._next if deadline is None else min(self._next, deadline)
+            if deadline is not None and now >= deadline:
+                return set()
+            time.sleep(max(0.0, wake - time.monotonic()))
+
+    def close(self):
+        pass
+
+
+def open_watcher(root, ignore_names=(), polling=False, interval=POLL_INTERVAL_S):
+    """InotifyWatcher where possible, else (or with polling=True) a PollingWatcher."""
+    if not polling:
+        try:
+            return InotifyWatcher(root, ignore_names)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(root, ignore_names, interval)
+
+
+def batches(watcher, quiet=DEBOUNCE_S, max_wait=MAX_BATCH_S):
+    """Yield one set of changed paths per burst of filesystem activity."""
+    while True:
+        batch = watcher.read(None)
+        deadline = time.monotonic() + max_wait
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            more = watcher.read(min(quiet, remaining))
+            if not more:
+                break
+            batch |= more
+        yield batch
@@ -0,0 +1,97 @@
+"""Incident 003's batched EC2 scheduler against moto's mock_aws."""
+
+import os
+import sys
+
+import pytest
+
+boto3 = pytest.importorskip("boto3")
+moto = pytest.importorskip("moto")
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                "incidents", "003-lambda-timeout", "scripts"))
+import lab_ec2_scheduler as scheduler  # noqa: E402
+
+TAGS = {"Schedule": ["office-hours"]}
+TAGGED = 150
+PER_RESERVATION = 10   # moto pages describe_instances by reservation
+
+
+class LambdaContext:
+    def get_remaining_time_in_millis(self):
+        return 30000
+
+
+@pytest.fixture
+def ec2(monkeypatch):
+    for name, value in (("AWS_ACCESS_KEY_ID", "testing"), ("AWS_SECRET_ACCESS_KEY", "testing"),
+                        ("AWS_SESSION_TOKEN", "testing"), ("AWS_DEFAULT_REGION", "us-east-1")):
+        monkeypatch.setenv(name, value)
+    with moto.mock_aws():
+        client = boto3.client("ec2", region_name="us-east-1")
+        ami = client.describe_images()["Images"][0]["ImageId"]
+        tags = [{"ResourceType": "instance", "Tags": [{"Key": "Schedule", "Value": "office-hours"}]}]
+        for _ in range(TAGGED // PER_RESERVATION):
+            client.run_instances(ImageId=ami, MinCount=PER_RESERVATION, MaxCount=PER_RESERVATION,
+                                 TagSpecifications=tags)
+        client.run_instances(ImageId=ami, MinCount=5, MaxCount=5)   # untagged: never touched
+        yield client
+
+
+def states(client):
+    found = {}
+    for page in client.get_paginator("describe_instances").paginate():
+        for reservation in page["Reservations"]:
+            for instance in reservation["Instances"]:
+                found[instance["InstanceId"]] = instance["State"]["Name"]
+    return found
+
+
+def test_tag_selector_resolves_across_pages(ec2):
+    calls = []
+    ec2.meta.events.register("after-call.ec2.DescribeInstances", lambda **kwargs: calls.append(1))
+    ids = scheduler.find_instances(ec2, TAGS, ("running",), page_size=5)
+    assert len(ids) == len(set(ids)) == TAGGED
+    assert len(calls) > 1
+    assert scheduler.find_instances(ec2, {"Schedule": ["never"]}, ("running",)) == []
+
+
+def test_stop_in_batches_and_one_poll_round(ec2):
+    report = scheduler.run(ec2, "stop", TAGS, scheduler.TimeBudget(60), wait=True)
+    assert report["matched"] == report["sent"] == TAGGED
+    assert [b["size"] for b in report["batches"]] == [100, 50]
+    assert len(report["poll_rounds"]) == 1
+    assert report["poll_rounds"][0]["reached"] == TAGGED
+    assert report["pending"] == report["failed"] == report["not_sent"] == []
+    assert sorted(states(ec2).values()).count("stopped") == TAGGED
+
+
+def test_dry_run_is_not_a_failure(ec2):
+    report = scheduler.run(ec2, "stop", TAGS, scheduler.TimeBudget(60), dry_run=True)
+    assert report["sent"] == TAGGED and report["failed"] == []
+    assert all(b["error"] is None for b in report["batches"])
+    assert set(states(ec2).values()) == {"running"}
+
+
+def test_bad_instance_only_fails_itself(ec2):
+    ids = scheduler.find_instances(ec2, TAGS, ("running",))[:8] + ["i-0123456789abcdef0"]
+    records, not_sent = scheduler.change_state(ec2, "stop", ids, scheduler.TimeBudget(60))
+    failed = [iid for r in records if r["error"] and not r["split"] for iid in r["ids"]]
+    assert failed == ["i-0123456789abcdef0"] and not_sent == []
+    assert sum(len(r["ids"]) for r in records if not r["error"]) == 8
+
+
+def test_expired_budget_sends_nothing(ec2):
+    report = scheduler.run(ec2, "stop", TAGS, scheduler.TimeBudget(0, margin=0))
+    assert report["sent"] == 0 and len(report["not_sent"]) == TAGGED
+    assert report["budget_exhausted"]
+
+
+def test_lambda_handler_rejects_empty_selector():
+    response = scheduler.lambda_handler({"action": "stop", "tags": {}}, LambdaContext())
+    assert response["statusCode"] == 400
+
+
+def test_lambda_handler_rejects_unknown_action():
+    response = scheduler.lambda_handler({"action": "reboot", "tags": TAGS}, LambdaContext())
+    assert response["statusCode"] == 400
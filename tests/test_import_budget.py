@@ -0,0 +1,20 @@
+"""
+No lab command imports a heavy module just to parse its arguments (see
+scripts/lab_import_budget.py). Only the set of imported modules is checked:
+the millisecond budget depends on the runner and stays in the CI script step.
+"""
+
+import pytest
+
+import lab_import_budget
+
+
+@pytest.fixture(scope="module")
+def baseline():
+    return set(lab_import_budget.import_times(["-c", "pass"]))
+
+
+@pytest.mark.parametrize("command", list(lab_import_budget.BUDGETS), ids=" ".join)
+def test_command_imports_no_heavy_modules(command, baseline):
+    modules = lab_import_budget.imported_modules(command, baseline)
+    assert lab_import_budget.heavy_imports(modules) == []
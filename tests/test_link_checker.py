@@ -0,0 +1,95 @@
+"""LinkChecker against local aiohttp servers: HEAD fallback, revalidation, per-host pacing."""
+
+import asyncio
+import time
+
+import pytest
+
+aiohttp = pytest.importorskip("aiohttp")
+from aiohttp import web  # noqa: E402
+from aiohttp.test_utils import TestServer  # noqa: E402
+
+from lab_link_checker import LinkCache, LinkChecker  # noqa: E402
+
+ETAG = '"v1"'
+HITS = web.AppKey("hits", list)
+
+
+def make_app():
+    async def head_refused(request):
+        return web.Response(status=405)
+
+    async def ok(request):
+        return web.Response(text="ok")
+
+    async def etagged(request):
+        request.app[HITS].append(request.headers.get("If-None-Match"))
+        if request.headers.get("If-None-Match") == ETAG:
+            return web.Response(status=304, headers={"ETag": ETAG})
+        return web.Response(text="page", headers={"ETag": ETAG})
+
+    app = web.Application()
+    app[HITS] = []
+    app.router.add_route("HEAD", "/no-head", head_refused)
+    app.router.add_get("/no-head", ok, allow_head=False)
+    app.router.add_get("/ok", ok)
+    app.router.add_get("/etag", etagged)
+    return app
+
+
+def run_servers(count, check):
+    """Start count local servers, then await check(servers)."""
+    async def main():
+        servers = [TestServer(make_app()) for _ in range(count)]
+        for server in servers:
+            await server.start_server()
+        try:
+            return await check(servers)
+        finally:
+            for server in servers:
+                await server.close()
+    return asyncio.run(main())
+
+
+def test_head_refused_falls_back_to_get():
+    async def check(servers):
+        return await LinkChecker().check_all([str(servers[0].make_url("/no-head"))])
+
+    assert list(run_servers(1, check).values()) == [200]
+
+
+def test_expired_entry_is_revalidated_with_304(tmp_path):
+    cache = LinkCache(tmp_path / "links.json", ok_ttl=0)
+
+    async def check(servers):
+        url = str(servers[0].make_url("/etag"))
+        first = await LinkChecker(cache=cache).check_all([url])
+        second = await LinkChecker(cache=cache).check_all([url])
+        return url, first, second, servers[0].app[HITS]
+
+    url, first, second, hits = run_servers(1, check)
+    assert first[url] == second[url] == 200
+    assert cache.stats == {"fresh": 0, "revalidated": 1, "fetched": 1}
+    assert hits == [None, ETAG]   # HEAD is answered by the GET handler
+    assert cache.get(url)["etag"] == ETAG
+
+
+def test_per_host_pacing_does_not_starve_other_hosts():
+    rate = 10.0
+    checker = LinkChecker(concurrency=2, host_rate=rate, host_burst=1)
+    done = {}
+
+    async def check(servers):
+        busy = [str(servers[0].make_url(f"/ok?n={i}")) for i in range(6)]
+        other = str(servers[1].make_url("/ok"))
+        start = time.monotonic()
+        results = await checker.check_all(busy + [other],
+                                          on_result=lambda url, _: done.setdefault(url, time.monotonic() - start))
+        return busy, other, results
+
+    busy, other, results = run_servers(2, check)
+    assert set(results.values()) == {200}
+    # One token per 1/rate seconds on the busy host, starting from a burst of one
+    assert max(done[url] for url in busy) >= (len(busy) - 1) / rate * 0.9
+    # The other host gets a free slot while the busy one is pacing
+    assert done[other] < 2 / rate
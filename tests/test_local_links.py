@@ -0,0 +1,27 @@
+"""LocalLinks: link and image targets resolve the same way, spaces and <...> included."""
+
+from lab_local_links import LocalLinks
+
+FILES = {
+    "README.md": "\n".join([
+        "# Ops",
+        "[runbook](Runbook EC2 SSH.md)",
+        "[wrapped](<Runbook EC2 SSH.md#steps>)",
+        '[titled](Runbook EC2 SSH.md "Runbook")',
+        "![diagram](docs/EC2 diagram.png)",
+        "[gone](Missing Runbook.md)",
+        "![gone](docs/Missing diagram.png)",
+    ]),
+    "Runbook EC2 SSH.md": "# Steps\n",
+    "docs/EC2 diagram.png": "",
+}
+
+
+def test_targets_with_spaces_are_checked():
+    links = LocalLinks(FILES, FILES.get)
+    broken = links.check("README.md", FILES["README.md"])
+    assert links.checked == 6
+    assert [(b.kind, b.target) for b in broken] == [
+        ("link", "Missing Runbook.md"),
+        ("image", "docs/Missing diagram.png"),
+    ]
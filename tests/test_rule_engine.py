@@ -0,0 +1,24 @@
+"""AssetRule reads only file heads, counts real images and docks points only where a budget is set."""
+
+import struct
+
+from lab_assets import PNG_SIGNATURE
+from lab_cloud_portfolio_validator import ASSET_BUDGET_MB, PROFILE
+from lab_rule_engine import AssetRule, Profile, run_rules
+
+PNG = PNG_SIGNATURE + struct.pack(">I", 13) + b"IHDR" + struct.pack(">II", 4, 3) + bytes(500)
+
+
+def test_asset_rule_skips_files_that_are_not_images(tmp_path):
+    (tmp_path / "diagram.png").write_bytes(PNG)
+    (tmp_path / "notes.png").write_text("# Guardrails\n\nMarkdown saved as .png\n" * 50)
+    (tmp_path / "app.py").write_text("print('hi')\n")
+    rule = AssetRule(budget_bytes=len(PNG) - 1)
+    assert run_rules(tmp_path, [rule])["assets"] == (-10, len(PNG))
+    assert rule.not_images == 1
+
+
+def test_image_budget_is_opt_in():
+    auditor = Profile("Auditor", readme_fn=None, name="auditor")
+    assert [r.budget_bytes for r in auditor.rules("repo") if r.name == "assets"] == [None]
+    assert [r.budget_bytes for r in PROFILE.rules("repo") if r.name == "assets"] == [ASSET_BUDGET_MB * 1024 * 1024]